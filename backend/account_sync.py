@@ -0,0 +1,188 @@
+"""Exchange account sync: signed balance requests with a short-lived cache.
+
+Balances size bot trades (``trade_amount_percentage`` is a share of the free
+quote balance), so they are read often but go stale quickly.
+
+* Requests are signed like Binance's SIGNED endpoints: HMAC-SHA256 of the
+  query string with the user's API secret, key in ``X-MBX-APIKEY``.
+* Balances are cached per user for ``ttl`` seconds. Concurrent readers of an
+  expired entry share one request.
+* ``refresh_users`` loads credentials in batches with one query each and
+  fetches them concurrently. A single semaphore caps requests to the exchange
+  across every caller, so a bulk refresh cannot crowd out interactive reads or
+  trip the exchange's rate limits.
+* ``invalidate`` drops a user's entry; call it after anything that moves funds.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+from urllib.parse import urlencode
+
+import httpx
+
+RECV_WINDOW_MS = 5000
+
+
+class ExchangeError(Exception):
+    """Raised when the exchange rejects or fails a request"""
+
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def sign_query(params: dict, api_secret: str) -> str:
+    """Return the query string with timestamp, recvWindow and HMAC-SHA256 signature appended"""
+    query = urlencode({**params, "timestamp": int(time.time() * 1000), "recvWindow": RECV_WINDOW_MS})
+    signature = hmac.new(api_secret.encode(), query.encode(), hashlib.sha256).hexdigest()
+    return f"{query}&signature={signature}"
+
+
+class ExchangeClient:
+    """Signed requests against a Binance-compatible REST API"""
+
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # One pooled client per worker; created on first use inside the event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def signed_get(self, path: str, api_key: str, api_secret: str, params: dict = None) -> dict:
+        query = sign_query(params or {}, api_secret)
+        try:
+            response = await self.client.get(f"{path}?{query}", headers={"X-MBX-APIKEY": api_key})
+        except httpx.HTTPError as e:
+            raise ExchangeError(f"Exchange request failed: {e}")
+        if response.status_code != 200:
+            try:
+                message = response.json().get("msg", response.text)
+            except ValueError:
+                message = response.text
+            raise ExchangeError(f"Exchange returned {response.status_code}: {message}", response.status_code)
+        return response.json()
+
+    async def get_balances(self, api_key: str, api_secret: str) -> dict:
+        """Non-zero balances as {asset: {"free": float, "locked": float}}"""
+        account = await self.signed_get("/api/v3/account", api_key, api_secret, {"omitZeroBalances": "true"})
+        balances = {}
+        for row in account.get("balances", []):
+            free, locked = float(row["free"]), float(row["locked"])
+            if free or locked:
+                balances[row["asset"]] = {"free": free, "locked": locked}
+        return balances
+
+
+class AccountSync:
+    def __init__(self, get_db, exchange: ExchangeClient, ttl: float = 15.0,
+                 max_concurrency: int = 8, batch_size: int = 100):
+        self.get_db = get_db
+        self.exchange = exchange
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cache = {}  # user id -> (expires at, balances)
+        self._inflight = {}  # user id -> future shared by concurrent readers
+
+    def cached(self, user_id: str):
+        entry = self._cache.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def invalidate(self, user_id: str):
+        self._cache.pop(user_id, None)
+
+    async def get_balances(self, user: dict, refresh: bool = False) -> dict:
+        """Balances for a user document holding trading API credentials"""
+        if not refresh:
+            balances = self.cached(user["id"])
+            if balances is not None:
+                return balances
+        inflight = self._inflight.get(user["id"])
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[user["id"]] = future
+        try:
+            async with self._semaphore:
+                balances = await self.exchange.get_balances(user["trading_api_key"], user["trading_api_secret"])
+            self._cache[user["id"]] = (time.monotonic() + self.ttl, balances)
+            future.set_result(balances)
+            return balances
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure nobody else awaited is not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(user["id"], None)
+
+    async def refresh_users(self, user_ids) -> dict:
+        """Refresh many users; return {"refreshed": n, "failed": {user id: error}}"""
+        user_ids = list(dict.fromkeys(user_ids))
+        refreshed = 0
+        failed = {}
+        projection = {"_id": 0, "id": 1, "trading_api_key": 1, "trading_api_secret": 1}
+        for start in range(0, len(user_ids), self.batch_size):
+            batch = user_ids[start:start + self.batch_size]
+            users = await self.get_db().users.find({
+                "id": {"$in": batch},
+                "trading_api_key": {"$nin": [None, ""]},
+                "trading_api_secret": {"$nin": [None, ""]},
+            }, projection).to_list(length=None)
+            results = await asyncio.gather(
+                *(self.get_balances(user, refresh=True) for user in users), return_exceptions=True
+            )
+            for user, result in zip(users, results):
+                if isinstance(result, Exception):
+                    failed[user["id"]] = str(result)
+                else:
+                    refreshed += 1
+        return {"refreshed": refreshed, "failed": failed}
+
+    async def refresh_active_bots(self) -> dict:
+        """Refresh every user with an active trading bot"""
+        user_ids = await self.get_db().trading_bots.distinct("user_id", {"active": True})
+        return await self.refresh_users(user_ids)
+
+    async def run(self, interval: float):
+        """Keep active bot owners' balances warm; run as a background task"""
+        while True:
+            try:
+                result = await self.refresh_active_bots()
+                if result["failed"]:
+                    logging.warning(f"Balance refresh failed for {len(result['failed'])} users")
+            except Exception as e:
+                logging.error(f"Balance refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def close(self):
+        await self.exchange.close()
+
+
+def position_size(balances: dict, quote_asset: str, trade_amount_percentage: float) -> dict:
+    """Quote amount a bot may trade from the free quote balance"""
+    available = balances.get(quote_asset, {}).get("free", 0.0)
+    return {
+        "quote_asset": quote_asset,
+        "available_balance": available,
+        "trade_amount_percentage": trade_amount_percentage,
+        "trade_amount": available * trade_amount_percentage / 100,
+    }
@@ -0,0 +1,245 @@
+"""Sales rollups for the admin dashboard.
+
+Rollup documents are kept up to date with ``$inc`` from the purchase path so the
+dashboard never has to scan ``tickets``. There is no single all-time totals
+document, which every checkout would contend on; totals are summed from the
+per-day rollups when the dashboard is read. ``rebuild_sales_rollups`` recomputes
+them from scratch when they drift (e.g. after a failed increment or a manual
+data fix) and can be run as a job with ``python analytics.py rebuild``.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+
+from pymongo import ASCENDING, DESCENDING
+
+KNOWN_TICKET_TYPES = ("regular", "ieee")
+ROLLUP_INDEXES = {
+    "sales_by_event": [
+        ([("event_id", ASCENDING)], {"unique": True}),
+        ([("gross_amount", DESCENDING)], {}),
+    ],
+    "sales_by_day": [
+        ([("date", ASCENDING)], {"unique": True}),
+    ],
+}
+
+
+def ticket_type_key(ticket_type) -> str:
+    """Map a ticket type to a safe rollup field name"""
+    return ticket_type if ticket_type in KNOWN_TICKET_TYPES else "other"
+
+
+def day_key(moment: datetime) -> str:
+    """Return the UTC day a sale is bucketed under"""
+    return moment.strftime("%Y-%m-%d")
+
+
+def _sale_increments(ticket: dict) -> dict:
+    """Build the $inc document for a single ticket"""
+    discount_amount = ticket.get("discount_amount") or 0
+    return {
+        "orders": 1,
+        f"tickets_by_type.{ticket_type_key(ticket.get('ticket_type'))}": ticket["quantity"],
+        "tickets_sold": ticket["quantity"],
+        "gross_amount": ticket["total_amount"],
+        "discount_amount": discount_amount,
+        "coupon_redemptions": 1 if discount_amount > 0 else 0,
+    }
+
+
+async def _create_rollup_indexes(collection, name: str):
+    for keys, options in ROLLUP_INDEXES[name]:
+        await collection.create_index(keys, **options)
+
+
+async def ensure_rollup_indexes(db):
+    """Create the indexes the dashboard reads and the purchase upserts rely on"""
+    for name in ROLLUP_INDEXES:
+        await _create_rollup_indexes(db[name], name)
+
+
+async def record_sale(db, ticket: dict):
+    """Apply a purchased ticket to the per-event and per-day rollups"""
+    inc = _sale_increments(ticket)
+    now = datetime.utcnow()
+    await asyncio.gather(
+        db.sales_by_event.update_one(
+            {"event_id": ticket["event_id"]},
+            {"$inc": inc, "$set": {"updated_at": now}},
+            upsert=True,
+        ),
+        db.sales_by_day.update_one(
+            {"date": day_key(ticket["created_at"])},
+            {"$inc": inc, "$set": {"updated_at": now}},
+            upsert=True,
+        ),
+    )
+
+
+def _empty_rollup() -> dict:
+    return {
+        "orders": 0,
+        "tickets_by_type": {},
+        "tickets_sold": 0,
+        "gross_amount": 0,
+        "discount_amount": 0,
+        "coupon_redemptions": 0,
+    }
+
+
+def _fold_group(rollup: dict, group: dict):
+    """Add one aggregation bucket (grouped by ticket type) into a rollup"""
+    type_key = ticket_type_key(group["_id"]["ticket_type"])
+    rollup["orders"] += group["orders"]
+    rollup["tickets_by_type"][type_key] = rollup["tickets_by_type"].get(type_key, 0) + group["tickets_sold"]
+    rollup["tickets_sold"] += group["tickets_sold"]
+    rollup["gross_amount"] += group["gross_amount"]
+    rollup["discount_amount"] += group["discount_amount"]
+    rollup["coupon_redemptions"] += group["coupon_redemptions"]
+
+
+def _group_stage(key: dict) -> dict:
+    return {
+        "$group": {
+            "_id": key,
+            "orders": {"$sum": 1},
+            "tickets_sold": {"$sum": "$quantity"},
+            "gross_amount": {"$sum": "$total_amount"},
+            "discount_amount": {"$sum": {"$ifNull": ["$discount_amount", 0]}},
+            "coupon_redemptions": {
+                "$sum": {"$cond": [{"$gt": [{"$ifNull": ["$discount_amount", 0]}, 0]}, 1, 0]}
+            },
+        }
+    }
+
+
+async def _replace_collection(db, name: str, docs: list):
+    """Swap a rollup collection for freshly computed documents"""
+    staging = db[f"{name}_rebuild"]
+    await staging.drop()
+    if docs:
+        await staging.insert_many(docs)
+        # Indexes move with the rename, so the swapped-in collection is never
+        # without the unique keys the purchase path's upserts depend on
+        await _create_rollup_indexes(staging, name)
+        await staging.rename(name, dropTarget=True)
+    else:
+        await db[name].delete_many({})
+
+
+async def rebuild_sales_rollups(db, archive_collection: str = None) -> dict:
+    """Recompute every rollup from the tickets collection.
+
+    Tickets moved to ``archive_collection`` by the archiver are counted too.
+    Sales recorded while the rebuild is running may be missed, so run it during
+    quiet periods.
+    """
+    now = datetime.utcnow()
+    sources = [{"$unionWith": {"coll": archive_collection}}] if archive_collection else []
+    by_event = {}
+    by_day = {}
+    totals = _empty_rollup()
+
+    event_cursor = db.tickets.aggregate(sources + [
+        _group_stage({"event_id": "$event_id", "ticket_type": "$ticket_type"}),
+    ], allowDiskUse=True)
+    async for group in event_cursor:
+        event_id = group["_id"]["event_id"]
+        rollup = by_event.setdefault(event_id, {"event_id": event_id, **_empty_rollup()})
+        _fold_group(rollup, group)
+        _fold_group(totals, group)
+
+    day_cursor = db.tickets.aggregate(sources + [
+        _group_stage({
+            "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+            "ticket_type": "$ticket_type",
+        }),
+    ], allowDiskUse=True)
+    async for group in day_cursor:
+        date = group["_id"]["date"]
+        rollup = by_day.setdefault(date, {"date": date, **_empty_rollup()})
+        _fold_group(rollup, group)
+
+    for rollup in list(by_event.values()) + list(by_day.values()):
+        rollup["updated_at"] = now
+
+    await _replace_collection(db, "sales_by_event", list(by_event.values()))
+    await _replace_collection(db, "sales_by_day", list(by_day.values()))
+    # Left over from when totals were kept in one document
+    await db.sales_totals.drop()
+
+    return {
+        "events": len(by_event),
+        "days": len(by_day),
+        "orders": totals["orders"],
+        "rebuilt_at": now,
+    }
+
+
+async def get_sales_totals(db) -> dict:
+    """Sum the per-day rollups (one small document per day of sales)"""
+    fields = ("orders", "tickets_sold", "gross_amount", "discount_amount", "coupon_redemptions")
+    type_keys = KNOWN_TICKET_TYPES + ("other",)
+    group = {"_id": None, **{field: {"$sum": f"${field}"} for field in fields}}
+    group.update({f"type_{key}": {"$sum": f"$tickets_by_type.{key}"} for key in type_keys})
+    rows = await db.sales_by_day.aggregate([{"$group": group}]).to_list(length=1)
+    if not rows:
+        return _empty_rollup()
+    totals = {field: rows[0][field] for field in fields}
+    totals["tickets_by_type"] = {key: rows[0][f"type_{key}"] for key in type_keys if rows[0][f"type_{key}"]}
+    return totals
+
+
+async def get_sales_dashboard(db, days: int = 30, top_events: int = 10) -> dict:
+    """Read the dashboard from rollups only; cost grows with days of sales, not tickets"""
+    projection = {"_id": 0}
+    totals, daily, events = await asyncio.gather(
+        get_sales_totals(db),
+        db.sales_by_day.find({}, projection).sort("date", DESCENDING).to_list(length=days),
+        db.sales_by_event.find({}, projection).sort("gross_amount", DESCENDING).to_list(length=top_events),
+    )
+    totals["net_amount"] = totals["gross_amount"] - totals["discount_amount"]
+    daily.reverse()
+    return {
+        "totals": totals,
+        "daily": daily,
+        "top_events": events,
+    }
+
+
+def main(argv=None):
+    """``python analytics.py rebuild``, configured like the server (environment, then backend/.env)"""
+    import sys
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from archival import MongoColdStore
+
+    if (sys.argv[1:] if argv is None else argv) != ["rebuild"]:
+        sys.exit("usage: python analytics.py rebuild")
+
+    load_dotenv(Path(__file__).parent / '.env')
+    logging.basicConfig(level=logging.INFO)
+    archive_store = os.environ.get("ARCHIVE_STORE", "mongo")
+    if archive_store != "mongo":
+        # The rebuild aggregates inside MongoDB and would leave archived tickets out of the totals
+        sys.exit(f"Sales rollups cannot be rebuilt with ARCHIVE_STORE={archive_store}")
+
+    async def rebuild():
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        db = client[os.environ['DB_NAME']]
+        try:
+            result = await rebuild_sales_rollups(db, MongoColdStore(lambda: db).collection_name("tickets"))
+        finally:
+            client.close()
+        logging.info(f"Sales rollups rebuilt: {result}")
+
+    asyncio.run(rebuild())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Hot/cold archival for data that no longer changes.
+
+Completed and canceled events (together with all of their tickets) and settled
+trade history are moved out of the hot collections once they are older than
+``older_than``, so the indexes and working set every query touches stop
+growing with history. Cold data goes to ``<collection>_archive`` collections
+(``MongoColdStore``) or to zstd-compressed Parquet files (``ParquetColdStore``).
+
+Each batch is copied to the cold store and then deleted from the hot
+collection, so an interrupted run leaves documents in the hot collection (and
+perhaps already in the cold store) and the next pass picks them up again.
+Re-copying is harmless: cold documents are replaced by ``_id`` and Parquet
+files are named after the batch's ``_id`` range. An event's tickets are
+always moved before the event, so a hot ticket never points at an archived
+event.
+
+Only one worker archives at a time; the others skip the pass while another
+holds the lease in ``archive_leases`` (expired by a TTL index, see
+``database.TRANSIENT_COLLECTIONS``).
+
+``find_one`` reads hot first and falls back to the cold store, for admin
+lookups of archived records.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import ASCENDING, ReplaceOne
+from pymongo.errors import DuplicateKeyError
+from starlette.concurrency import run_in_threadpool
+
+FINISHED_EVENT_STATUSES = ["completed", "canceled"]
+SETTLED_TRADE_STATUSES = ["completed", "failed"]
+LEASE_ID = "archiver"
+LEASE_SECONDS = 300
+
+
+class LeaseLost(Exception):
+    """Raised when another worker took over the archive lease during a pass"""
+
+
+class MongoColdStore:
+    """Cold copies in ``<collection>_archive`` collections of the same database"""
+
+    def __init__(self, get_db, suffix: str = "_archive"):
+        self.get_db = get_db
+        self.suffix = suffix
+
+    def collection_name(self, collection: str) -> str:
+        return f"{collection}{self.suffix}"
+
+    async def ensure_indexes(self):
+        for collection in ("events", "tickets", "trade_history"):
+            await self.get_db()[self.collection_name(collection)].create_index("id")
+
+    async def write(self, collection: str, docs: list):
+        # Replacing by _id makes a retried batch overwrite its earlier copy
+        await self.get_db()[self.collection_name(collection)].bulk_write(
+            [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs], ordered=False
+        )
+
+    async def find_one(self, collection: str, doc_id: str, projection: Optional[dict] = None) -> Optional[dict]:
+        return await self.get_db()[self.collection_name(collection)].find_one({"id": doc_id}, projection)
+
+
+class ParquetColdStore:
+    """Cold copies as one zstd-compressed Parquet file per batch under ``directory/<collection>/``
+
+    Lookups scan the files newest first, which is fine for occasional admin
+    reads but not for anything on a hot path. MongoDB cannot read these files,
+    so sales rollups cannot be rebuilt while this store is in use.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    async def ensure_indexes(self):
+        pass
+
+    async def write(self, collection: str, docs: list):
+        await run_in_threadpool(self._write, collection, docs)
+
+    def _write(self, collection: str, docs: list):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        folder = os.path.join(self.directory, collection)
+        os.makedirs(folder, exist_ok=True)
+        # Named after the batch's _id range, so a retried batch rewrites the same file
+        path = os.path.join(folder, f"{docs[0]['_id']}-{docs[-1]['_id']}.parquet")
+        rows = [{**doc, "_id": str(doc["_id"])} for doc in docs]
+        tmp_path = f"{path}.tmp"
+        pq.write_table(pa.Table.from_pylist(rows), tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+
+    async def find_one(self, collection: str, doc_id: str, projection: Optional[dict] = None) -> Optional[dict]:
+        doc = await run_in_threadpool(self._find_one, collection, doc_id)
+        if doc is None or not projection:
+            return doc
+        included = {field for field, value in projection.items() if value}
+        if included:
+            return {field: value for field, value in doc.items() if field in included}
+        return {field: value for field, value in doc.items() if field not in projection}
+
+    def _find_one(self, collection: str, doc_id: str) -> Optional[dict]:
+        import pyarrow.parquet as pq
+
+        folder = os.path.join(self.directory, collection)
+        if not os.path.isdir(folder):
+            return None
+        # Files are read one by one because each batch has its own inferred schema
+        for name in sorted(os.listdir(folder), reverse=True):
+            if not name.endswith(".parquet"):
+                continue
+            rows = pq.read_table(os.path.join(folder, name), filters=[("id", "=", doc_id)]).to_pylist()
+            if rows:
+                return rows[0]
+        return None
+
+
+async def ensure_archive_indexes(db):
+    """Indexes the archiver's selection queries rely on"""
+    await db.events.create_index([("status", ASCENDING), ("end_date", ASCENDING)])
+    await db.tickets.create_index("event_id")
+    await db.trade_history.create_index([("status", ASCENDING), ("created_at", ASCENDING)])
+
+
+class Archiver:
+    def __init__(self, get_db, store, older_than: timedelta = timedelta(days=30),
+                 batch_size: int = 500, max_batches: int = 100):
+        self.get_db = get_db
+        self.store = store
+        self.older_than = older_than
+        self.batch_size = batch_size
+        self.max_batches = max_batches  # per collection per pass; the rest waits for the next pass
+        self.owner = str(uuid.uuid4())
+
+    async def acquire_lease(self) -> bool:
+        now = datetime.utcnow()
+        try:
+            await self.get_db().archive_leases.find_one_and_update(
+                {"_id": LEASE_ID, "$or": [{"expire_at": {"$lt": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "expire_at": now + timedelta(seconds=LEASE_SECONDS)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Another worker holds an unexpired lease
+            return False
+        return True
+
+    async def release_lease(self):
+        await self.get_db().archive_leases.delete_one({"_id": LEASE_ID, "owner": self.owner})
+
+    async def archive(self) -> Optional[dict]:
+        """Run one pass; return documents moved per collection, or None if another worker is archiving"""
+        if not await self.acquire_lease():
+            return None
+        try:
+            cutoff = datetime.utcnow() - self.older_than
+            moved = {"events": 0, "tickets": 0, "trade_history": 0}
+            try:
+                for _ in range(self.max_batches):
+                    events = await self._archive_event_batch(cutoff, moved)
+                    # Renew the lease between batches; stop if it was lost
+                    if events < self.batch_size or not await self.acquire_lease():
+                        break
+                for _ in range(self.max_batches):
+                    trades = await self._move("trade_history", {
+                        "status": {"$in": SETTLED_TRADE_STATUSES},
+                        "created_at": {"$lt": cutoff},
+                    })
+                    moved["trade_history"] += trades
+                    if trades < self.batch_size or not await self.acquire_lease():
+                        break
+            except LeaseLost:
+                logging.warning("Archive lease lost mid-pass; the rest is left for the next pass")
+            await self._record_progress(moved)
+            return moved
+        finally:
+            await self.release_lease()
+
+    async def _archive_event_batch(self, cutoff: datetime, moved: dict) -> int:
+        """Archive the oldest batch of finished events after all of their tickets; return the event count"""
+        events = await self.get_db().events.find(
+            {"status": {"$in": FINISHED_EVENT_STATUSES}, "end_date": {"$lt": cutoff}}, {"_id": 1, "id": 1}
+        ).sort("_id", ASCENDING).limit(self.batch_size).to_list(length=None)
+        if not events:
+            return 0
+        while True:
+            count = await self._move("tickets", {"event_id": {"$in": [event["id"] for event in events]}})
+            moved["tickets"] += count
+            if count < self.batch_size:
+                break
+            # Large events take many ticket batches; the events stay hot if the lease is lost here
+            if not await self.acquire_lease():
+                raise LeaseLost()
+        await self._move("events", {"_id": {"$in": [event["_id"] for event in events]}})
+        moved["events"] += len(events)
+        return len(events)
+
+    async def _move(self, collection: str, query: dict) -> int:
+        """Copy the oldest matching batch to the cold store, then delete it from the hot collection"""
+        hot = self.get_db()[collection]
+        docs = await hot.find(query).sort("_id", ASCENDING).limit(self.batch_size).to_list(length=None)
+        if not docs:
+            return 0
+        await self.store.write(collection, docs)
+        await hot.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        return len(docs)
+
+    async def _record_progress(self, moved: dict):
+        now = datetime.utcnow()
+        for collection, count in moved.items():
+            await self.get_db().archive_state.update_one(
+                {"_id": collection},
+                {"$inc": {"archived_count": count}, "$set": {"last_run_at": now}},
+                upsert=True,
+            )
+
+    async def status(self) -> list:
+        return await self.get_db().archive_state.find({}).to_list(length=None)
+
+    async def find_one(self, collection: str, doc_id: str, projection: Optional[dict] = None) -> Optional[dict]:
+        """Read from the hot collection, falling back to the archive"""
+        doc = await self.get_db()[collection].find_one({"id": doc_id}, projection)
+        if doc is None:
+            doc = await self.store.find_one(collection, doc_id, projection)
+        return doc
+
+    async def run(self, interval: float):
+        """Archive periodically; run as a background task"""
+        while True:
+            try:
+                moved = await self.archive()
+                if moved and any(moved.values()):
+                    logging.info(f"Archived {moved}")
+            except Exception as e:
+                logging.error(f"Archival pass failed: {e}")
+            await asyncio.sleep(interval)
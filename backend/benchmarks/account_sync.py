@@ -0,0 +1,88 @@
+"""Balance refresh throughput and cache behaviour against a local stand-in exchange.
+
+Seeds users with trading credentials and active bots into the in-memory Mongo
+stand-in, then against ``ExchangeStub`` (with simulated exchange latency):
+
+* times a cold ``refresh_active_bots`` and confirms the stub never saw more
+  concurrent requests than the configured cap
+* times cached reads
+
+Signing, caching, request sharing and error handling are covered by
+``tests/test_account_sync.py``.
+
+    python -m benchmarks.account_sync [--users 500] [--latency-ms 20] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from benchmarks.common import BACKEND_DIR, time_per_call, write_report
+from benchmarks.stubs import ExchangeStub
+
+
+async def run(args) -> dict:
+    from mongomock_motor import AsyncMongoMockClient
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    from account_sync import AccountSync, ExchangeClient
+
+    db = AsyncMongoMockClient()["account_sync_bench"]
+    accounts = {
+        f"key-{i}": (f"secret-{i}", {"USDT": (1000.0 + i, 5.0), "BTC": (0.01 * i, 0.0), "ETH": (0.0, 0.0)})
+        for i in range(args.users)
+    }
+    await db.users.insert_many([
+        {"id": f"user-{i}", "trading_api_key": f"key-{i}", "trading_api_secret": f"secret-{i}"}
+        for i in range(args.users)
+    ] + [{"id": "no-credentials"}])
+    await db.trading_bots.insert_many([
+        {"id": f"bot-{i}", "user_id": f"user-{i}", "quote_asset": "USDT", "active": True}
+        for i in range(args.users)
+    ])
+
+    with ExchangeStub(accounts, latency=args.latency_ms / 1000) as exchange:
+        sync = AccountSync(lambda: db, ExchangeClient(exchange.url), ttl=60, max_concurrency=args.concurrency)
+        checks = {}
+        try:
+            started = time.perf_counter()
+            result = await sync.refresh_active_bots()
+            elapsed = time.perf_counter() - started
+            checks["refreshed_all"] = result["refreshed"] == args.users and not result["failed"]
+            checks["concurrency_capped"] = exchange.peak_in_flight <= args.concurrency
+
+            cached_read = time_per_call(lambda: sync.cached("user-7"))
+        finally:
+            await sync.close()
+
+    serial_estimate = args.users * args.latency_ms / 1000
+    return {
+        "users": args.users,
+        "exchange_latency_ms": args.latency_ms,
+        "max_concurrency": args.concurrency,
+        "checks": checks,
+        "cold_refresh_s": round(elapsed, 3),
+        "serial_estimate_s": round(serial_estimate, 3),
+        "speedup_vs_serial": round(serial_estimate / elapsed, 1) if elapsed else None,
+        "peak_exchange_concurrency": exchange.peak_in_flight,
+        "exchange_requests": exchange.requests,
+        "cached_read_us": round(cached_read * 1e6, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    write_report("account_sync", report, args.output)
+    if not all(report["checks"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
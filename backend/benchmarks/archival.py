@@ -0,0 +1,209 @@
+"""Archival throughput, resumability and read-through for both cold stores.
+
+Seeds events (a share of them finished long ago), their tickets and trade
+history into the in-memory Mongo stand-in, then for ``MongoColdStore`` and
+``ParquetColdStore``:
+
+* times a full archival pass and reports documents moved per second
+* checks only eligible documents left the hot collections and every one of
+  them landed in the cold store exactly once
+* interrupts a pass after the cold copy of a batch but before the hot delete,
+  and checks the next pass resumes without losing or duplicating documents
+* checks a second worker cannot archive while the lease is held
+* checks ``find_one`` reads archived tickets and events through
+
+    python -m benchmarks.archival [--events 400] [--tickets-per-event 20] [--batch-size 500]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import bson
+
+from benchmarks.common import BACKEND_DIR, write_report
+
+
+class InterruptedBatch(Exception):
+    pass
+
+
+def seed_documents(args):
+    now = datetime.utcnow()
+    events, tickets, trades = [], [], []
+    for i in range(args.events):
+        finished = i % 2 == 0
+        end_date = now - timedelta(days=90 if finished else -10)
+        event_id = str(uuid.uuid4())
+        events.append({
+            "id": event_id, "title": f"Event {i}", "description": "Benchmark event " * 10,
+            "location": "Hall", "start_date": end_date - timedelta(hours=3), "end_date": end_date,
+            "price_regular": 20.0, "status": ["completed", "canceled"][i % 4 // 2] if finished else "upcoming",
+            "featured": False, "created_at": now, "updated_at": now,
+        })
+        for j in range(args.tickets_per_event):
+            tickets.append({
+                "id": str(uuid.uuid4()), "event_id": event_id, "user_id": f"user-{j}", "quantity": 1,
+                "ticket_type": "regular", "status": "used" if finished else "active", "payment_method": "card",
+                "total_amount": 20.0, "discount_amount": 0, "qr_code": "iVBORw0KGgo" * 40,
+                "created_at": end_date - timedelta(days=7), "updated_at": end_date,
+            })
+    for i in range(args.events * 5):
+        created_at = now - timedelta(days=60 if i % 3 else 1)
+        trades.append({
+            "id": str(uuid.uuid4()), "user_id": f"user-{i % 50}", "bot_id": "bot", "symbol": "BTCUSDT",
+            "action": "buy", "quantity": 0.01, "price": 60000.0, "total": 600.0,
+            "status": "pending" if i % 7 == 0 else "completed", "created_at": created_at, "updated_at": created_at,
+        })
+    return events, tickets, trades
+
+
+def eligible_ids(events, tickets, trades, cutoff):
+    finished = {e["id"] for e in events if e["status"] in ("completed", "canceled") and e["end_date"] < cutoff}
+    return {
+        "events": finished,
+        "tickets": {t["id"] for t in tickets if t["event_id"] in finished},
+        "trade_history": {
+            t["id"] for t in trades if t["status"] in ("completed", "failed") and t["created_at"] < cutoff
+        },
+    }
+
+
+async def cold_ids(store, collection: str) -> list:
+    from archival import MongoColdStore
+
+    if isinstance(store, MongoColdStore):
+        docs = await store.get_db()[store.collection_name(collection)].find({}, {"id": 1}).to_list(length=None)
+        return [doc["id"] for doc in docs]
+    import pyarrow.parquet as pq
+
+    folder = os.path.join(store.directory, collection)
+    ids = []
+    for name in os.listdir(folder) if os.path.isdir(folder) else []:
+        ids.extend(pq.read_table(os.path.join(folder, name), columns=["id"]).column("id").to_pylist())
+    return ids
+
+
+async def run_store(kind: str, args, seed, directory: str) -> dict:
+    from mongomock_motor import AsyncMongoMockClient
+
+    from archival import Archiver, MongoColdStore, ParquetColdStore, ensure_archive_indexes
+
+    events, tickets, trades = seed
+    db = AsyncMongoMockClient()[f"archival_{kind}"]
+    await db.events.insert_many([dict(doc) for doc in events])
+    await db.tickets.insert_many([dict(doc) for doc in tickets])
+    await db.trade_history.insert_many([dict(doc) for doc in trades])
+    await ensure_archive_indexes(db)
+
+    store = MongoColdStore(lambda: db) if kind == "mongo" else ParquetColdStore(directory)
+    archiver = Archiver(lambda: db, store, older_than=timedelta(days=30), batch_size=args.batch_size)
+    expected = eligible_ids(events, tickets, trades, datetime.utcnow() - archiver.older_than)
+    checks = {}
+
+    # Crash after the second cold write, before its hot delete
+    write = store.write
+    writes = 0
+
+    async def interrupted_write(collection, docs):
+        nonlocal writes
+        await write(collection, docs)
+        writes += 1
+        if writes == 2:
+            raise InterruptedBatch()
+
+    store.write = interrupted_write
+    try:
+        await archiver.archive()
+        checks["interrupted"] = False
+    except InterruptedBatch:
+        checks["interrupted"] = True
+    store.write = write
+
+    other = Archiver(lambda: db, store)
+    await archiver.acquire_lease()
+    checks["lease_excludes_other_workers"] = await other.archive() is None
+    await archiver.release_lease()
+
+    started = time.perf_counter()
+    moved = await archiver.archive()
+    elapsed = time.perf_counter() - started
+
+    for collection, ids in expected.items():
+        hot = {doc["id"] for doc in await db[collection].find({}, {"id": 1}).to_list(length=None)}
+        cold = await cold_ids(store, collection)
+        checks[f"{collection}_hot_kept_only_live"] = not hot & ids
+        checks[f"{collection}_cold_complete"] = set(cold) == ids
+        checks[f"{collection}_cold_no_duplicates"] = len(cold) == len(ids)
+    checks["nothing_left_on_rerun"] = not any((await archiver.archive()).values())
+
+    ticket_id = sorted(expected["tickets"])[0]
+    event_id = sorted(expected["events"])[0]
+    ticket = await archiver.find_one("tickets", ticket_id, {"_id": 0, "id": 1, "event_id": 1})
+    event = await archiver.find_one("events", event_id, {"_id": 0, "id": 1, "title": 1})
+    checks["read_through_ticket"] = ticket == {"id": ticket_id, "event_id": ticket["event_id"]} if ticket else False
+    checks["read_through_event"] = bool(event) and event["id"] == event_id
+    started = time.perf_counter()
+    await archiver.find_one("tickets", ticket_id)
+    lookup = time.perf_counter() - started
+
+    total = sum(len(ids) for ids in expected.values())
+    result = {
+        "checks": checks,
+        "moved_after_resume": moved,
+        "documents_archived": total,
+        "archive_pass_s": round(elapsed, 3),
+        "documents_per_second": round(sum(moved.values()) / elapsed) if elapsed else None,
+        "archived_read_through_ms": round(lookup * 1000, 2),
+    }
+    if kind == "parquet":
+        on_disk = sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(directory) for name in names
+        )
+        bson_bytes = sum(
+            len(bson.encode(doc)) for docs, collection in ((events, "events"), (tickets, "tickets"), (trades, "trade_history"))
+            for doc in docs if doc["id"] in expected[collection]
+        )
+        result["parquet_bytes"] = on_disk
+        result["bson_bytes"] = bson_bytes
+        result["compression_ratio"] = round(bson_bytes / on_disk, 1) if on_disk else None
+    return result
+
+
+async def run(args) -> dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    seed = seed_documents(args)
+    report = {
+        "events": args.events,
+        "tickets": len(seed[1]),
+        "trade_history": len(seed[2]),
+        "batch_size": args.batch_size,
+        "stores": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in ("mongo", "parquet"):
+            report["stores"][kind] = await run_store(kind, args, seed, directory)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=400)
+    parser.add_argument("--tickets-per-event", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    write_report("archival", report, args.output)
+    if not all(all(store["checks"].values()) for store in report["stores"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
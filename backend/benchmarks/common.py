@@ -0,0 +1,76 @@
+"""Shared helpers for the benchmark scripts.
+
+Run benchmarks from the backend directory, e.g. ``python -m benchmarks.serialization``.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def import_server(protection: bool = False):
+    """Import the app module; without a frontend build it serves the API only
+
+    Every in-process request comes from one client IP, so rate limiting and
+    load shedding are off unless ``protection`` is set or the environment
+    says otherwise; otherwise benchmarks end up timing 429 responses.
+    """
+    enabled = "1" if protection else "0"
+    os.environ.setdefault("ENABLE_RATE_LIMITING", enabled)
+    os.environ.setdefault("ENABLE_LOAD_SHEDDING", enabled)
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    return server
+
+
+def use_database(server, db):
+    """Point every routed database handle at ``db`` (e.g. an in-memory stand-in)"""
+    server.db = server.catalog_db = server.analytics_db = server.purchase_db = db
+
+
+def time_per_call(func, min_seconds: float = 0.5) -> float:
+    """Return the mean wall time of ``func`` in seconds over at least ``min_seconds``"""
+    func()
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return elapsed / calls
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_report(name: str, results, output: str = None):
+    """Print results as JSON and optionally save them for comparison across commits"""
+    report = {
+        "benchmark": name,
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if output:
+        Path(output).write_text(text + "\n")
+    print(text)
+    return report
@@ -0,0 +1,212 @@
+"""Event search latency over a large synthetic catalog.
+
+Needs a real mongod, since the in-memory stand-in has no text index:
+
+    python -m benchmarks.event_search --mongo-url mongodb://localhost:27017 \\
+        [--events 1000000] [--repeat 50] [--output results.json]
+
+``--mongo-url`` defaults to ``MONGO_URL``; ``tests/test_event_search.py`` runs
+the same benchmark when that is set and skips otherwise.
+
+The catalog is seeded into ``--db-name`` (default ``event_search_bench``) and
+reused on later runs if it already holds ``--events`` documents; ``--drop``
+reseeds. Each query is timed through ``event_search`` exactly as the endpoint
+calls it, and its winning plan is reported so a collection scan or an
+in-memory sort shows up next to the latency. Any query whose p95 is over
+``BUDGET_MS`` makes the run exit non-zero.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.common import BACKEND_DIR, percentile, write_report
+
+BUDGET_MS = 50.0
+BATCH_SIZE = 10000
+WORDS = [
+    "jazz", "rock", "festival", "conference", "workshop", "hackathon", "summit", "meetup", "robotics",
+    "signal", "processing", "power", "systems", "networking", "startup", "career", "fair", "gala",
+    "seminar", "lecture", "symposium", "expo", "night", "quantum", "wireless", "embedded", "vision",
+    "machine", "learning", "security", "cloud", "energy", "antenna", "circuits", "photonics", "awards",
+]
+CITIES = ["Cairo", "Giza", "Alexandria", "Berlin", "Paris", "Madrid", "London", "Lisbon", "Rome", "Vienna",
+          "Prague", "Dublin", "Athens", "Oslo", "Warsaw", "Istanbul", "Dubai", "Tokyo", "Seoul", "Toronto"]
+STATUS_WEIGHTS = {"upcoming": 60, "ongoing": 5, "completed": 30, "canceled": 5}
+
+
+def make_events(count: int, rng: random.Random, epoch: datetime) -> list:
+    statuses = rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()), k=count)
+    events = []
+    for offset in range(count):
+        start_date = epoch + timedelta(minutes=rng.randrange(0, 3 * 365 * 24 * 60))
+        events.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "title": " ".join(rng.sample(WORDS, 3)).title(),
+            "description": " ".join(rng.choices(WORDS, k=25)),
+            "location": f"{rng.choice(CITIES)} Hall {rng.randrange(1, 50)}",
+            "start_date": start_date,
+            "end_date": start_date + timedelta(hours=rng.choice([2, 3, 8, 24])),
+            "price_regular": round(rng.lognormvariate(3.5, 0.8), 2),
+            "price_ieee_member": None,
+            "status": statuses[offset],
+            "featured": rng.random() < 0.02,
+            "created_at": epoch,
+            "updated_at": epoch,
+        })
+    return events
+
+
+async def seed(db, total: int, drop: bool):
+    if drop:
+        await db.events.drop()
+    existing = await db.events.estimated_document_count()
+    if existing >= total:
+        return {"seeded": 0, "existing": existing}
+    rng = random.Random(existing)
+    epoch = datetime(2025, 1, 1)
+    started = time.perf_counter()
+    for start in range(existing, total, BATCH_SIZE):
+        await db.events.insert_many(make_events(min(BATCH_SIZE, total - start), rng, epoch), ordered=False)
+    return {"seeded": total - existing, "existing": existing, "seed_seconds": round(time.perf_counter() - started, 1)}
+
+
+def winning_plan(explain: dict) -> str:
+    """Summarise the winning plan as a chain of stages, e.g. LIMIT>FETCH>IXSCAN(status_1_start_date_1_id_1)"""
+    stages = []
+    plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    plan = plan.get("queryPlan", plan)
+    while plan:
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage += f"({plan['indexName']})"
+        stages.append(stage)
+        children = plan.get("inputStages") or []
+        plan = plan.get("inputStage") or (children[0] if children else None)
+    return ">".join(stages)
+
+
+async def deep_cursor(event_search, db, projection, filters, sort: str, pages: int):
+    """Walk ``pages`` pages to get a cursor deep into the result set"""
+    cursor = None
+    for _ in range(pages):
+        page = await event_search.search_events(db, projection, filters, sort=sort, limit=50, cursor=cursor)
+        cursor = page["next_cursor"]
+    return cursor
+
+
+async def run(args) -> dict:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    import event_search
+
+    client = AsyncIOMotorClient(args.mongo_url)
+    db = client[args.db_name]
+    seeding = await seed(db, args.events, args.drop)
+    started = time.perf_counter()
+    await event_search.ensure_search_indexes(db)
+    seeding["index_seconds"] = round(time.perf_counter() - started, 1)
+    seeding["events"] = await db.events.estimated_document_count()
+
+    projection = {"_id": 0, "id": 1, "title": 1, "location": 1, "start_date": 1, "price_regular": 1,
+                  "status": 1, "featured": 1}
+    now = datetime(2026, 1, 1)
+    build = event_search.build_filters
+    queries = {
+        "default_first_page": (build(), "start_date", None),
+        "date_range_price_featured": (
+            build(featured=True, start_from=now, start_to=now + timedelta(days=90), min_price=10, max_price=80),
+            "start_date", None,
+        ),
+        "price_sort_upcoming": (build(statuses=["upcoming"]), "price", None),
+        "newest_first_price_range": (build(min_price=20, max_price=40), "-start_date", None),
+        "text_relevance": (build(q="jazz festival"), "relevance", None),
+        "text_with_filters": (build(q="robotics workshop", statuses=["upcoming"], max_price=60), "start_date", None),
+    }
+    deep_filters = build()
+    queries["keyset_page_100"] = (
+        deep_filters, "start_date",
+        await deep_cursor(event_search, db, projection, deep_filters, "start_date", 100),
+    )
+
+    results = []
+    for name, (filters, sort, cursor) in queries.items():
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            await event_search.search_events(db, projection, filters, sort=sort, limit=20, cursor=cursor)
+            timings.append(time.perf_counter() - started)
+        query = event_search.combine(filters)
+        if sort == "relevance":
+            order = {"score": {"$meta": "textScore"}, "id": 1}
+        else:
+            field, direction = event_search.SORTS[sort]
+            order = {field: direction, "id": direction}
+        if cursor:
+            query = {"$and": [query, event_search.keyset_predicate(
+                field, direction, *event_search.decode_cursor(cursor, sort)
+            )]}
+        explain = await db.command(
+            "explain", {"find": "events", "filter": query, "sort": order, "limit": 21}, verbosity="queryPlanner"
+        )
+        results.append(summarise(name, timings, winning_plan(explain)))
+
+    facet_filters = {
+        "facets_date_range": build(start_from=now, start_to=now + timedelta(days=30)),
+        "facets_text": build(q="quantum"),
+    }
+    for name, filters in facet_filters.items():
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            await event_search.search_facets(db, filters)
+            timings.append(time.perf_counter() - started)
+        results.append(summarise(name, timings, "aggregate"))
+
+    if args.drop_after:
+        await client.drop_database(args.db_name)
+    client.close()
+    return {"catalog": seeding, "budget_ms": BUDGET_MS, "queries": results}
+
+
+def summarise(name: str, timings: list, plan: str) -> dict:
+    timings.sort()
+    p95 = percentile(timings, 0.95) * 1000
+    return {
+        "query": name,
+        "runs": len(timings),
+        "p50_ms": round(percentile(timings, 0.50) * 1000, 2),
+        "p95_ms": round(p95, 2),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 2),
+        "plan": plan,
+        "within_budget": p95 < BUDGET_MS,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL"), required="MONGO_URL" not in os.environ)
+    parser.add_argument("--db-name", default="event_search_bench")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--drop", action="store_true", help="Drop and reseed the catalog first")
+    parser.add_argument("--drop-after", action="store_true", help="Drop the benchmark database when done")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    write_report("event_search", report, args.output)
+    over = [query["query"] for query in report["queries"] if not query["within_budget"]]
+    if over:
+        sys.exit(f"p95 over {BUDGET_MS:g} ms: {', '.join(over)}")
+
+
+if __name__ == "__main__":
+    main()
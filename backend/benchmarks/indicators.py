@@ -0,0 +1,74 @@
+"""Indicator backend throughput from 1k to 10M candles.
+
+For every installed backend in ``indicators.BACKENDS``: mean time per call and
+million candles per second for RSI, MACD and Bollinger Bands at each size, plus
+the fastest backend. Correctness (against a reference implementation and
+between backends) is covered by ``tests/test_indicators.py``.
+
+    python -m benchmarks.indicators [--sizes 1000,10000,100000,1000000,10000000] [--min-seconds 0.5]
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from benchmarks.common import BACKEND_DIR, time_per_call, write_report
+
+INDICATORS = ("rsi", "macd", "bollinger_bands")
+
+
+def random_walk(n: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 60000 + np.cumsum(rng.normal(0, 50, n))
+
+
+def run(args) -> dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    from indicators import BACKENDS, IndicatorError, get_backend
+
+    backends = {}
+    unavailable = {}
+    for name in BACKENDS:
+        try:
+            backends[name] = get_backend(name)
+        except IndicatorError as e:
+            unavailable[name] = str(e)
+
+    sizes = {}
+    for size in args.sizes:
+        close = random_walk(size)
+        per_indicator = {}
+        for indicator in INDICATORS:
+            timings = {}
+            for name, backend in backends.items():
+                seconds = time_per_call(lambda: getattr(backend, indicator)(close), args.min_seconds)
+                timings[name] = {
+                    "ms": round(seconds * 1000, 3),
+                    "mcandles_per_s": round(size / seconds / 1e6, 2),
+                }
+            per_indicator[indicator] = {
+                "backends": timings,
+                "fastest": min(timings, key=lambda name: timings[name]["ms"]) if timings else None,
+            }
+        sizes[str(size)] = per_indicator
+        print(f"{size} candles done", file=sys.stderr)
+
+    return {
+        "unavailable": unavailable,
+        "sizes": sizes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000,10000000",
+                        type=lambda value: [int(size) for size in value.split(",")])
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="Minimum timing window per measurement")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    write_report("indicators", run(args), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Load test scenarios with throughput and latency percentiles per scenario.
+
+By default the app runs in-process behind ``httpx.ASGITransport`` with an
+in-memory Mongo stand-in (mongomock-motor), a stub kline server and a stub
+webhook sink, so no external service is needed:
+
+    python -m benchmarks.load --duration 10 --concurrency 16 --output run.json
+
+``--mongo-url mongodb://localhost:27017`` uses a local mongod instead, in a
+throwaway ``loadtest_<random>`` database that is dropped afterwards.
+
+To load a separately running server, pass ``--base-url`` together with
+``--mongo-url`` and ``--db-name``. ``--db-name`` must be the server's
+``DB_NAME`` because the harness seeds that database directly. It is never
+dropped, so point the server at a dedicated database. The stubs start on
+``--kline-port``/``--webhook-port``. Start that server with
+``BINANCE_API_URL=http://127.0.0.1:<kline-port>``,
+``TICKET_WEBHOOK_URL=http://127.0.0.1:<webhook-port>/webhook`` and the same
+``JWT_SECRET``.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+
+from benchmarks.common import percentile, use_database, write_report
+from benchmarks.stubs import KlineServer, WebhookSink
+
+SEED_EVENTS = 200
+SEED_USERS = 50
+PASSWORD = "benchmark-password"
+COUPON_CODE = "BENCH10"
+
+
+class Context:
+    """Seeded ids and tokens shared by scenario workers"""
+
+    def __init__(self, server, event_ids, tokens):
+        self.server = server
+        self.event_ids = event_ids
+        self.tokens = tokens
+        self._events = itertools.cycle(event_ids)
+        self._tokens = itertools.cycle(tokens)
+
+    def next_event(self) -> str:
+        return next(self._events)
+
+    def next_auth(self) -> dict:
+        return {"Authorization": f"Bearer {next(self._tokens)}"}
+
+
+def check(response: httpx.Response):
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url.path} -> {response.status_code}")
+
+
+async def register_login(ctx: Context, client: httpx.AsyncClient):
+    email = f"load-{uuid.uuid4().hex}@example.com"
+    check(await client.post("/api/auth/register", json={
+        "first_name": "Load", "last_name": "Test", "email": email, "password": PASSWORD,
+    }))
+    check(await client.post("/api/auth/login", json={"email": email, "password": PASSWORD}))
+
+
+async def browse_events(ctx: Context, client: httpx.AsyncClient):
+    check(await client.get("/api/events"))
+    check(await client.get("/api/events/featured"))
+    check(await client.get(f"/api/events/{ctx.next_event()}"))
+
+
+async def coupon_purchase(ctx: Context, client: httpx.AsyncClient):
+    headers = ctx.next_auth()
+    event_id = ctx.next_event()
+    check(await client.post("/api/validate-coupon", headers=headers, json={
+        "coupon_code": COUPON_CODE, "event_id": event_id,
+    }))
+    check(await client.post("/api/purchase-tickets", headers=headers, json={
+        "event_id": event_id, "quantity": 1, "ticket_type": "regular",
+        "payment_method": "card", "total_amount": 25.0, "coupon_code": COUPON_CODE,
+    }))
+
+
+async def ticket_listing(ctx: Context, client: httpx.AsyncClient):
+    check(await client.get("/api/user/tickets", headers=ctx.next_auth()))
+
+
+async def trading_signals(ctx: Context, client: httpx.AsyncClient):
+    check(await client.post("/api/trading/signals", headers=ctx.next_auth(), json={
+        "symbol": "BTCUSDT", "interval": "1h", "limit": 100,
+    }))
+
+
+SCENARIOS = {
+    "register_login": register_login,
+    "browse_events": browse_events,
+    "coupon_purchase": coupon_purchase,
+    "ticket_listing": ticket_listing,
+    "trading_signals": trading_signals,
+}
+
+
+async def seed(server, db) -> Context:
+    """Insert events, a coupon and users with a few tickets each; return their tokens"""
+    now = datetime.utcnow()
+    events = [{
+        "id": str(uuid.uuid4()), "title": f"Load event {i}", "description": "Seeded for load tests. " * 10,
+        "location": f"Hall {i % 10}", "start_date": now + timedelta(days=i), "end_date": now + timedelta(days=i, hours=3),
+        "price_regular": 25.0, "price_ieee_member": 15.0, "status": "upcoming", "featured": i % 10 == 0,
+        "created_at": now, "updated_at": now,
+    } for i in range(SEED_EVENTS)]
+    await db.events.insert_many(events)
+
+    await db.coupons.insert_one({
+        "id": str(uuid.uuid4()), "code": COUPON_CODE, "discount_percentage": 10, "event_id": None,
+        "valid_from": now - timedelta(days=1), "valid_until": None, "max_uses": None, "used_count": 0,
+        "active": True, "created_at": now, "updated_at": now,
+    })
+
+    hashed = server.hash_password(PASSWORD)
+    users = [{
+        "id": str(uuid.uuid4()), "first_name": "Seed", "last_name": str(i), "email": f"seed-{i}@example.com",
+        "password": hashed, "role": "user", "ieee_member": False, "ieee_verified": False,
+        "created_at": now, "updated_at": now,
+    } for i in range(SEED_USERS)]
+    await db.users.insert_many(users)
+
+    qr_code = server.generate_qr_code("seed")
+    await db.tickets.insert_many([{
+        "id": str(uuid.uuid4()), "event_id": events[(i * 7 + j) % SEED_EVENTS]["id"], "user_id": user["id"],
+        "quantity": 1, "ticket_type": "regular", "status": "active", "payment_method": "card",
+        "total_amount": 25.0, "discount_amount": 0, "qr_code": qr_code, "created_at": now, "updated_at": now,
+    } for i, user in enumerate(users) for j in range(5)])
+
+    tokens = [server.create_access_token({"sub": user["id"]}) for user in users]
+    return Context(server, [event["id"] for event in events], tokens)
+
+
+async def run_scenario(name: str, scenario, ctx: Context, client: httpx.AsyncClient,
+                       concurrency: int, duration: float) -> dict:
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                await scenario(ctx, client)
+            except Exception as e:
+                errors.append(str(e))
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        "scenario": name,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "operations": len(latencies),
+        "errors": len(errors),
+        "throughput_ops": round(len(latencies) / elapsed, 2),
+    }
+    if latencies:
+        result.update({
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+        })
+    if errors:
+        result["sample_errors"] = sorted(set(errors))[:5]
+    return result
+
+
+async def run(args) -> list:
+    with KlineServer(args.kline_port) as klines, WebhookSink(args.webhook_port) as webhooks:
+        # Read at import/request time by the app, so set before importing it
+        os.environ["BINANCE_API_URL"] = klines.url
+        os.environ["TICKET_WEBHOOK_URL"] = f"{webhooks.url}/webhook"
+        from benchmarks.common import import_server
+        # Measures raw capacity unless --protection turns rate limits and shedding on
+        server = import_server(protection=args.protection)
+
+        # Only a database the harness named itself is dropped afterwards
+        drop_db_name = None
+        if args.mongo_url:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            mongo = AsyncIOMotorClient(args.mongo_url)
+            if args.db_name:
+                db = mongo[args.db_name]
+            else:
+                drop_db_name = f"loadtest_{uuid.uuid4().hex[:8]}"
+                db = mongo[drop_db_name]
+        else:
+            from mongomock_motor import AsyncMongoMockClient
+            mongo = None
+            db = AsyncMongoMockClient()["loadtest"]
+
+        if args.base_url:
+            client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+        else:
+            use_database(server, db)
+            lifespan = server.app.router.lifespan_context(server.app)
+            await lifespan.__aenter__()
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=server.app), base_url="http://loadtest", timeout=60,
+            )
+
+        try:
+            ctx = await seed(server, db)
+            names = args.scenarios or list(SCENARIOS)
+            results = []
+            for name in names:
+                results.append(await run_scenario(
+                    name, SCENARIOS[name], ctx, client, args.concurrency, args.duration,
+                ))
+            results.append({
+                "scenario": "_stubs",
+                "kline_requests": klines.requests,
+                "webhooks_received": webhooks.received,
+            })
+            return results
+        finally:
+            await client.aclose()
+            if not args.base_url:
+                await lifespan.__aexit__(None, None, None)
+            if drop_db_name is not None:
+                await mongo.drop_database(drop_db_name)
+            if mongo is not None:
+                mongo.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="*", choices=list(SCENARIOS), help="Default: all scenarios")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mongo-url", help="Use a local mongod instead of the in-memory stand-in")
+    parser.add_argument("--base-url",
+                        help="Load an already running server (requires --mongo-url and --db-name for seeding)")
+    parser.add_argument("--db-name", help="Database to seed and keep; must match the running server's DB_NAME")
+    parser.add_argument("--protection", action="store_true",
+                        help="Enable rate limiting and load shedding (in-process mode)")
+    parser.add_argument("--kline-port", type=int, default=0)
+    parser.add_argument("--webhook-port", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+    if args.base_url and not (args.mongo_url and args.db_name):
+        parser.error("--base-url requires --mongo-url and --db-name (the server's DB_NAME) to seed its database")
+    if args.db_name and not args.mongo_url:
+        parser.error("--db-name requires --mongo-url")
+
+    results = asyncio.run(run(args))
+    write_report("load", {
+        "mode": "remote" if args.base_url else "in-process",
+        "database": "mongod" if args.mongo_url else "in-memory",
+        "scenarios": results,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
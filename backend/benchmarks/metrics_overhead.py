@@ -0,0 +1,146 @@
+"""Cost of the metrics middleware and Mongo command listener.
+
+Requests are driven straight through the ASGI app (no sockets) so the
+comparison isolates the instrumentation itself:
+
+* ``trivial_route``: a minimal app returning a constant, i.e. the worst case
+* ``events_listing``: the real ``GET /api/events`` over 100 in-memory events
+
+Configurations are interleaved over several rounds and the median is kept.
+The listener is measured per command with synthetic driver events.
+
+    python -m benchmarks.metrics_overhead [--requests 2000] [--output results.json]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from starlette.middleware import Middleware
+
+from benchmarks.common import import_server, time_per_call, use_database, write_report
+
+BUDGET_PERCENT = 2.0
+ROUNDS = 7
+
+
+def make_scope(path: str) -> dict:
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+
+
+async def drive(app, path: str, requests: int) -> float:
+    """Return mean seconds per request"""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(make_scope(path), receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+def set_metrics_middleware(app, enabled: bool, middleware_class):
+    """Add or remove the metrics middleware and force Starlette to rebuild its stack"""
+    app.user_middleware = [m for m in app.user_middleware if m.cls is not middleware_class]
+    if enabled:
+        app.user_middleware.insert(0, Middleware(middleware_class))
+    app.middleware_stack = None
+
+
+async def compare(app, path: str, requests: int, middleware_class) -> dict:
+    timings = {False: [], True: []}
+    for enabled in (False, True):
+        set_metrics_middleware(app, enabled, middleware_class)
+        await drive(app, path, max(requests // 10, 10))
+    for _ in range(ROUNDS):
+        for enabled in (False, True):
+            set_metrics_middleware(app, enabled, middleware_class)
+            timings[enabled].append(await drive(app, path, requests))
+    without = statistics.median(timings[False])
+    with_metrics = statistics.median(timings[True])
+    overhead = (with_metrics - without) / without * 100
+    return {
+        "path": path,
+        "requests_per_round": requests,
+        "without_us": round(without * 1e6, 2),
+        "with_us": round(with_metrics * 1e6, 2),
+        "overhead_us": round((with_metrics - without) * 1e6, 2),
+        "overhead_percent": round(overhead, 2),
+    }
+
+
+def listener_cost(metrics) -> dict:
+    listener = metrics.MongoCommandListener()
+    started = SimpleNamespace(
+        command={"find": "events", "filter": {}}, command_name="find", connection_id=("db", 27017), request_id=1,
+    )
+    finished = SimpleNamespace(
+        command_name="find", connection_id=("db", 27017), request_id=1, duration_micros=350,
+    )
+
+    def one_command():
+        listener.started(started)
+        listener.succeeded(finished)
+
+    return {"per_command_us": round(time_per_call(one_command) * 1e6, 3)}
+
+
+async def run(requests: int) -> list:
+    from mongomock_motor import AsyncMongoMockClient
+
+    server = import_server()
+    import metrics
+
+    trivial = FastAPI()
+
+    @trivial.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    use_database(server, AsyncMongoMockClient()["benchmark"])
+    start = datetime(2026, 1, 1)
+    await server.db.events.insert_many([{
+        "id": str(i), "title": f"Event {i}", "description": "Benchmark event", "location": "Hall",
+        "start_date": start + timedelta(days=i), "end_date": start + timedelta(days=i, hours=2),
+        "price_regular": 10.0, "status": "upcoming", "featured": False,
+    } for i in range(100)])
+
+    results = []
+    for name, app, path, count in [
+        ("trivial_route", trivial, "/ping", requests),
+        ("events_listing", server.app, "/api/events", max(requests // 10, 50)),
+    ]:
+        result = await compare(app, path, count, metrics.MetricsMiddleware)
+        result["scenario"] = name
+        results.append(result)
+    results.append({"scenario": "mongo_command_listener", **listener_cost(metrics)})
+
+    realistic = results[1]
+    realistic["budget_percent"] = BUDGET_PERCENT
+    realistic["within_budget"] = realistic["overhead_percent"] < BUDGET_PERCENT
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests))
+    write_report("metrics_overhead", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Bytes on the wire and serialization CPU per endpoint, before and after.
+
+"before" is FastAPI's default path: response model validation followed by
+``jsonable_encoder`` and ``json.dumps``. "after" renders the projected documents
+with ``ORJSONResponse`` and no re-validation; "after_fields" adds a typical
+``?fields=`` selection on top.
+
+    python -m benchmarks.serialization [--output results.json]
+"""
+import argparse
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_response_field
+
+from benchmarks.common import import_server, time_per_call, write_report
+
+
+def make_events(count: int) -> List[dict]:
+    start = datetime(2026, 1, 1)
+    return [{
+        "id": str(uuid.uuid4()),
+        "title": f"Event {i}",
+        "description": "Lorem ipsum dolor sit amet. " * 20,
+        "location": f"Hall {i % 7}",
+        "start_date": start + timedelta(days=i),
+        "end_date": start + timedelta(days=i, hours=8),
+        "price_regular": 25.0 + i,
+        "price_ieee_member": 15.0 + i,
+        "status": random.choice(["upcoming", "ongoing"]),
+        "image_url": f"https://example.com/images/{i}.jpg",
+        "featured": i % 5 == 0,
+        "created_at": start,
+        "updated_at": start,
+    } for i in range(count)]
+
+
+def make_tickets(server, events: List[dict], count: int) -> List[dict]:
+    qr_code = server.generate_qr_code('{"ticket_id": "%s"}' % uuid.uuid4())
+    now = datetime(2026, 1, 1)
+    return [{
+        "id": str(uuid.uuid4()),
+        "event_id": events[i % len(events)]["id"],
+        "user_id": "user-1",
+        "quantity": 1,
+        "ticket_type": "regular",
+        "status": "active",
+        "payment_method": "card",
+        "payment_id": "PAY-BENCHMARK0001",
+        "total_amount": 25.0,
+        "coupon_code": None,
+        "discount_amount": 0,
+        "qr_code": qr_code,
+        "created_at": now,
+        "updated_at": now,
+        "event": events[i % len(events)],
+    } for i in range(count)]
+
+
+def project(doc: dict, fields: List[str]) -> dict:
+    projected = {}
+    for field in fields:
+        if "." in field:
+            parent, child = field.split(".", 1)
+            projected.setdefault(parent, {})[child] = doc[parent][child]
+        else:
+            projected[field] = doc[field]
+    return projected
+
+
+def before(response_type, content):
+    field = create_response_field(name="benchmark", type_=response_type, mode="serialization")
+
+    # Same steps as fastapi.routing.serialize_response for async endpoints, minus the coroutine
+    def render():
+        value, errors = field.validate(content, {}, loc=("response",))
+        assert not errors, errors
+        return JSONResponse(content=field.serialize(value)).body
+    return render
+
+
+def after(server, content):
+    return lambda: server.lean_response(content).body
+
+
+def measure(name: str, server, response_type, content, fields: List[str]):
+    if isinstance(content, list):
+        narrowed = [project(doc, fields) for doc in content]
+    else:
+        narrowed = project(content, fields)
+
+    variants = {
+        "before": before(response_type, content),
+        "after": after(server, content),
+        "after_fields": after(server, narrowed),
+    }
+    result = {"endpoint": name, "fields": ",".join(fields)}
+    for variant, render in variants.items():
+        result[variant] = {
+            "bytes": len(render()),
+            "cpu_us": round(time_per_call(render) * 1e6, 1),
+        }
+    result["cpu_speedup"] = round(result["before"]["cpu_us"] / result["after"]["cpu_us"], 2)
+    result["bytes_saved_with_fields"] = result["before"]["bytes"] - result["after_fields"]["bytes"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    random.seed(1)
+    server = import_server()
+    events = make_events(100)
+    tickets = make_tickets(server, events, 100)
+    card_fields = ["id", "title", "location", "start_date", "price_regular", "image_url"]
+    ticket_fields = ["id", "status", "quantity", "event.title", "event.start_date"]
+
+    results = [
+        measure("GET /api/events", server, List[server.Event], events, card_fields),
+        measure("GET /api/events/featured", server, List[server.Event], events[:10], card_fields),
+        measure("GET /api/events/{id}", server, server.Event, events[0], card_fields + ["description"]),
+        measure("GET /api/user/tickets", server, List[dict], tickets, ticket_fields),
+        measure("GET /api/ticket/{id}", server, dict, tickets[0], ticket_fields + ["qr_code"]),
+    ]
+    write_report("serialization", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Worker cold start: import time and resident memory per deployment config.
+
+Each configuration imports ``server`` in a fresh interpreter under
+``-X importtime`` and reports the median over several runs:
+
+* ``ticket_only``: ``ENABLE_TRADING=0``
+* ``full``: trading routes mounted, signal stack not yet loaded
+* ``full_after_signals``: ``full`` plus the lazily imported pandas/matplotlib
+  stack, i.e. what every worker paid at startup before the split
+
+    python -m benchmarks.startup [--runs 5] [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import BACKEND_DIR, write_report
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {backend!r})
+started = time.perf_counter()
+import server
+if {load_signals!r}:
+    import trading_signals
+elapsed = time.perf_counter() - started
+rss_kb = None
+with open("/proc/self/status") as status:
+    for line in status:
+        if line.startswith("VmRSS:"):
+            rss_kb = int(line.split()[1])
+if rss_kb is None:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"import_seconds": elapsed, "rss_kb": rss_kb, "modules": len(sys.modules)}}))
+"""
+
+CONFIGS = {
+    "ticket_only": {"env": {"ENABLE_TRADING": "0"}, "load_signals": False},
+    "full": {"env": {"ENABLE_TRADING": "1"}, "load_signals": False},
+    "full_after_signals": {"env": {"ENABLE_TRADING": "1"}, "load_signals": True},
+}
+
+
+def parse_importtime(stderr: str):
+    """Return total self time and the slowest top-level imports from -X importtime output"""
+    total_us = 0
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        if not name.startswith("  "):
+            top_level.append((name.strip(), int(cumulative_us)))
+    top_level.sort(key=lambda item: item[1], reverse=True)
+    return total_us, top_level[:10]
+
+
+def run_once(config: dict) -> dict:
+    env = {**os.environ, **config["env"]}
+    code = CHILD.format(backend=str(BACKEND_DIR), load_signals=config["load_signals"])
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    total_us, slowest = parse_importtime(proc.stderr)
+    result["importtime_total_ms"] = total_us / 1000
+    result["slowest_imports_ms"] = {name: us / 1000 for name, us in slowest}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = []
+    for name, config in CONFIGS.items():
+        runs = [run_once(config) for _ in range(args.runs)]
+        results.append({
+            "config": name,
+            "runs": args.runs,
+            "import_ms_median": round(statistics.median(r["import_seconds"] for r in runs) * 1000, 1),
+            "importtime_total_ms_median": round(statistics.median(r["importtime_total_ms"] for r in runs), 1),
+            "rss_mb_median": round(statistics.median(r["rss_kb"] for r in runs) / 1024, 1),
+            "modules": runs[-1]["modules"],
+            "slowest_imports_ms": runs[-1]["slowest_imports_ms"],
+        })
+    write_report("startup", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
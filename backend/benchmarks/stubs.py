@@ -0,0 +1,181 @@
+"""Local stand-ins for external services used by the benchmarks.
+
+* ``KlineServer`` answers ``GET /api/v3/klines`` like Binance with a seeded
+  random walk, so signal generation never touches the real exchange.
+* ``WebhookSink`` accepts the ticket purchase webhooks and counts them.
+* ``ExchangeStub`` answers signed ``GET /api/v3/account`` requests like
+  Binance, verifying the HMAC signature and that the timestamp falls within
+  ``recvWindow``, and records peak concurrency and the last query.
+
+Each runs ``ThreadingHTTPServer`` on a background thread and binds to
+127.0.0.1 (port 0 picks a free port). The tests use them too.
+"""
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+INTERVAL_MS = {"1m": 60000, "5m": 300000, "15m": 900000, "1h": 3600000, "4h": 14400000, "1d": 86400000}
+
+
+def make_klines(symbol: str, interval: str, limit: int, seed: int = 0) -> list:
+    """Binance-shaped kline rows for a deterministic random walk"""
+    rng = random.Random(f"{symbol}:{interval}:{seed}")
+    step = INTERVAL_MS.get(interval, 3600000)
+    end = int(time.time() * 1000) // step * step
+    price = 100.0
+    rows = []
+    for i in range(limit):
+        open_time = end - (limit - i) * step
+        open_price = price
+        price = max(1.0, price * (1 + rng.gauss(0, 0.01)))
+        high = max(open_price, price) * (1 + abs(rng.gauss(0, 0.003)))
+        low = min(open_price, price) * (1 - abs(rng.gauss(0, 0.003)))
+        volume = rng.uniform(10, 1000)
+        rows.append([
+            open_time, f"{open_price:.4f}", f"{high:.4f}", f"{low:.4f}", f"{price:.4f}", f"{volume:.4f}",
+            open_time + step - 1, f"{volume * price:.4f}", rng.randint(50, 500), "0", "0", "0",
+        ])
+    return rows
+
+
+class _StubServer:
+    handler_class = None
+
+    def __init__(self, port: int = 0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self.handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _KlineHandler(_QuietHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/api/v3/klines":
+            self.send_json(404, {"code": -1, "msg": "Not found"})
+            return
+        query = parse_qs(url.query)
+        symbol = query.get("symbol", ["BTCUSDT"])[0]
+        interval = query.get("interval", ["1h"])[0]
+        limit = min(int(query.get("limit", ["500"])[0]), 1000)
+        self.server.stub.requests += 1
+        self.send_json(200, make_klines(symbol, interval, limit))
+
+
+class KlineServer(_StubServer):
+    handler_class = _KlineHandler
+
+    def __init__(self, port: int = 0):
+        super().__init__(port)
+        self.requests = 0
+
+
+class _WebhookHandler(_QuietHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        with self.server.stub.lock:
+            self.server.stub.received += 1
+        self.send_json(200, {"ok": True})
+
+
+class WebhookSink(_StubServer):
+    handler_class = _WebhookHandler
+
+    def __init__(self, port: int = 0):
+        super().__init__(port)
+        self.received = 0
+        self.lock = threading.Lock()
+
+
+class _ExchangeHandler(_QuietHandler):
+    def do_GET(self):
+        stub = self.server.stub
+        url = urlparse(self.path)
+        if url.path != "/api/v3/account":
+            self.send_json(404, {"code": -1, "msg": "Not found"})
+            return
+        with stub.lock:
+            stub.requests += 1
+            stub.in_flight += 1
+            stub.peak_in_flight = max(stub.peak_in_flight, stub.in_flight)
+        try:
+            if stub.latency:
+                time.sleep(stub.latency)
+            account = stub.accounts.get(self.headers.get("X-MBX-APIKEY"))
+            query, _, signature = url.query.rpartition("&signature=")
+            stub.last_query = parse_qs(url.query)
+            if account is None:
+                self.send_json(401, {"code": -2015, "msg": "Invalid API-key"})
+                return
+            secret, balances = account
+            expected = hmac.new(secret.encode(), query.encode(), hashlib.sha256).hexdigest()
+            if not hmac.compare_digest(expected, signature):
+                self.send_json(400, {"code": -1022, "msg": "Signature for this request is not valid."})
+                return
+            params = parse_qs(query)
+            try:
+                timestamp = int(params["timestamp"][0])
+                recv_window = int(params.get("recvWindow", ["5000"])[0])
+            except (KeyError, ValueError):
+                self.send_json(400, {"code": -1102, "msg": "Mandatory parameter 'timestamp' was not sent."})
+                return
+            now = time.time() * 1000
+            # Binance allows 1s of clock skew into the future
+            if not now - recv_window <= timestamp < now + 1000:
+                self.send_json(400, {"code": -1021, "msg": "Timestamp for this request is outside of the recvWindow."})
+                return
+            self.send_json(200, {"balances": [
+                {"asset": asset, "free": f"{free:.8f}", "locked": f"{locked:.8f}"}
+                for asset, (free, locked) in balances.items()
+            ]})
+        finally:
+            with stub.lock:
+                stub.in_flight -= 1
+
+
+class ExchangeStub(_StubServer):
+    """``accounts`` maps API key -> (secret, {asset: (free, locked)})"""
+
+    handler_class = _ExchangeHandler
+
+    def __init__(self, accounts: dict, port: int = 0, latency: float = 0.0):
+        super().__init__(port)
+        self.accounts = accounts
+        self.latency = latency
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.last_query = None
+        self.lock = threading.Lock()
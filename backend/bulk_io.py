@@ -0,0 +1,303 @@
+"""Streaming bulk import and export for admin data.
+
+Imports parse CSV or NDJSON uploads a chunk at a time in a worker thread,
+validate every row against the collection's pydantic model and write each
+chunk with a single ``insert_many``/``bulk_write`` call. Exports stream Motor
+cursors straight into CSV, NDJSON or Parquet without materialising the whole
+collection, so memory stays bounded by the chunk size either way.
+"""
+import csv
+import io
+import itertools
+import json
+import uuid
+from datetime import datetime
+from typing import Optional, Union, get_args, get_origin
+
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from starlette.concurrency import run_in_threadpool
+
+IMPORT_FORMATS = ("csv", "ndjson")
+EXPORT_FORMATS = ("csv", "ndjson", "parquet")
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+class BulkFormatError(ValueError):
+    """Raised when an upload or export format is not supported"""
+
+
+def detect_format(filename: Optional[str], fmt: Optional[str], allowed=IMPORT_FORMATS) -> str:
+    """Pick the file format from an explicit value or the file extension"""
+    if not fmt and filename:
+        fmt = filename.rsplit(".", 1)[-1].lower() if "." in filename else None
+        if fmt in ("jsonl", "json"):
+            fmt = "ndjson"
+    if fmt not in allowed:
+        raise BulkFormatError(f"Unsupported format: {fmt}. Expected one of {', '.join(allowed)}")
+    return fmt
+
+
+def _iter_raw_rows(binary_file, fmt: str):
+    """Yield (row_number, row dict or parse error) from an uploaded file"""
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row_number, row in enumerate(reader, start=1):
+            # Empty CSV cells mean "not set" so optional fields fall back to their defaults
+            yield row_number, {k: v for k, v in row.items() if k and v not in ("", None)}
+    else:
+        for row_number, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, ValueError(f"Invalid JSON: {e}")
+                continue
+            if not isinstance(row, dict):
+                yield row_number, ValueError("Each line must be a JSON object")
+                continue
+            yield row_number, row
+
+
+async def _iter_chunks(rows, size: int):
+    """Pull rows from a blocking iterator in a worker thread, one chunk at a time"""
+    while True:
+        chunk = await run_in_threadpool(lambda: list(itertools.islice(rows, size)))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _prepare_document(model, row: dict, now: datetime):
+    """Validate a row and fill in the fields the create endpoints would set.
+
+    Returns the document and the set of fields the row explicitly provided.
+    """
+    instance = model(**row)
+    doc = instance.dict()
+    if not doc.get("id"):
+        doc["id"] = str(uuid.uuid4())
+    if not doc.get("created_at"):
+        doc["created_at"] = now
+    doc["updated_at"] = doc.get("updated_at") or now
+    return doc, instance.model_fields_set | {"updated_at"}
+
+
+class ImportReport:
+    """Running totals and a capped list of per-row errors for one import"""
+
+    def __init__(self):
+        self.processed = 0
+        self.inserted = 0
+        self.upserted = 0
+        self.modified = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row_number: int, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "errors": errors})
+
+    def dict(self) -> dict:
+        # Write errors for a chunk are only known after its validation errors
+        self.errors.sort(key=lambda error: error["row"])
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "upserted": self.upserted,
+            "modified": self.modified,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+        }
+
+
+def _upsert_operation(doc: dict, provided: set, key: str) -> UpdateOne:
+    """Update only the provided fields; defaults, id and creation time apply on insert"""
+    updates = {field: value for field, value in doc.items() if field in provided and field not in ("id", "created_at")}
+    updates[key] = doc[key]
+    on_insert = {field: value for field, value in doc.items() if field not in updates}
+    return UpdateOne({key: doc[key]}, {"$set": updates, "$setOnInsert": on_insert}, upsert=True)
+
+
+async def _write_chunk(collection, docs: list, provided: list, row_numbers: list, key: str, mode: str,
+                       report: ImportReport):
+    """Write one validated chunk, mapping write errors back to source rows"""
+    try:
+        if mode == "upsert":
+            result = await collection.bulk_write([_upsert_operation(doc, fields, key) for doc, fields in zip(docs, provided)], ordered=False)
+            report.upserted += result.upserted_count
+            report.modified += result.modified_count
+        else:
+            result = await collection.insert_many(docs, ordered=False)
+            report.inserted += len(result.inserted_ids)
+    except BulkWriteError as e:
+        details = e.details
+        report.inserted += details.get("nInserted", 0)
+        report.upserted += details.get("nUpserted", 0)
+        report.modified += details.get("nModified", 0)
+        for write_error in details.get("writeErrors", []):
+            message = write_error.get("errmsg", "Write failed")
+            if write_error.get("code") == 11000:
+                message = f"Duplicate {key}"
+            report.add_error(row_numbers[write_error["index"]], [{"loc": [key], "msg": message}])
+
+
+async def import_documents(collection, model, binary_file, fmt: str, key: str = "id",
+                           mode: str = "insert", chunk_size: int = CHUNK_SIZE) -> dict:
+    """Stream-validate an upload and write it to ``collection`` in chunks"""
+    report = ImportReport()
+    rows = _iter_raw_rows(binary_file, fmt)
+
+    async for chunk in _iter_chunks(rows, chunk_size):
+        now = datetime.utcnow()
+        docs = []
+        provided = []
+        row_numbers = []
+        for row_number, row in chunk:
+            report.processed += 1
+            if isinstance(row, Exception):
+                report.add_error(row_number, [{"loc": [], "msg": str(row)}])
+                continue
+            try:
+                doc, fields = _prepare_document(model, row, now)
+            except ValidationError as e:
+                report.add_error(row_number, [
+                    {"loc": list(err["loc"]), "msg": err["msg"]} for err in e.errors()
+                ])
+                continue
+            docs.append(doc)
+            provided.append(fields)
+            row_numbers.append(row_number)
+
+        if docs:
+            await _write_chunk(collection, docs, provided, row_numbers, key, mode, report)
+
+    return report.dict()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    return value
+
+
+async def _iter_batches(cursor, size: int):
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def stream_csv(cursor, columns: list, chunk_size: int = CHUNK_SIZE):
+    """Yield CSV bytes for each cursor batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for batch in _iter_batches(cursor, chunk_size):
+        for doc in batch:
+            writer.writerow([_csv_value(doc.get(column)) for column in columns])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def stream_ndjson(cursor, columns: list, chunk_size: int = CHUNK_SIZE):
+    """Yield newline-delimited JSON bytes for each cursor batch"""
+    async for batch in _iter_batches(cursor, chunk_size):
+        lines = [json.dumps({column: doc.get(column) for column in columns}, default=_json_default) for doc in batch]
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def _arrow_type(pa, annotation):
+    """Map a pydantic field annotation to an Arrow type"""
+    if get_origin(annotation) is Union:
+        annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+    if annotation is bool:
+        return pa.bool_()
+    if annotation is int:
+        return pa.int64()
+    if annotation is float:
+        return pa.float64()
+    if annotation is datetime:
+        return pa.timestamp("ms")
+    return pa.string()
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file object whose contents can be drained between row groups"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+async def stream_parquet(cursor, model, chunk_size: int = CHUNK_SIZE * 10):
+    """Yield a Parquet file, one row group per cursor batch"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (name, _arrow_type(pa, field.annotation)) for name, field in model.model_fields.items()
+    ])
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        async for batch in _iter_batches(cursor, chunk_size):
+            columns = {name: [doc.get(name) for doc in batch] for name in schema.names}
+            table = pa.Table.from_pydict(columns, schema=schema)
+            await run_in_threadpool(writer.write_table, table)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_stream(cursor, model, fmt: str):
+    """Return (byte iterator, media type, file extension) for an export"""
+    columns = list(model.model_fields)
+    if fmt == "csv":
+        return stream_csv(cursor, columns), "text/csv", "csv"
+    if fmt == "ndjson":
+        return stream_ndjson(cursor, columns), "application/x-ndjson", "ndjson"
+    return stream_parquet(cursor, model), "application/vnd.apache.parquet", "parquet"
@@ -0,0 +1,124 @@
+"""MongoDB client construction and read/write routing.
+
+Pool size, timeouts and wire compression come from the environment so each
+deployment can size them against its worker count (pools are per process:
+total connections = workers x MONGO_MAX_POOL_SIZE).
+
+Handles returned by ``database_handles``:
+
+* ``db``: primary reads, default write concern
+* ``catalog_db``: event catalog reads, ``MONGO_CATALOG_READ_PREFERENCE``
+* ``analytics_db``: dashboard and export reads, ``MONGO_ANALYTICS_READ_PREFERENCE``
+* ``purchase_db``: primary reads and majority writes for the purchase path
+
+``ensure_unique_index`` adds a unique key to a collection that may already
+hold duplicates, and reports them instead of failing with a bare
+``E11000`` at startup. ``ensure_ttl_indexes`` lets MongoDB expire every
+collection in ``TRANSIENT_COLLECTIONS``; register new short-lived records
+there.
+"""
+import os
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference, WriteConcern
+from pymongo.errors import OperationFailure
+
+DUPLICATE_KEY = 11000
+MAX_REPORTED_DUPLICATES = 5
+# Collections of short-lived records -> the date field MongoDB expires them at
+TRANSIENT_COLLECTIONS = {
+    "archive_leases": "expire_at",  # archival.Archiver
+    "change_stream_checkpoints": "expire_at",  # live_feed.EventFeed
+    "rate_limits": "expire_at",  # rate_limiting.MongoStore
+}
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+# Environment variable -> (MongoClient option, parser)
+CLIENT_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", int),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", int),
+    "MONGO_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", int),
+    "MONGO_MAX_CONNECTING": ("maxConnecting", int),
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": ("waitQueueTimeoutMS", int),
+    "MONGO_CONNECT_TIMEOUT_MS": ("connectTimeoutMS", int),
+    "MONGO_SOCKET_TIMEOUT_MS": ("socketTimeoutMS", int),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", int),
+    "MONGO_COMPRESSORS": ("compressors", str),  # e.g. "zstd,snappy,zlib"
+    "MONGO_ZLIB_COMPRESSION_LEVEL": ("zlibCompressionLevel", int),
+}
+
+
+class IndexMigrationError(Exception):
+    """Raised when existing data has to be cleaned up before an index can be built"""
+
+
+def client_options_from_env(environ=os.environ) -> dict:
+    """Collect the MongoClient options set in the environment"""
+    options = {}
+    for variable, (option, parse) in CLIENT_OPTIONS.items():
+        value = environ.get(variable)
+        if value not in (None, ""):
+            options[option] = parse(value)
+    return options
+
+
+def read_preference_from_env(variable: str, default: str = "secondaryPreferred"):
+    name = os.environ.get(variable, default)
+    if name not in READ_PREFERENCES:
+        raise ValueError(f"{variable} must be one of {', '.join(READ_PREFERENCES)}")
+    return READ_PREFERENCES[name]
+
+
+def create_mongo_client(mongo_url: str, event_listeners=()) -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(mongo_url, event_listeners=list(event_listeners), **client_options_from_env())
+
+
+def database_handles(client, db_name: str) -> dict:
+    """Build the routed database handles for one client"""
+    db = client[db_name]
+    write_timeout_ms = int(os.environ.get("MONGO_MAJORITY_WTIMEOUT_MS", "5000"))
+    return {
+        "db": db,
+        "catalog_db": db.with_options(
+            read_preference=read_preference_from_env("MONGO_CATALOG_READ_PREFERENCE"),
+        ),
+        "analytics_db": db.with_options(
+            read_preference=read_preference_from_env("MONGO_ANALYTICS_READ_PREFERENCE"),
+        ),
+        "purchase_db": db.with_options(
+            read_preference=ReadPreference.PRIMARY,
+            write_concern=WriteConcern(w="majority", wtimeout=write_timeout_ms),
+        ),
+    }
+
+
+async def ensure_unique_index(collection, field: str):
+    """Create a unique index on ``field``, explaining any existing duplicates"""
+    try:
+        await collection.create_index(field, unique=True)
+    except OperationFailure as e:
+        if e.code != DUPLICATE_KEY:
+            raise
+        duplicates = await collection.aggregate([
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+            {"$limit": MAX_REPORTED_DUPLICATES},
+        ], allowDiskUse=True).to_list(length=None)
+        examples = ", ".join(f"{d['_id']!r} x{d['count']}" for d in duplicates)
+        raise IndexMigrationError(
+            f"Cannot create the unique {collection.name}.{field} index: the collection already holds "
+            f"duplicate values (e.g. {examples}). Merge or rename them, then restart."
+        ) from e
+
+
+async def ensure_ttl_indexes(db):
+    """Let MongoDB expire transient records instead of keeping them forever"""
+    for collection, field in TRANSIENT_COLLECTIONS.items():
+        await db[collection].create_index(field, expireAfterSeconds=0)
@@ -0,0 +1,187 @@
+"""Event search: full-text query, filters, sorting, facets and keyset pagination.
+
+Every sort ends with ``id`` as a tiebreaker, and the cursor returned with a
+page holds the last row's sort value and id. The next page resumes with a
+range predicate on the same compound index instead of ``skip``, so deep pages
+cost the same as the first one. Relevance sorting has no stable key that can
+be queried, so it pages by offset.
+
+Facet counts are disjunctive: each facet is counted with every filter except
+its own, so the UI can show how many results another choice would give.
+"""
+import asyncio
+import base64
+import json
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, TEXT
+
+# Statuses returned when no status filter is given (everything but canceled);
+# an $in keeps the status prefix of the compound indexes usable, $ne would not
+DEFAULT_STATUSES = ["upcoming", "ongoing", "completed"]
+
+# Sort option -> (field, direction)
+SORTS = {
+    "start_date": ("start_date", ASCENDING),
+    "-start_date": ("start_date", DESCENDING),
+    "price": ("price_regular", ASCENDING),
+    "-price": ("price_regular", DESCENDING),
+    "relevance": None,
+}
+PRICE_BUCKETS = [0, 25, 50, 100, 250, 500]
+MAX_LIMIT = 100
+
+
+class SearchError(Exception):
+    """Raised for search parameters that cannot be served"""
+
+
+async def ensure_search_indexes(db):
+    """Create the text and compound indexes the search queries rely on"""
+    await db.events.create_index("id", unique=True)
+    await db.events.create_index(
+        [("title", TEXT), ("location", TEXT), ("description", TEXT)],
+        weights={"title": 10, "location": 5, "description": 1},
+        name="event_search_text",
+    )
+    # Equality, then sort, then range: status/featured are matched exactly,
+    # start_date or price_regular provide the order and id breaks ties
+    await db.events.create_index([("status", ASCENDING), ("start_date", ASCENDING), ("id", ASCENDING)])
+    await db.events.create_index([("status", ASCENDING), ("price_regular", ASCENDING), ("id", ASCENDING)])
+    await db.events.create_index(
+        [("featured", ASCENDING), ("status", ASCENDING), ("start_date", ASCENDING), ("id", ASCENDING)]
+    )
+
+
+def encode_cursor(sort: str, value, last_id: str = None) -> str:
+    payload = {"sort": sort, "value": value.isoformat() if isinstance(value, datetime) else value, "id": last_id}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if payload["sort"] != sort:
+            raise SearchError("Cursor belongs to a different sort order")
+        value = payload["value"]
+        if sort == "relevance":
+            return int(value)
+        field, _ = SORTS[sort]
+        last_value, last_id = value, str(payload["id"])
+        if field == "start_date":
+            last_value = datetime.fromisoformat(last_value)
+        return last_value, last_id
+    except SearchError:
+        raise
+    except (ValueError, TypeError, KeyError):
+        raise SearchError("Invalid cursor")
+
+
+def build_filters(q=None, statuses=None, featured=None, start_from=None, start_to=None,
+                  min_price=None, max_price=None) -> dict:
+    """Return the filter for each facet dimension so facets can leave their own out"""
+    filters = {"status": {"status": {"$in": statuses or DEFAULT_STATUSES}}}
+    if q:
+        filters["text"] = {"$text": {"$search": q}}
+    if featured is not None:
+        filters["featured"] = {"featured": featured}
+    if start_from or start_to:
+        date_range = {}
+        if start_from:
+            date_range["$gte"] = start_from
+        if start_to:
+            date_range["$lt"] = start_to
+        filters["start_date"] = {"start_date": date_range}
+    if min_price is not None or max_price is not None:
+        price_range = {}
+        if min_price is not None:
+            price_range["$gte"] = min_price
+        if max_price is not None:
+            price_range["$lte"] = max_price
+        filters["price"] = {"price_regular": price_range}
+    return filters
+
+
+def combine(filters: dict, exclude: str = None) -> dict:
+    clauses = [clause for name, clause in filters.items() if name != exclude]
+    merged = {}
+    for clause in clauses:
+        merged.update(clause)
+    return merged
+
+
+def keyset_predicate(field: str, direction: int, last_value, last_id) -> dict:
+    op = "$gt" if direction == ASCENDING else "$lt"
+    return {"$or": [
+        {field: {op: last_value}},
+        {field: last_value, "id": {op: last_id}},
+    ]}
+
+
+async def search_events(db, projection: dict, filters: dict, sort: str = "start_date",
+                        limit: int = 20, cursor: str = None) -> dict:
+    """Return one page of events and the cursor for the next page"""
+    if sort not in SORTS:
+        raise SearchError(f"Sort must be one of {', '.join(SORTS)}")
+    if sort == "relevance" and "text" not in filters:
+        raise SearchError("Relevance sort requires a search query")
+    limit = max(1, min(limit, MAX_LIMIT))
+    query = combine(filters)
+
+    if sort == "relevance":
+        offset = decode_cursor(cursor, sort) if cursor else 0
+        score = {"score": {"$meta": "textScore"}}
+        find = db.events.find(query, {**projection, **score}).sort([("score", {"$meta": "textScore"}), ("id", ASCENDING)])
+        events = await find.skip(offset).limit(limit + 1).to_list(length=limit + 1)
+        for event in events:
+            event.pop("score", None)
+        next_cursor = encode_cursor(sort, offset + limit) if len(events) > limit else None
+        return {"events": events[:limit], "next_cursor": next_cursor}
+
+    field, direction = SORTS[sort]
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort)
+        query = {"$and": [query, keyset_predicate(field, direction, last_value, last_id)]}
+    find = db.events.find(query, {**projection, field: 1, "id": 1}).sort([(field, direction), ("id", direction)])
+    events = await find.limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        last = events[-1]
+        next_cursor = encode_cursor(sort, last[field], last["id"])
+    return {"events": events, "next_cursor": next_cursor}
+
+
+async def _count_by(db, match: dict, key) -> list:
+    cursor = db.events.aggregate([{"$match": match}, {"$group": {"_id": key, "count": {"$sum": 1}}}])
+    return await cursor.to_list(length=None)
+
+
+async def search_facets(db, filters: dict) -> dict:
+    """Count matches per status, featured flag and price bucket"""
+    price_key = {"$switch": {
+        "branches": [
+            {"case": {"$lt": ["$price_regular", upper]}, "then": lower}
+            for lower, upper in zip(PRICE_BUCKETS, PRICE_BUCKETS[1:])
+        ],
+        "default": PRICE_BUCKETS[-1],
+    }}
+    status_rows, featured_rows, price_rows = await asyncio.gather(
+        _count_by(db, combine(filters, exclude="status"), "$status"),
+        _count_by(db, combine(filters, exclude="featured"), "$featured"),
+        _count_by(db, combine(filters, exclude="price"), price_key),
+    )
+
+    featured = {"true": 0, "false": 0}
+    for row in featured_rows:
+        featured["true" if row["_id"] else "false"] += row["count"]
+    price_counts = {row["_id"]: row["count"] for row in price_rows}
+    price = []
+    for lower, upper in zip(PRICE_BUCKETS, PRICE_BUCKETS[1:] + [None]):
+        price.append({"min": lower, "max": upper, "count": price_counts.get(lower, 0)})
+    return {
+        "status": {row["_id"]: row["count"] for row in status_rows if row["_id"] is not None},
+        "featured": featured,
+        "price": price,
+    }
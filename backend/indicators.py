@@ -0,0 +1,232 @@
+"""Technical indicator kernels behind one interface, with interchangeable backends.
+
+Every backend takes a 1-D series of closes and returns float64 arrays of the
+same length, ``NaN`` during the warm-up period, following TA-Lib's definitions
+so the backends agree with each other:
+
+* RSI uses Wilder smoothing: the first average gain/loss is the mean of the
+  first ``period`` changes, then ``avg = (avg * (period - 1) + value) / period``.
+* EMAs are seeded with the simple mean of their first ``period`` inputs. In
+  MACD the fast EMA is seeded over the window ending where the slow EMA
+  starts, and all three lines start once the signal line is defined.
+* Bollinger Bands use the population standard deviation.
+
+Backends:
+
+* ``numpy`` vectorizes the exponential recurrences block by block, so the
+  Python-level work is one small step per block rather than per candle, and
+  takes rolling statistics from running sums.
+* ``pandas`` uses ``ewm``/``rolling``.
+* ``talib`` calls the TA-Lib C library (``pip install TA-Lib``, optional).
+
+Pick one per deployment with ``INDICATOR_BACKEND``. ``tests/test_indicators.py``
+checks the backends against a reference implementation and against each
+other; ``python -m benchmarks.indicators`` times them.
+"""
+import math
+
+import numpy as np
+
+# Exponential recurrences are evaluated in blocks of at most this many values.
+# The block length is also capped so decay ** -length stays well inside float64.
+EMA_BLOCK = 1024
+EMA_MAX_EXPONENT = 230.0
+# Rolling sums restart every this many values to bound rounding error
+ROLLING_CHUNK = 16384
+
+
+class IndicatorError(Exception):
+    """Raised for an unknown or unavailable indicator backend"""
+
+
+def _as_series(values) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def _nan(n: int) -> np.ndarray:
+    return np.full(n, np.nan)
+
+
+def _recurrence(values: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """Evaluate ``y[i] = (1 - alpha) * y[i - 1] + alpha * values[i]`` with ``y[-1] = initial``"""
+    n = len(values)
+    decay = 1.0 - alpha
+    if n == 0 or decay <= 0.0:
+        return values.copy()
+    block = max(1, min(EMA_BLOCK, int(EMA_MAX_EXPONENT / -math.log(decay)), n))
+    blocks = -(-n // block)
+    rows = np.zeros(blocks * block)
+    rows[:n] = values
+    rows = rows.reshape(blocks, block)
+
+    steps = np.arange(block)
+    # Response to each block's own inputs, as if it started from zero:
+    # z[i] = alpha * sum(decay ** (i - k) * x[k] for k <= i)
+    response = np.cumsum(rows * (alpha * decay ** -steps), axis=1)
+    response *= decay ** steps
+    # Plus the previous block's last value, decayed into this block
+    carry = decay ** (steps + 1)
+    last = initial
+    for row in response:
+        row += carry * last
+        last = row[-1]
+    return response.reshape(-1)[:n]
+
+
+def _seeded_ema(values: np.ndarray, period: int, alpha: float, start: int = 0) -> np.ndarray:
+    """EMA seeded with the mean of ``values[start:start + period]``, defined from ``start + period - 1``"""
+    out = _nan(len(values))
+    first = start + period - 1
+    if first >= len(values):
+        return out
+    seed = values[start:first + 1].mean()
+    out[first] = seed
+    out[first + 1:] = _recurrence(values[first + 1:], alpha, seed)
+    return out
+
+
+def _rsi_from_averages(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    total = avg_gain + avg_loss
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total != 0, 100 * avg_gain / total, 0.0)
+
+
+class IndicatorBackend:
+    name = None
+
+    def rsi(self, close, period: int = 14) -> np.ndarray:
+        raise NotImplementedError
+
+    def macd(self, close, fast: int = 12, slow: int = 26, signal: int = 9):
+        """Return (macd line, signal line, histogram)"""
+        raise NotImplementedError
+
+    def bollinger_bands(self, close, period: int = 20, std_dev: float = 2):
+        """Return (upper band, middle band, lower band)"""
+        raise NotImplementedError
+
+
+class NumpyBackend(IndicatorBackend):
+    name = "numpy"
+
+    def rsi(self, close, period: int = 14) -> np.ndarray:
+        close = _as_series(close)
+        out = _nan(len(close))
+        if len(close) <= period:
+            return out
+        change = np.diff(close)
+        alpha = 1.0 / period
+        avg_gain = _seeded_ema(np.maximum(change, 0.0), period, alpha)[period - 1:]
+        avg_loss = _seeded_ema(np.maximum(-change, 0.0), period, alpha)[period - 1:]
+        out[period:] = _rsi_from_averages(avg_gain, avg_loss)
+        return out
+
+    def macd(self, close, fast: int = 12, slow: int = 26, signal: int = 9):
+        close = _as_series(close)
+        # Like TA-Lib, the longer period is always the slow one
+        fast, slow = min(fast, slow), max(fast, slow)
+        slow_ema = _seeded_ema(close, slow, 2.0 / (slow + 1))
+        fast_ema = _seeded_ema(close, fast, 2.0 / (fast + 1), start=slow - fast)
+        macd_line = fast_ema - slow_ema
+        signal_line = _seeded_ema(macd_line, signal, 2.0 / (signal + 1), start=slow - 1)
+        macd_line[:slow + signal - 2] = np.nan
+        return macd_line, signal_line, macd_line - signal_line
+
+    def bollinger_bands(self, close, period: int = 20, std_dev: float = 2):
+        close = _as_series(close)
+        middle = _nan(len(close))
+        variance = _nan(len(close))
+        for start in range(0, len(close) - period + 1, ROLLING_CHUNK):
+            segment = close[start:start + ROLLING_CHUNK + period - 1]
+            # Running sums over a short, re-centred segment keep the
+            # sum-of-squares cancellation small
+            offset = segment.mean()
+            centred = segment - offset
+            sums = np.concatenate(([0.0], np.cumsum(centred)))
+            squares = np.concatenate(([0.0], np.cumsum(centred * centred)))
+            mean = (sums[period:] - sums[:-period]) / period
+            rows = slice(start + period - 1, start + len(segment))
+            middle[rows] = mean + offset
+            variance[rows] = np.maximum((squares[period:] - squares[:-period]) / period - mean * mean, 0.0)
+        deviation = np.sqrt(variance)
+        return middle + std_dev * deviation, middle, middle - std_dev * deviation
+
+
+class PandasBackend(IndicatorBackend):
+    name = "pandas"
+
+    def __init__(self):
+        import pandas as pd
+        self.pd = pd
+
+    def _seeded_ema(self, series, period: int, alpha: float, start: int = 0):
+        # ewm(adjust=False) starts from the first non-NaN value, so put the seed there
+        first = start + period - 1
+        seeded = series.copy()
+        seeded.iloc[:first] = np.nan
+        if first < len(series):
+            seeded.iloc[first] = series.iloc[start:first + 1].mean()
+        return seeded.ewm(alpha=alpha, adjust=False).mean()
+
+    def rsi(self, close, period: int = 14) -> np.ndarray:
+        close = self.pd.Series(_as_series(close))
+        out = _nan(len(close))
+        if len(close) <= period:
+            return out
+        change = close.diff().iloc[1:].reset_index(drop=True)
+        alpha = 1.0 / period
+        avg_gain = self._seeded_ema(change.clip(lower=0), period, alpha).to_numpy()[period - 1:]
+        avg_loss = self._seeded_ema(-change.clip(upper=0), period, alpha).to_numpy()[period - 1:]
+        out[period:] = _rsi_from_averages(avg_gain, avg_loss)
+        return out
+
+    def macd(self, close, fast: int = 12, slow: int = 26, signal: int = 9):
+        close = self.pd.Series(_as_series(close))
+        fast, slow = min(fast, slow), max(fast, slow)
+        slow_ema = self._seeded_ema(close, slow, 2.0 / (slow + 1))
+        fast_ema = self._seeded_ema(close, fast, 2.0 / (fast + 1), start=slow - fast)
+        macd_line = fast_ema - slow_ema
+        signal_line = self._seeded_ema(macd_line, signal, 2.0 / (signal + 1), start=slow - 1)
+        macd_line.iloc[:slow + signal - 2] = np.nan
+        return macd_line.to_numpy(), signal_line.to_numpy(), (macd_line - signal_line).to_numpy()
+
+    def bollinger_bands(self, close, period: int = 20, std_dev: float = 2):
+        rolling = self.pd.Series(_as_series(close)).rolling(period)
+        middle = rolling.mean().to_numpy()
+        deviation = rolling.std(ddof=0).to_numpy()
+        return middle + std_dev * deviation, middle, middle - std_dev * deviation
+
+
+class TalibBackend(IndicatorBackend):
+    name = "talib"
+
+    def __init__(self):
+        try:
+            import talib
+        except ImportError:
+            raise IndicatorError("The talib backend needs TA-Lib (pip install TA-Lib)")
+        self.talib = talib
+
+    def rsi(self, close, period: int = 14) -> np.ndarray:
+        return self.talib.RSI(_as_series(close), timeperiod=period)
+
+    def macd(self, close, fast: int = 12, slow: int = 26, signal: int = 9):
+        return self.talib.MACD(_as_series(close), fastperiod=fast, slowperiod=slow, signalperiod=signal)
+
+    def bollinger_bands(self, close, period: int = 20, std_dev: float = 2):
+        return self.talib.BBANDS(
+            _as_series(close), timeperiod=period, nbdevup=std_dev, nbdevdn=std_dev, matype=0
+        )
+
+
+BACKENDS = {
+    "numpy": NumpyBackend,
+    "pandas": PandasBackend,
+    "talib": TalibBackend,
+}
+
+
+def get_backend(name: str) -> IndicatorBackend:
+    if name not in BACKENDS:
+        raise IndicatorError(f"Unknown indicator backend: {name}. Expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,289 @@
+"""Live event availability feed pushed to browsers over Server-Sent Events.
+
+Each worker tails one change stream covering ``events`` changes and
+``tickets`` inserts, and fans compact deltas out to its connected clients.
+Clients never poll ``get_event``.
+
+* Changes are merged per event and flushed at most once per ``debounce``
+  seconds, so a burst of purchases becomes one message with the summed
+  ``tickets_sold``.
+* Each message is serialized once and the same bytes are queued for every
+  subscriber. A subscriber whose queue fills up is disconnected; the browser's
+  EventSource reconnects and the page refetches the event.
+* The server trims each change to the event id, ticket quantity and public
+  event fields before sending it, so ticket payment details and QR codes
+  never leave the database.
+* Each worker checkpoints its own resume token to
+  ``change_stream_checkpoints`` under ``event_feed:<worker_id>``, so a
+  restarted worker with the same id continues where its stream left off
+  instead of jumping to wherever another worker had got to. If the token has
+  aged out of the oplog, the stream restarts from the present.
+
+Deletes are only reported when ``events`` records change stream pre-images.
+That is a collection option, changed once per deployment with ``python
+live_feed.py setup`` rather than by every worker at startup.
+
+Change streams need a replica set or sharded cluster. On a standalone server
+the watcher logs the error and retries, and clients only receive keep-alives.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from metrics import Gauge, registry
+
+# Event fields pushed to clients when they change
+PUBLIC_EVENT_FIELDS = {
+    "title", "description", "location", "start_date", "end_date", "price_regular",
+    "price_ieee_member", "status", "image_url", "featured",
+}
+# Everything a worker needs from a change; ticket documents carry payment
+# details and QR codes that must not be shipped to every worker
+CHANGE_PROJECTION = {
+    "operationType": 1,
+    "ns.coll": 1,
+    "fullDocument.id": 1,
+    "fullDocument.event_id": 1,
+    "fullDocument.quantity": 1,
+    "fullDocumentBeforeChange.id": 1,
+    **{f"fullDocument.{field}": 1 for field in PUBLIC_EVENT_FIELDS},
+    **{f"updateDescription.updatedFields.{field}": 1 for field in PUBLIC_EVENT_FIELDS},
+}
+CHECKPOINT_INTERVAL = 5.0
+# Checkpoints of workers that stop saving (e.g. replaced by a new pid) expire
+CHECKPOINT_TTL = timedelta(days=1)
+RETRY_DELAY = 5.0
+QUEUE_SIZE = 256
+# Server errors meaning the resume token can no longer be used
+RESUME_TOKEN_LOST = {136, 280, 286}
+
+live_feed_subscribers = registry.register(Gauge(
+    "live_feed_subscribers", "Clients connected to the live event feed",
+))
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def enable_pre_images(db):
+    """Record pre-images of events so deletes can be reported (MongoDB 6+, run once per deployment)"""
+    await db.command("collMod", "events", changeStreamPreAndPostImages={"enabled": True})
+
+
+async def pre_images_enabled(db) -> bool:
+    result = await db.command("listCollections", filter={"name": "events"})
+    for collection in result["cursor"]["firstBatch"]:
+        return collection.get("options", {}).get("changeStreamPreAndPostImages", {}).get("enabled", False)
+    return False
+
+
+class EventFeed:
+    def __init__(self, get_db, debounce: float = 0.5, checkpoint: bool = True, worker_id: str = "default"):
+        self.get_db = get_db
+        self.debounce = debounce
+        self.checkpoint = checkpoint
+        self.checkpoint_id = f"event_feed:{worker_id}"
+        self.subscribers = set()
+        self._pending = {}
+        self._flush_handle = None
+        self._resume_token = None
+        self._saved_token = None
+        self._last_checkpoint = 0.0
+        self._pre_images = False
+
+    # Subscribers
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue of (event id, JSON payload) pairs; None means the feed dropped this client"""
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.subscribers.add(queue)
+        live_feed_subscribers.set(len(self.subscribers))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+        live_feed_subscribers.set(len(self.subscribers))
+
+    def broadcast(self, event_id: str, message: dict):
+        item = (event_id, json.dumps(message, default=_json_default, separators=(",", ":")))
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # Too slow to keep up; closing makes the client reconnect and refetch
+                self.unsubscribe(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    # Change stream
+
+    async def run(self):
+        """Tail the change stream until cancelled, reconnecting on errors"""
+        try:
+            self._pre_images = await pre_images_enabled(self.get_db())
+        except PyMongoError as e:
+            logging.error(f"Event feed could not check for change stream pre-images: {e}")
+        if not self._pre_images:
+            logging.info("Event feed cannot report deletes; enable pre-images with `python live_feed.py setup`")
+        if self.checkpoint:
+            saved = await self.get_db().change_stream_checkpoints.find_one({"_id": self.checkpoint_id})
+            self._resume_token = self._saved_token = (saved or {}).get("resume_token")
+        while True:
+            try:
+                await self._tail()
+            except asyncio.CancelledError:
+                await self._save_checkpoint(force=True)
+                raise
+            except OperationFailure as e:
+                if e.code in RESUME_TOKEN_LOST and self._resume_token is not None:
+                    logging.warning(f"Event feed resume token is no longer valid, restarting from now: {e}")
+                    self._resume_token = None
+                    continue
+                logging.error(f"Event feed change stream failed: {e}")
+            except Exception as e:
+                logging.error(f"Event feed change stream failed: {e}")
+            await asyncio.sleep(RETRY_DELAY)
+
+    async def _tail(self):
+        pipeline = [
+            {"$match": {"$or": [
+                {"ns.coll": "events", "operationType": {"$in": ["insert", "update", "replace", "delete"]}},
+                {"ns.coll": "tickets", "operationType": "insert"},
+            ]}},
+            # Trimmed on the server; _id stays, it is the resume token
+            {"$project": CHANGE_PROJECTION},
+        ]
+        options = {"full_document": "updateLookup", "start_after": self._resume_token}
+        if self._pre_images:
+            # Deletes only carry _id; the pre-image (MongoDB 6+) gives the event id
+            options["full_document_before_change"] = "whenAvailable"
+        async with self.get_db().watch(pipeline, **options) as stream:
+            while stream.alive:
+                change = await stream.try_next()
+                if change is not None:
+                    self.apply(change)
+                self._resume_token = stream.resume_token
+                await self._save_checkpoint()
+
+    def apply(self, change: dict):
+        """Merge one change stream document into the pending delta for its event"""
+        collection = change["ns"]["coll"]
+        operation = change["operationType"]
+        document = change.get("fullDocument") or {}
+        if collection == "tickets":
+            event_id = document.get("event_id")
+            if event_id is None:
+                return
+            delta = self._pending_delta(event_id)
+            delta["tickets_sold"] = delta.get("tickets_sold", 0) + document.get("quantity", 1)
+        elif operation == "delete":
+            event_id = (change.get("fullDocumentBeforeChange") or {}).get("id")
+            if event_id is None:
+                return
+            delta = self._pending_delta(event_id)
+            delta["deleted"] = True
+        else:
+            event_id = document.get("id")
+            if event_id is None:
+                return
+            if operation == "update":
+                fields = (change.get("updateDescription") or {}).get("updatedFields", {})
+            else:
+                fields = document
+            changes = {field: fields[field] for field in PUBLIC_EVENT_FIELDS if field in fields}
+            if operation == "update" and not changes:
+                return
+            delta = self._pending_delta(event_id)
+            delta.setdefault("changes", {}).update(changes)
+            if operation == "insert":
+                delta["created"] = True
+        self._schedule_flush()
+
+    def _pending_delta(self, event_id: str) -> dict:
+        if event_id not in self._pending:
+            self._pending[event_id] = {"event_id": event_id}
+        return self._pending[event_id]
+
+    def _schedule_flush(self):
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.debounce, self.flush)
+
+    def flush(self):
+        self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        for event_id, delta in pending.items():
+            self.broadcast(event_id, delta)
+
+    async def _save_checkpoint(self, force: bool = False):
+        if not self.checkpoint or self._resume_token is None or self._resume_token == self._saved_token:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_checkpoint < CHECKPOINT_INTERVAL:
+            return
+        self._last_checkpoint = now
+        now_utc = datetime.utcnow()
+        try:
+            await self.get_db().change_stream_checkpoints.update_one(
+                {"_id": self.checkpoint_id},
+                {"$set": {
+                    "resume_token": self._resume_token,
+                    "updated_at": now_utc,
+                    "expire_at": now_utc + CHECKPOINT_TTL,
+                }},
+                upsert=True,
+            )
+            self._saved_token = self._resume_token
+        except PyMongoError as e:
+            logging.error(f"Event feed checkpoint failed: {e}")
+
+
+async def sse_stream(feed: EventFeed, event_ids=None, heartbeat: float = 15.0):
+    """Yield Server-Sent Events for one client until it disconnects"""
+    queue = feed.subscribe()
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                return
+            event_id, payload = item
+            if event_ids and event_id not in event_ids:
+                continue
+            yield f"event: event_update\ndata: {payload}\n\n"
+    finally:
+        feed.unsubscribe(queue)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    if sys.argv[1:] != ["setup"]:
+        sys.exit("usage: python live_feed.py setup")
+
+    load_dotenv(Path(__file__).parent / '.env')
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        await enable_pre_images(client[os.environ['DB_NAME']])
+        logging.info("Change stream pre-images enabled on events")
+
+    asyncio.run(main())
@@ -0,0 +1,279 @@
+"""In-process metrics exposed in Prometheus text format.
+
+Collects per-route request latency and status counts (ASGI middleware), Motor
+command timings (pymongo command listener), event-loop lag (a sampling task)
+and thread-pool gauges read at scrape time. Metrics are per worker process;
+scrape each worker or aggregate in Prometheus.
+"""
+import asyncio
+import bisect
+import logging
+import threading
+import time
+
+from pymongo import monitoring
+
+# Seconds; tuned for API calls that usually finish in a few ms to a few seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds a streaming response (server-sent events) stayed open
+STREAM_BUCKETS = (1.0, 10.0, 60.0, 300.0, 900.0, 1800.0, 3600.0, 14400.0)
+LAG_SAMPLE_INTERVAL = 0.5
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge:
+    """A gauge set directly or computed by a callback at scrape time"""
+
+    def __init__(self, name: str, documentation: str, callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def render(self):
+        value = self.value
+        if self.callback is not None:
+            try:
+                value = self.callback()
+            except Exception as e:
+                logging.debug(f"Gauge {self.name} callback failed: {e}")
+                return
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {_format_value(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts plus the +Inf bucket, then sum
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames + ("le",), labels + (_format_value(bound),))
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            series_labels = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{series_labels} {_format_value(total)}"
+            yield f"{self.name}_count{series_labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route"),
+))
+http_stream_duration = registry.register(Histogram(
+    "http_stream_duration_seconds", "How long streaming responses stayed open, by route", ("method", "route"),
+    buckets=STREAM_BUCKETS,
+))
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status"),
+))
+http_requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled",
+))
+mongo_command_duration = registry.register(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by collection and operation",
+    ("collection", "command"),
+))
+mongo_command_failures = registry.register(Counter(
+    "mongo_command_failures_total", "Failed MongoDB commands by collection and operation",
+    ("collection", "command"),
+))
+requests_rejected_total = registry.register(Counter(
+    "http_requests_rejected_total", "Requests rejected before reaching a handler, by reason and rate-limit rule",
+    ("reason", "rule"),
+))
+event_loop_lag = registry.register(Histogram(
+    "event_loop_lag_seconds", "Delay between when the lag sampler should have woken and when it did",
+))
+event_loop_lag_last = registry.register(Gauge(
+    "event_loop_lag_last_seconds", "Most recent event-loop lag sample",
+))
+
+
+def route_label(scope) -> str:
+    """Use the route template, not the raw path, so labels stay low-cardinality"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return "other"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency and status per route
+
+    Requests to ``stream_paths`` stay open for as long as the client listens,
+    so they are timed in their own histogram and left out of the latency
+    histogram and the in-progress gauge.
+    """
+
+    def __init__(self, app, stream_paths=()):
+        self.app = app
+        self.stream_paths = set(stream_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stream = scope["path"] in self.stream_paths
+        if not stream:
+            http_requests_in_progress.value += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            method = scope["method"]
+            route = route_label(scope)
+            if stream:
+                http_stream_duration.observe(elapsed, method, route)
+            else:
+                http_requests_in_progress.value -= 1
+                http_request_duration.observe(elapsed, method, route)
+            http_requests_total.inc(method, route, str(status_code))
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every command the driver sends, labelled by collection and operation"""
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = ""
+        self._collections[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event):
+        return self._collections.pop((event.connection_id, event.request_id), "")
+
+    def succeeded(self, event):
+        collection = self._finish(event)
+        mongo_command_duration.observe(event.duration_micros / 1e6, collection, event.command_name)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        mongo_command_duration.observe(event.duration_micros / 1e6, collection, event.command_name)
+        mongo_command_failures.inc(collection, event.command_name)
+
+
+async def sample_event_loop_lag(interval: float = LAG_SAMPLE_INTERVAL):
+    """Record how late the loop wakes a task that asked to sleep for ``interval``"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - expected)
+        event_loop_lag.observe(lag)
+        event_loop_lag_last.set(lag)
+
+
+def _anyio_thread_stats():
+    from anyio import to_thread
+    return to_thread.current_default_thread_limiter().statistics()
+
+
+def _default_executor_queue_depth():
+    executor = getattr(asyncio.get_running_loop(), "_default_executor", None)
+    return executor._work_queue.qsize() if executor is not None else 0
+
+
+# Read at scrape time, which happens on the event loop
+threadpool_busy_threads = registry.register(Gauge(
+    "threadpool_busy_threads", "Worker threads in use by run_in_threadpool",
+    callback=lambda: _anyio_thread_stats().borrowed_tokens,
+))
+threadpool_queue_depth = registry.register(Gauge(
+    "threadpool_queue_depth", "Calls waiting for a run_in_threadpool worker thread",
+    callback=lambda: _anyio_thread_stats().tasks_waiting,
+))
+default_executor_queue_depth = registry.register(Gauge(
+    "default_executor_queue_depth", "Calls queued on the event loop's default executor (used by Motor)",
+    callback=_default_executor_queue_depth,
+))
@@ -0,0 +1,211 @@
+"""Debug tooling: event-loop blocking detection and per-request profiling.
+
+``LoopBlockingDetector`` runs a watchdog thread that notices when the event
+loop stops processing callbacks for longer than a threshold and logs the loop
+thread's stack together with the route being served. ``RequestProfilingMiddleware``
+samples the loop thread while a single request runs and returns the samples as
+folded stacks (``frame;frame;frame count``), which flamegraph.pl, speedscope and
+inferno read directly.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+from metrics import route_label
+
+PROFILE_HEADER = b"x-profile"
+SAMPLE_INTERVAL = 0.001
+# Frames that mean the loop thread is idle, waiting for I/O
+IDLE_FRAMES = {("selectors.py", "select"), ("base_events.py", "_run_once")}
+
+
+class ActiveRequests:
+    """Which request each asyncio task is serving, readable from other threads"""
+
+    def __init__(self):
+        self._scopes = {}
+
+    def __getitem__(self, task):
+        return self._scopes.get(task)
+
+    def track(self, scope):
+        task = asyncio.current_task()
+        self._scopes[task] = scope
+        return task
+
+    def untrack(self, task):
+        self._scopes.pop(task, None)
+
+
+active_requests = ActiveRequests()
+
+
+class RequestTrackingMiddleware:
+    """Record the scope each task is handling so blocked stacks can name the route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = active_requests.track(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            active_requests.untrack(task)
+
+
+class LoopBlockingDetector:
+    """Watchdog thread that logs the stack of anything holding the loop too long"""
+
+    def __init__(self, loop, threshold: float = 0.1):
+        self.loop = loop
+        self.threshold = threshold
+        self.interval = threshold / 4
+        self._loop_thread_id = None
+        self._last_beat = time.monotonic()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start watching; must be called from the loop thread"""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat()
+        self._thread = threading.Thread(target=self._watch, name="loop-blocking-detector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _heartbeat(self):
+        self._last_beat = time.monotonic()
+        if not self._stopped.is_set():
+            self.loop.call_later(self.interval, self._heartbeat)
+
+    def _current_route(self) -> str:
+        task = asyncio.current_task(self.loop)
+        scope = active_requests[task] if task is not None else None
+        if scope is None:
+            return "no request"
+        return f"{scope['method']} {route_label(scope)} ({scope['path']})"
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stopped.wait(self.interval):
+            beat = self._last_beat
+            blocked_for = time.monotonic() - beat - self.interval
+            if blocked_for > self.threshold and reported_beat != beat:
+                reported_beat = beat
+                frame = sys._current_frames().get(self._loop_thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>\n"
+                logging.warning(
+                    f"Event loop blocked for {blocked_for * 1000:.0f} ms while serving "
+                    f"{self._current_route()}; loop thread stack:\n{stack}"
+                )
+            elif reported_beat is not None and reported_beat != beat:
+                logging.warning(f"Event loop unblocked after {(beat - reported_beat) * 1000:.0f} ms")
+                reported_beat = None
+
+
+class StackSampler:
+    """Samples one thread's stack at a fixed interval and counts folded stacks"""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.idle_samples = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename.rsplit("/", 1)[-1], code.co_name, frame.f_lineno))
+                frame = frame.f_back
+            if (stack[0][0], stack[0][1]) in IDLE_FRAMES:
+                self.idle_samples += 1
+                continue
+            self.samples[";".join(f"{name} ({filename}:{line})" for filename, name, line in reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class RequestProfilingMiddleware:
+    """Profile a single request when an authorised caller sends ``X-Profile: 1``.
+
+    The normal response is discarded and replaced with folded stacks; the
+    original status code is returned in ``X-Profiled-Status``. Samples cover
+    the loop thread, so work from concurrent requests can show up too.
+    """
+
+    def __init__(self, app, authorize):
+        self.app = app
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        if not await self.authorize(scope):
+            await self._send_text(send, 403, b"Profiling requires an admin token\n", {})
+            return
+
+        status_code = 500
+
+        async def discard(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        started = time.perf_counter()
+        with StackSampler(threading.get_ident()) as sampler:
+            await self.app(scope, receive, discard)
+        elapsed = time.perf_counter() - started
+
+        await self._send_text(send, 200, sampler.folded().encode(), {
+            b"x-profiled-status": str(status_code).encode(),
+            b"x-profile-duration-ms": f"{elapsed * 1000:.1f}".encode(),
+            b"x-profile-samples": str(sum(sampler.samples.values())).encode(),
+            b"x-profile-idle-samples": str(sampler.idle_samples).encode(),
+        })
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return value.strip().lower() in (b"1", b"true", b"folded")
+        return False
+
+    @staticmethod
+    async def _send_text(send, status: int, body: bytes, headers: dict):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+                *headers.items(),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
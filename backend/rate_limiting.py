@@ -0,0 +1,322 @@
+"""Per-client rate limiting and adaptive load shedding.
+
+``RateLimiter`` enforces sliding-window limits per client IP and per user.
+The window is approximated from the current and previous fixed windows
+(``previous * overlap + current``), so each key costs two counters
+instead of a log of timestamps. Counters live in process (``MemoryStore``,
+one budget per worker) or in MongoDB (``MongoStore``, shared by every worker,
+expired by a TTL index). A failing shared store lets requests through rather
+than locking users out.
+
+``LoadShedder`` watches event-loop lag, requests in flight and the thread-pool
+queue. When pressure crosses 1 it answers CPU-heavy routes with 503 and
+``Retry-After``; cheap routes are only shed once pressure reaches
+``shed_all_at``.
+
+``ProtectionMiddleware`` applies both in front of the app, before the body is
+read or a handler runs. Which routes are heavy is configured on the
+middleware, independently of the rate-limit rules, so shedding still puts
+them first when rate limiting is off. Long-lived streams are neither limited
+nor counted as in flight; instead each client may hold only a few open at
+once.
+"""
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from anyio import to_thread
+from pymongo import ReturnDocument
+
+from metrics import requests_rejected_total
+
+# (requests, seconds)
+Rate = Tuple[int, float]
+LAG_SAMPLE_INTERVAL = 0.05
+# Peak-hold lag estimate decays by this factor per sample interval, so one
+# blocking call triggers shedding immediately but it eases off within a few
+# hundred ms (decay is applied by elapsed time, not only when the sampler runs)
+LAG_DECAY = 0.8
+MAX_RETRY_AFTER = 60
+STREAM_RETRY_AFTER = 5
+
+
+def parse_rate(spec: Optional[str]) -> Optional[Rate]:
+    """Parse ``"10/60"`` (10 requests per 60 seconds); empty or ``off`` disables"""
+    if not spec or spec.strip().lower() in ("0", "off", "none"):
+        return None
+    count, _, seconds = spec.partition("/")
+    return int(count), float(seconds or 60)
+
+
+@dataclass
+class RateLimitRule:
+    name: str
+    paths: Tuple[str, ...] = ()  # exact paths; empty matches everything under prefix
+    prefix: str = "/api/"
+    per_ip: Optional[Rate] = None
+    per_user: Optional[Rate] = None
+
+    def matches(self, path: str) -> bool:
+        if self.paths:
+            return path in self.paths
+        return path.startswith(self.prefix)
+
+
+class MemoryStore:
+    """Window counters for this worker process only
+
+    Keys are kept in least recently hit order. Keys whose windows have both
+    passed are dropped from the front once per window, and past ``max_keys``
+    the least recently hit keys are evicted.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._counters = OrderedDict()
+        self._next_prune = 0.0
+
+    async def hit(self, key: str, window_start: float, window: float) -> Tuple[int, int]:
+        """Count one request; return (previous window count, current window count)"""
+        start, current, previous, _ = self._counters.pop(key, (window_start, 0, 0, None))
+        if start != window_start:
+            previous = current if start == window_start - window else 0
+            current = 0
+        current += 1
+        # Useless once neither the current nor the previous window is this one
+        self._counters[key] = (window_start, current, previous, window_start + 2 * window)
+        if window_start >= self._next_prune:
+            self._next_prune = window_start + window
+            self._prune(window_start)
+        while len(self._counters) > self.max_keys:
+            self._counters.popitem(last=False)
+        return previous, current
+
+    def _prune(self, now: float):
+        while self._counters:
+            key, (_, _, _, expires_at) = next(iter(self._counters.items()))
+            if expires_at > now:
+                break
+            del self._counters[key]
+
+
+class MongoStore:
+    """Window counters shared by all workers through a ``rate_limits`` collection"""
+
+    def __init__(self, get_db):
+        self.get_db = get_db
+
+    async def hit(self, key: str, window_start: float, window: float) -> Tuple[int, int]:
+        collection = self.get_db().rate_limits
+        expire_at = datetime.utcfromtimestamp(window_start + 2 * window)
+        current, previous = await asyncio.gather(
+            collection.find_one_and_update(
+                {"_id": f"{key}:{int(window_start)}"},
+                {"$inc": {"count": 1}, "$setOnInsert": {"expire_at": expire_at}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            ),
+            collection.find_one({"_id": f"{key}:{int(window_start - window)}"}),
+        )
+        return (previous or {}).get("count", 0), current["count"]
+
+
+class RateLimiter:
+    def __init__(self, rules, store=None):
+        self.rules = list(rules)
+        self.store = store or MemoryStore()
+
+    def rule_for(self, path: str) -> Optional[RateLimitRule]:
+        for rule in self.rules:
+            if rule.matches(path):
+                return rule
+        return None
+
+    async def check(self, rule: RateLimitRule, ip: str, user_id: Optional[str]) -> Optional[float]:
+        """Return seconds to wait if a limit is exceeded, else None"""
+        checks = []
+        if rule.per_ip:
+            checks.append((f"{rule.name}:ip:{ip}", rule.per_ip))
+        if rule.per_user and user_id:
+            checks.append((f"{rule.name}:user:{user_id}", rule.per_user))
+        retry_after = None
+        for key, (limit, window) in checks:
+            now = time.time()
+            window_start = now // window * window
+            try:
+                previous, current = await self.store.hit(key, window_start, window)
+            except Exception as e:
+                logging.error(f"Rate limit store failed for {key}: {e}")
+                continue
+            elapsed = (now - window_start) / window
+            if previous * (1 - elapsed) + current > limit:
+                wait = self._wait(limit, window, window_start, now, previous, current)
+                retry_after = max(retry_after or 0, wait)
+        return retry_after
+
+    @staticmethod
+    def _wait(limit, window, window_start, now, previous, current) -> float:
+        if current >= limit or previous == 0:
+            # Only the next window clears it
+            return window_start + window - now
+        # The previous window's share falls below the remaining budget at this point
+        clears_at = window_start + window * (1 - (limit - current) / previous)
+        return max(clears_at - now, 0.1)
+
+
+class LoadShedder:
+    def __init__(self, lag_threshold: float = 0.1, max_in_flight: int = 256,
+                 max_threadpool_queue: int = 32, shed_all_at: float = 3.0):
+        self.lag_threshold = lag_threshold
+        self.max_in_flight = max_in_flight
+        self.max_threadpool_queue = max_threadpool_queue
+        self.shed_all_at = shed_all_at
+        self.interval = LAG_SAMPLE_INTERVAL
+        self.lag = 0.0
+        self.sampled_at = time.monotonic()
+        self.in_flight = 0
+
+    async def monitor(self, interval: float = LAG_SAMPLE_INTERVAL):
+        """Sample event-loop lag; run as a background task"""
+        loop = asyncio.get_running_loop()
+        self.interval = interval
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - expected)
+            self.lag = max(lag, self.current_lag())
+            self.sampled_at = time.monotonic()
+
+    def current_lag(self) -> float:
+        """Peak lag decayed by the time since it was sampled"""
+        samples = (time.monotonic() - self.sampled_at) / self.interval
+        return self.lag * LAG_DECAY ** samples
+
+    @staticmethod
+    def threadpool_queue() -> int:
+        return to_thread.current_default_thread_limiter().statistics().tasks_waiting
+
+    def pressure(self) -> float:
+        return max(
+            self.current_lag() / self.lag_threshold,
+            self.in_flight / self.max_in_flight,
+            self.threadpool_queue() / self.max_threadpool_queue,
+        )
+
+    def should_shed(self, heavy: bool) -> Optional[int]:
+        """Return a Retry-After in seconds if this request should be dropped"""
+        pressure = self.pressure()
+        if pressure < 1 or (not heavy and pressure < self.shed_all_at):
+            return None
+        # Back off longer the further over the threshold we are
+        return min(MAX_RETRY_AFTER, max(1, math.ceil(pressure)))
+
+
+class ProtectionMiddleware:
+    """Rate limits and load shedding for HTTP requests, as pure ASGI middleware"""
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None, shedder: Optional[LoadShedder] = None,
+                 identify_user=None, trusted_proxies: int = 0, exempt_paths=(), heavy_paths=(),
+                 stream_paths=(), max_streams_per_client: int = 0):
+        self.app = app
+        self.limiter = limiter
+        self.shedder = shedder
+        self.identify_user = identify_user
+        self.trusted_proxies = trusted_proxies
+        self.exempt_paths = set(exempt_paths)
+        self.heavy_paths = set(heavy_paths)  # shed first under load
+        self.stream_paths = set(stream_paths)
+        self.max_streams_per_client = max_streams_per_client  # per worker; 0 is unlimited
+        self.open_streams = defaultdict(int)
+        self._warned_unconfigured_proxy = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        if scope["path"] in self.stream_paths:
+            await self._stream(scope, receive, send)
+            return
+
+        rule = self.limiter.rule_for(scope["path"]) if self.limiter else None
+        label = rule.name if rule else "other"
+        if self.shedder is not None:
+            retry_after = self.shedder.should_shed(heavy=scope["path"] in self.heavy_paths)
+            if retry_after is not None:
+                requests_rejected_total.inc("shed", label)
+                await self._reject(send, 503, "Server is overloaded, retry later", retry_after)
+                return
+        if rule is not None:
+            user_id = self.identify_user(scope) if self.identify_user and rule.per_user else None
+            retry_after = await self.limiter.check(rule, self.client_ip(scope), user_id)
+            if retry_after is not None:
+                requests_rejected_total.inc("rate_limited", label)
+                await self._reject(send, 429, "Too many requests", math.ceil(retry_after))
+                return
+
+        if self.shedder is None:
+            await self.app(scope, receive, send)
+            return
+        self.shedder.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.shedder.in_flight -= 1
+
+    async def _stream(self, scope, receive, send):
+        ip = self.client_ip(scope)
+        if self.max_streams_per_client and self.open_streams[ip] >= self.max_streams_per_client:
+            requests_rejected_total.inc("too_many_streams", "stream")
+            await self._reject(send, 429, "Too many open streams", STREAM_RETRY_AFTER)
+            return
+        self.open_streams[ip] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.open_streams[ip] -= 1
+            if not self.open_streams[ip]:
+                del self.open_streams[ip]
+
+    def client_ip(self, scope) -> str:
+        """The address the outermost of ``trusted_proxies`` proxies saw the request come from
+
+        Each proxy appends the address it received the request from to
+        X-Forwarded-For, so only the last ``trusted_proxies`` entries were
+        written by our own proxies; anything to the left of them is whatever
+        the client chose to send.
+        """
+        if self.trusted_proxies:
+            forwarded = [
+                address.strip()
+                for name, value in scope["headers"] if name == b"x-forwarded-for"
+                for address in value.decode("latin-1").split(",") if address.strip()
+            ]
+            if forwarded:
+                return forwarded[-min(self.trusted_proxies, len(forwarded))]
+        elif not self._warned_unconfigured_proxy and any(name == b"x-forwarded-for" for name, _ in scope["headers"]):
+            self._warned_unconfigured_proxy = True
+            logging.warning(
+                "Requests arrive through a proxy (X-Forwarded-For) but no trusted proxies are configured: "
+                "every client shares the proxy's address and its rate limits. Set RATE_LIMIT_TRUSTED_PROXIES."
+            )
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    async def _reject(send, status: int, detail: str, retry_after: int):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,95 @@
+"""Production launcher: gunicorn master with N uvicorn workers.
+
+    python backend/serve.py [--workers 4] [--bind 0.0.0.0:8000]
+
+Workers default to ``WEB_CONCURRENCY`` (or 2 x CPUs + 1, capped at 8). Each
+worker opens its own MongoDB pool in the app lifespan, so size
+``MONGO_MAX_POOL_SIZE`` per worker.
+
+Signals to the master process:
+
+* ``HUP``: graceful reload; new workers start with fresh code and config,
+  old ones finish in-flight requests within ``GRACEFUL_TIMEOUT``
+* ``TERM``: graceful shutdown
+* ``TTIN``/``TTOU``: add or remove one worker
+
+Each worker gets a slot number, the lowest one no live worker holds, and
+``LIVE_FEED_WORKER_ID=<host>:<slot>``. A worker replacing a dead or recycled
+one takes over its slot, so its live feed resumes from that slot's change
+stream checkpoint instead of starting a new one. During a ``HUP`` reload the
+old and new workers overlap, so the new ones take the slots above them.
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+
+from gunicorn.app.base import BaseApplication
+
+
+def default_workers() -> int:
+    return int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8)))
+
+
+def pre_fork(server, worker):
+    """Give the worker about to be forked the lowest free slot (runs in the master)"""
+    taken = {getattr(other, "slot", None) for other in server.WORKERS.values()}
+    worker.slot = next(slot for slot in range(len(taken) + 1) if slot not in taken)
+
+
+def post_fork(server, worker):
+    """Name the worker's live feed checkpoint after its slot (runs in the worker, before the app is imported)"""
+    os.environ["LIVE_FEED_WORKER_ID"] = f"{socket.gethostname()}:{worker.slot}"
+
+
+class Server(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        # Imported in each worker (no preload) so HUP picks up new code
+        from server import app
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bind", default=os.environ.get("BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}"))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--timeout", type=int, default=int(os.environ.get("WORKER_TIMEOUT", "60")),
+                        help="Seconds before a silent worker is killed and replaced")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.environ.get("GRACEFUL_TIMEOUT", "30")),
+                        help="Seconds workers get to finish requests on reload/shutdown")
+    parser.add_argument("--keep-alive", type=int, default=int(os.environ.get("KEEP_ALIVE", "5")))
+    parser.add_argument("--max-requests", type=int, default=int(os.environ.get("MAX_REQUESTS", "0")),
+                        help="Recycle a worker after this many requests (0 disables)")
+    parser.add_argument("--max-requests-jitter", type=int, default=int(os.environ.get("MAX_REQUESTS_JITTER", "0")))
+    parser.add_argument("--log-level", default=os.environ.get("LOG_LEVEL", "info"))
+    args = parser.parse_args()
+
+    Server({
+        "bind": args.bind,
+        "workers": args.workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "timeout": args.timeout,
+        "graceful_timeout": args.graceful_timeout,
+        "keepalive": args.keep_alive,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests_jitter,
+        "loglevel": args.log_level,
+        "accesslog": os.environ.get("ACCESS_LOG"),
+        "pre_fork": pre_fork,
+        "post_fork": post_fork,
+        # Run from the repository root so frontend/build resolves; import server from here
+        "pythonpath": os.path.dirname(os.path.abspath(__file__)),
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
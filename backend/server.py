@@ -1,11 +1,12 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, File, UploadFile, Form
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, File, UploadFile, Form, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse, ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
@@ -19,27 +20,71 @@ import base64
 from passlib.context import CryptContext
 import httpx
 import json
-import random
+import secrets
+import socket
 import string
-import pandas as pd
-import numpy as np
-from scipy import stats
-import talib as ta
-import matplotlib.pyplot as plt
-from io import BytesIO
-import requests
-import time
-import hmac
-import hashlib
-from concurrent.futures import ThreadPoolExecutor
+from bulk_io import BulkFormatError, EXPORT_FORMATS, detect_format, import_documents, export_stream, stream_csv
+from coupon_batches import DEFAULT_ALPHABET, CouponBatchError, validate_code_space, create_coupon_batch
+from profiling import LoopBlockingDetector, RequestProfilingMiddleware, RequestTrackingMiddleware
+from metrics import MetricsMiddleware, MongoCommandListener, registry as metrics_registry, sample_event_loop_lag
+from analytics import ensure_rollup_indexes, record_sale, rebuild_sales_rollups, get_sales_dashboard
+from database import create_mongo_client, database_handles, ensure_ttl_indexes, ensure_unique_index
+from static_files import FrontendStaticFiles
+from live_feed import EventFeed, sse_stream
+from rate_limiting import LoadShedder, MemoryStore, MongoStore, ProtectionMiddleware, RateLimiter, RateLimitRule, parse_rate
+from archival import Archiver, MongoColdStore, ParquetColdStore, ensure_archive_indexes
+from event_search import SearchError, SORTS as SEARCH_SORTS, build_filters, ensure_search_indexes, search_events, search_facets
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# Deployment flags
+def env_flag(name: str, default: bool) -> bool:
+    return os.environ.get(name, "true" if default else "false").lower() in ("1", "true", "yes")
+
+TRADING_ENABLED = env_flag("ENABLE_TRADING", True)
+ACCOUNT_SYNC_INTERVAL = float(os.environ.get("ACCOUNT_SYNC_INTERVAL_SECONDS", "0"))
+METRICS_ENABLED = env_flag("ENABLE_METRICS", True)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+# Debug mode: log the stack of anything holding the event loop longer than the threshold
+LOOP_BLOCKING_DEBUG = env_flag("DEBUG_LOOP_BLOCKING", False)
+LOOP_BLOCKING_THRESHOLD_MS = float(os.environ.get("LOOP_BLOCKING_THRESHOLD_MS", "100"))
+# Allow admins to profile a single request with the X-Profile header
+REQUEST_PROFILING_ENABLED = env_flag("ENABLE_REQUEST_PROFILING", False)
+# Sliding-window limits per client IP and per user ("requests/seconds", "off" disables).
+# Off by default: behind a proxy every client has the proxy's address until
+# RATE_LIMIT_TRUSTED_PROXIES is set, and the whole site would share one budget.
+RATE_LIMITING_ENABLED = env_flag("ENABLE_RATE_LIMITING", False)
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")  # memory (per worker) or mongo (shared)
+# Number of proxies in front of the app (load balancer, ingress, nginx) that append to
+# X-Forwarded-For; the client IP is the entry that many places from the right.
+# 0 uses the socket peer address, which is only right when clients connect directly.
+RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get("RATE_LIMIT_TRUSTED_PROXIES", "0"))
+# Drop requests with 503 when the event loop lags or work queues up, CPU-heavy routes first
+LOAD_SHEDDING_ENABLED = env_flag("ENABLE_LOAD_SHEDDING", True)
+# Push event changes to browsers over SSE from one change stream per worker (needs a replica set)
+LIVE_FEED_ENABLED = env_flag("ENABLE_LIVE_FEED", True)
+LIVE_FEED_DEBOUNCE_MS = float(os.environ.get("LIVE_FEED_DEBOUNCE_MS", "500"))
+# Names this worker's change stream checkpoint; serve.py sets <host>:<slot> so a replaced worker resumes
+LIVE_FEED_WORKER_ID = os.environ.get("LIVE_FEED_WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+# Open streams per client IP and worker (0 is unlimited); keyed like the rate limits, so on with them by default
+LIVE_FEED_MAX_STREAMS_PER_CLIENT = int(os.environ.get("LIVE_FEED_MAX_STREAMS_PER_CLIENT", "10" if RATE_LIMITING_ENABLED else "0"))
+# Move finished events, their tickets and settled trades to cold storage (see archival.py)
+ARCHIVE_STORE = os.environ.get("ARCHIVE_STORE", "mongo")  # mongo (<collection>_archive) or parquet
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", "archive")  # Parquet files, relative to the working directory
+ARCHIVE_AFTER_DAYS = float(os.environ.get("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_INTERVAL = float(os.environ.get("ARCHIVE_INTERVAL_SECONDS", "0"))  # 0 runs passes only on demand
+# Built React app, relative to the working directory; API-only workers can run without it
+FRONTEND_BUILD_DIR = os.environ.get("FRONTEND_BUILD_DIR", "frontend/build")
+
+# MongoDB connection, opened per worker process in the lifespan hook (see database.py)
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+db_name = os.environ['DB_NAME']
+client = None
+db = None  # primary
+catalog_db = None  # event catalog reads, secondaryPreferred by default
+analytics_db = None  # dashboard and export reads, secondaryPreferred by default
+purchase_db = None  # primary reads, majority writes
 
 # Security
 security = HTTPBearer()
@@ -47,16 +92,42 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 JWT_SECRET = os.environ.get("JWT_SECRET", "your-secret-key-change-this")
 JWT_ALGORITHM = "HS256"
 
+def connect_database():
+    global client, db, catalog_db, analytics_db, purchase_db
+    client = create_mongo_client(mongo_url, event_listeners=[MongoCommandListener()] if METRICS_ENABLED else [])
+    handles = database_handles(client, db_name)
+    db = handles["db"]
+    catalog_db = handles["catalog_db"]
+    analytics_db = handles["analytics_db"]
+    purchase_db = handles["purchase_db"]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Connect after the worker has forked; a database set beforehand (benchmarks) is kept
+    owns_client = db is None
+    if owns_client:
+        connect_database()
+    await create_indexes()
+    start_background_tasks()
+    try:
+        yield
+    finally:
+        await stop_background_tasks()
+        if account_sync is not None:
+            await account_sync.close()
+        if owns_client:
+            client.close()
+
 # Create the main app without a prefix
-app = FastAPI(title="Ticket Manager & Trading API")
+app = FastAPI(title="Ticket Manager & Trading API", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Trading router
-trading_router = APIRouter(prefix="/trading")
-
 # Helper Functions
+def get_db():
+    return db
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -86,6 +157,25 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
 
+def user_id_from_scope(scope) -> Optional[str]:
+    """User id from a valid bearer token on a raw ASGI request, without a DB lookup"""
+    authorization = dict(scope["headers"]).get(b"authorization", b"").decode()
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM]).get("sub")
+    except jwt.PyJWTError:
+        return None
+
+async def is_admin_request(scope) -> bool:
+    """Check the bearer token on a raw ASGI request belongs to an admin"""
+    user_id = user_id_from_scope(scope)
+    if user_id is None:
+        return False
+    user = await db.users.find_one({"id": user_id}, {"role": 1})
+    return user is not None and user.get("role") in ["admin", "super_admin"]
+
 def generate_qr_code(data: str) -> str:
     """Generate QR code and return as base64 string"""
     qr = qrcode.QRCode(version=1, box_size=10, border=5)
@@ -112,174 +202,34 @@ async def send_webhook_notification(webhook_url: str, data: dict):
 def generate_random_code(length: int = 8) -> str:
     """Generate a random alphanumeric code"""
     chars = string.ascii_uppercase + string.digits
-    return ''.join(random.choice(chars) for _ in range(length))
-
-# Trading API Functions
-def calculate_rsi(data, period=14):
-    """Calculate RSI indicator"""
-    returns = data.diff()
-    up = returns.clip(lower=0)
-    down = -returns.clip(upper=0)
-    ma_up = up.rolling(period).mean()
-    ma_down = down.rolling(period).mean()
-    rs = ma_up / ma_down
-    return 100 - (100 / (1 + rs))
-
-def calculate_macd(data, fast=12, slow=26, signal=9):
-    """Calculate MACD indicator"""
-    ema_fast = data.ewm(span=fast, adjust=False).mean()
-    ema_slow = data.ewm(span=slow, adjust=False).mean()
-    macd_line = ema_fast - ema_slow
-    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
-    histogram = macd_line - signal_line
-    return macd_line, signal_line, histogram
-
-def calculate_bollinger_bands(data, period=20, std_dev=2):
-    """Calculate Bollinger Bands"""
-    ma = data.rolling(period).mean()
-    std = data.rolling(period).std()
-    upper_band = ma + std_dev * std
-    lower_band = ma - std_dev * std
-    return upper_band, ma, lower_band
-
-def get_candles(symbol, interval='1h', limit=100):
-    """Get candlestick data from Binance"""
-    url = f"https://api.binance.com/api/v3/klines"
-    params = {
-        'symbol': symbol,
-        'interval': interval,
-        'limit': limit
-    }
-    
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        candles = response.json()
-        
-        # Convert to pandas DataFrame
-        df = pd.DataFrame(candles, columns=[
-            'open_time', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_asset_volume', 'number_of_trades',
-            'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-        ])
-        
-        # Convert types
-        df['open_time'] = pd.to_datetime(df['open_time'], unit='ms')
-        df['close_time'] = pd.to_datetime(df['close_time'], unit='ms')
-        numeric_cols = ['open', 'high', 'low', 'close', 'volume']
-        df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric)
-        
-        return df
-    except Exception as e:
-        logging.error(f"Error fetching candles: {e}")
-        return None
+    return ''.join(secrets.choice(chars) for _ in range(length))
 
-def generate_trading_signals(symbol, interval='1h', limit=100):
-    """Generate trading signals based on multiple indicators"""
-    df = get_candles(symbol, interval, limit)
-    if df is None:
+def parse_fields(fields: Optional[str], allowed) -> Optional[List[str]]:
+    """Parse a comma separated ?fields= value, rejecting unknown fields"""
+    if not fields:
         return None
-    
-    # Calculate indicators
-    df['rsi'] = calculate_rsi(df['close'])
-    df['macd'], df['signal'], df['histogram'] = calculate_macd(df['close'])
-    df['upper_band'], df['middle_band'], df['lower_band'] = calculate_bollinger_bands(df['close'])
-    
-    # Generate signals
-    signals = []
-    
-    # Latest data point
-    latest = df.iloc[-1]
-    
-    # RSI signals
-    if latest['rsi'] < 30:
-        signals.append({
-            'indicator': 'RSI',
-            'signal': 'BUY',
-            'strength': 'STRONG',
-            'value': latest['rsi']
-        })
-    elif latest['rsi'] > 70:
-        signals.append({
-            'indicator': 'RSI',
-            'signal': 'SELL',
-            'strength': 'STRONG',
-            'value': latest['rsi']
-        })
-    
-    # MACD signals
-    if latest['macd'] > latest['signal'] and df.iloc[-2]['macd'] <= df.iloc[-2]['signal']:
-        signals.append({
-            'indicator': 'MACD',
-            'signal': 'BUY',
-            'strength': 'MEDIUM',
-            'value': latest['macd']
-        })
-    elif latest['macd'] < latest['signal'] and df.iloc[-2]['macd'] >= df.iloc[-2]['signal']:
-        signals.append({
-            'indicator': 'MACD',
-            'signal': 'SELL',
-            'strength': 'MEDIUM',
-            'value': latest['macd']
-        })
-    
-    # Bollinger Bands signals
-    if latest['close'] < latest['lower_band']:
-        signals.append({
-            'indicator': 'BOLLINGER',
-            'signal': 'BUY',
-            'strength': 'MEDIUM',
-            'value': f"Close: {latest['close']}, Lower: {latest['lower_band']}"
-        })
-    elif latest['close'] > latest['upper_band']:
-        signals.append({
-            'indicator': 'BOLLINGER',
-            'signal': 'SELL',
-            'strength': 'MEDIUM',
-            'value': f"Close: {latest['close']}, Upper: {latest['upper_band']}"
-        })
-    
-    # Generate chart
-    chart_buffer = BytesIO()
-    plt.figure(figsize=(10, 12))
-    
-    # Price and Bollinger Bands
-    plt.subplot(3, 1, 1)
-    plt.plot(df['close_time'], df['close'], label='Close Price')
-    plt.plot(df['close_time'], df['upper_band'], 'r--', label='Upper BB')
-    plt.plot(df['close_time'], df['middle_band'], 'g--', label='Middle BB')
-    plt.plot(df['close_time'], df['lower_band'], 'r--', label='Lower BB')
-    plt.title(f"{symbol} Price with Bollinger Bands")
-    plt.legend()
-    
-    # RSI
-    plt.subplot(3, 1, 2)
-    plt.plot(df['close_time'], df['rsi'])
-    plt.axhline(y=70, color='r', linestyle='-')
-    plt.axhline(y=30, color='g', linestyle='-')
-    plt.title('RSI')
-    
-    # MACD
-    plt.subplot(3, 1, 3)
-    plt.plot(df['close_time'], df['macd'], label='MACD')
-    plt.plot(df['close_time'], df['signal'], label='Signal')
-    plt.bar(df['close_time'], df['histogram'], width=0.01, label='Histogram')
-    plt.title('MACD')
-    plt.legend()
-    
-    plt.tight_layout()
-    plt.savefig(chart_buffer, format='png')
-    plt.close()
-    chart_buffer.seek(0)
-    chart_base64 = base64.b64encode(chart_buffer.getvalue()).decode('utf-8')
-    
-    return {
-        'signals': signals,
-        'chart': chart_base64,
-        'timestamp': datetime.utcnow().isoformat(),
-        'symbol': symbol,
-        'interval': interval
-    }
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+def build_projection(model, fields: Optional[List[str]] = None) -> dict:
+    """Build a Mongo projection for a response model, optionally narrowed to fields"""
+    projection = {"_id": 0}
+    for field in fields or model.model_fields:
+        projection[field] = 1
+    return projection
+
+def lean_response(content) -> ORJSONResponse:
+    """Return trusted, already projected DB data without response model re-validation.
+
+    FastAPI passes a returned Response straight through, so the response_model
+    on these routes only documents them in the OpenAPI schema. The projection
+    built from the model is what shapes the output, and
+    tests/test_lean_responses.py checks it against the model.
+    """
+    return ORJSONResponse(content=content)
 
 # Models
 class User(BaseModel):
@@ -341,9 +291,22 @@ class Coupon(BaseModel):
     max_uses: Optional[int] = None  # If None, unlimited uses
     used_count: int = 0
     active: bool = True
+    campaign_id: Optional[str] = None  # Set for codes generated in bulk
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
+class CouponCampaignRequest(BaseModel):
+    name: str
+    count: int = Field(..., gt=0, le=1000000)
+    code_length: int = Field(10, ge=4, le=32)
+    alphabet: str = DEFAULT_ALPHABET
+    prefix: str = ""
+    discount_percentage: float
+    event_id: Optional[str] = None
+    valid_from: datetime
+    valid_until: Optional[datetime] = None
+    max_uses: Optional[int] = 1  # Single-use by default
+
 class CouponValidateRequest(BaseModel):
     coupon_code: str
     event_id: str
@@ -376,44 +339,12 @@ class IEEEVerificationRequest(BaseModel):
     member_id: str
     verification_file: str  # Base64 encoded file
 
-class TradingAPICredentialsRequest(BaseModel):
-    api_key: str
-    api_secret: str
-    exchange: str = "binance"
-
-class TradingSignalRequest(BaseModel):
-    symbol: str
-    interval: str = "1h"
-    limit: int = 100
-
-class AutoTradeBotSettings(BaseModel):
-    id: Optional[str] = None
-    user_id: str
-    symbol: str
-    base_asset: str
-    quote_asset: str
-    strategy: str  # rsi, macd, bollinger, combined
-    risk_level: str  # low, medium, high
-    trade_amount_percentage: float  # percentage of available balance
-    max_trades_per_day: int
-    take_profit_percentage: float
-    stop_loss_percentage: float
-    active: bool = False
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
-
-class TradeHistoryItem(BaseModel):
-    id: Optional[str] = None
-    user_id: str
-    bot_id: str
-    symbol: str
-    action: str  # buy, sell
-    quantity: float
-    price: float
-    total: float
-    status: str  # pending, completed, failed
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
+# Collections that support bulk import/export: model and the key used for upserts
+BULK_COLLECTIONS = {
+    "events": (Event, "id"),
+    "coupons": (Coupon, "code"),
+    "tickets": (Ticket, "id"),
+}
 
 # Auth Routes
 @api_router.post("/auth/register", response_model=dict)
@@ -444,8 +375,9 @@ async def register_user(user_data: User):
         data={"sub": user_dict["id"]}
     )
     
-    # Remove password from response
+    # Remove password and Mongo's ObjectId from response
     user_dict.pop("password")
+    user_dict.pop("_id", None)
     
     return {
         "access_token": access_token,
@@ -469,8 +401,9 @@ async def login_user(login_data: LoginRequest):
         data={"sub": user["id"]}
     )
     
-    # Remove password from response
+    # Remove password and Mongo's ObjectId from response
     user.pop("password")
+    user.pop("_id", None)
     
     # Check if user has trading API credentials
     if user.get("trading_api_key") and user.get("trading_api_secret"):
@@ -590,28 +523,79 @@ async def verify_ieee_membership(data: IEEEVerificationRequest, current_user: di
 
 # Event Routes
 @api_router.get("/events", response_model=List[Event])
-async def get_events():
+async def get_events(fields: Optional[str] = Query(None, description="Comma separated fields to return")):
+    projection = build_projection(Event, parse_fields(fields, Event.model_fields))
+    
     # Get all events that are not canceled
-    cursor = db.events.find({"status": {"$ne": "canceled"}})
+    cursor = catalog_db.events.find({"status": {"$ne": "canceled"}}, projection)
     events = await cursor.to_list(length=100)
-    return events
+    return lean_response(events)
 
 @api_router.get("/events/featured", response_model=List[Event])
-async def get_featured_events():
+async def get_featured_events(fields: Optional[str] = Query(None, description="Comma separated fields to return")):
+    projection = build_projection(Event, parse_fields(fields, Event.model_fields))
+    
     # Get featured events that are upcoming or ongoing
-    cursor = db.events.find({
+    cursor = catalog_db.events.find({
         "featured": True,
         "status": {"$in": ["upcoming", "ongoing"]}
-    })
+    }, projection)
     events = await cursor.to_list(length=10)
-    return events
+    return lean_response(events)
+
+@api_router.get("/events/search", response_model=dict)
+async def search_event_catalog(
+    q: Optional[str] = Query(None, description="Full-text search over title, location and description"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Comma separated statuses; default excludes canceled"),
+    featured: Optional[bool] = None,
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    sort: str = Query("start_date", description=f"One of {', '.join(SEARCH_SORTS)}"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    facets: bool = False,
+    fields: Optional[str] = Query(None, description="Comma separated fields to return")
+):
+    projection = build_projection(Event, parse_fields(fields, Event.model_fields))
+    statuses = [s.strip() for s in status_filter.split(",") if s.strip()] if status_filter else None
+    filters = build_filters(q.strip() if q else None, statuses, featured, start_from, start_to, min_price, max_price)
+    
+    try:
+        if facets:
+            page, facet_counts = await asyncio.gather(
+                search_events(catalog_db, projection, filters, sort=sort, limit=limit, cursor=cursor),
+                search_facets(catalog_db, filters),
+            )
+            page["facets"] = facet_counts
+        else:
+            page = await search_events(catalog_db, projection, filters, sort=sort, limit=limit, cursor=cursor)
+    except SearchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return lean_response(page)
+
+@api_router.get("/events/live")
+async def live_event_feed(event_ids: Optional[str] = Query(None, description="Comma separated event ids; default all events")):
+    """Server-Sent Events stream of event changes and ticket sales"""
+    if event_feed is None:
+        raise HTTPException(status_code=404, detail="Live feed is disabled")
+    
+    ids = {event_id.strip() for event_id in event_ids.split(",") if event_id.strip()} if event_ids else None
+    return StreamingResponse(sse_stream(event_feed, ids), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"  # Stop nginx from buffering the stream
+    })
 
 @api_router.get("/events/{event_id}", response_model=Event)
-async def get_event(event_id: str):
-    event = await db.events.find_one({"id": event_id})
+async def get_event(event_id: str, fields: Optional[str] = Query(None, description="Comma separated fields to return")):
+    projection = build_projection(Event, parse_fields(fields, Event.model_fields))
+    
+    event = await catalog_db.events.find_one({"id": event_id}, projection)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
-    return event
+    return lean_response(event)
 
 # Coupon Routes
 @api_router.post("/validate-coupon", response_model=dict)
@@ -663,7 +647,7 @@ async def purchase_tickets(data: TicketPurchaseRequest, current_user: dict = Dep
     # Apply coupon if provided
     discount_amount = 0
     if data.coupon_code:
-        coupon = await db.coupons.find_one({
+        coupon = await purchase_db.coupons.find_one({
             "code": data.coupon_code,
             "active": True
         })
@@ -679,7 +663,7 @@ async def purchase_tickets(data: TicketPurchaseRequest, current_user: dict = Dep
                         discount_amount = data.total_amount * (discount_percentage / 100)
                         
                         # Update coupon usage count
-                        await db.coupons.update_one(
+                        await purchase_db.coupons.update_one(
                             {"id": coupon["id"]},
                             {"$inc": {"used_count": 1}}
                         )
@@ -716,8 +700,14 @@ async def purchase_tickets(data: TicketPurchaseRequest, current_user: dict = Dep
         "updated_at": now
     }
     
-    # Save ticket to database
-    await db.tickets.insert_one(ticket)
+    # Save ticket to database, acknowledged by a majority of the replica set
+    await purchase_db.tickets.insert_one(ticket)
+    
+    # Update sales rollups for the admin dashboard
+    try:
+        await record_sale(db, ticket)
+    except Exception as e:
+        logging.error(f"Sales rollup update failed for ticket {ticket_id}: {e}")
     
     # Send notification (optional)
     webhook_url = os.environ.get("TICKET_WEBHOOK_URL")
@@ -736,35 +726,95 @@ async def purchase_tickets(data: TicketPurchaseRequest, current_user: dict = Dep
         "message": "Tickets purchased successfully"
     }
 
-@api_router.get("/user/tickets", response_model=List[dict])
-async def get_user_tickets(current_user: dict = Depends(get_current_user)):
-    # Get all tickets for current user
-    cursor = db.tickets.find({"user_id": current_user["id"]})
-    tickets = await cursor.to_list(length=100)
+# Ticket fields plus the joined event, either whole ("event") or by field ("event.title")
+TICKET_RESPONSE_FIELDS = set(Ticket.model_fields) | {"event"} | {f"event.{field}" for field in Event.model_fields}
+
+def ticket_projections(fields: Optional[str]):
+    """Split ?fields= into ticket and event projections (event is None when not requested)"""
+    requested = parse_fields(fields, TICKET_RESPONSE_FIELDS)
+    if requested is None:
+        return build_projection(Ticket), build_projection(Event)
+    
+    ticket_fields = [field for field in requested if field in Ticket.model_fields]
+    event_fields = [field.split(".", 1)[1] for field in requested if field.startswith("event.")]
+    
+    ticket_projection = build_projection(Ticket, ticket_fields or ["id"])
+    if "event" in requested:
+        return ticket_projection, build_projection(Event)
+    if event_fields:
+        return ticket_projection, build_projection(Event, event_fields)
+    return ticket_projection, None
+
+async def attach_events(tickets: List[dict], event_projection: Optional[dict]):
+    """Join event details onto tickets with a single query"""
+    event_ids = list({ticket["event_id"] for ticket in tickets})
+    cursor = catalog_db.events.find({"id": {"$in": event_ids}}, {**event_projection, "id": 1})
+    events = {event["id"]: event for event in await cursor.to_list(length=len(event_ids))}
     
-    # Get event details for each ticket
     for ticket in tickets:
-        event = await db.events.find_one({"id": ticket["event_id"]})
+        event = events.get(ticket["event_id"])
+        if event is not None and "id" not in event_projection:
+            event = {key: value for key, value in event.items() if key != "id"}
         ticket["event"] = event
     
     return tickets
 
+def strip_fields(docs: List[dict], fields: List[str]):
+    """Drop fields that were only fetched for internal use"""
+    for doc in docs:
+        for field in fields:
+            doc.pop(field, None)
+
+@api_router.get("/user/tickets", response_model=List[dict])
+async def get_user_tickets(
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. id,status,event.title"),
+    current_user: dict = Depends(get_current_user)
+):
+    ticket_projection, event_projection = ticket_projections(fields)
+    internal_fields = [] if "event_id" in ticket_projection else ["event_id"]
+    
+    # Get all tickets for current user
+    cursor = db.tickets.find({"user_id": current_user["id"]}, {**ticket_projection, "event_id": 1})
+    tickets = await cursor.to_list(length=100)
+    
+    # Get event details for all tickets at once
+    if event_projection is not None:
+        await attach_events(tickets, event_projection)
+    strip_fields(tickets, internal_fields)
+    
+    return lean_response(tickets)
+
 @api_router.get("/ticket/{ticket_id}", response_model=dict)
-async def get_ticket(ticket_id: str, current_user: dict = Depends(get_current_user)):
-    # Get ticket
-    ticket = await db.tickets.find_one({"id": ticket_id})
+async def get_ticket(
+    ticket_id: str,
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. id,qr_code,event.title"),
+    current_user: dict = Depends(get_current_user)
+):
+    ticket_projection, event_projection = ticket_projections(fields)
+    internal_fields = [field for field in ["event_id", "user_id"] if field not in ticket_projection]
+    
+    # Get ticket; admins also see archived tickets
+    is_admin = current_user["role"] in ["admin", "super_admin"]
+    ticket = await db.tickets.find_one({"id": ticket_id}, {**ticket_projection, "event_id": 1, "user_id": 1})
+    archived = False
+    if not ticket and is_admin:
+        ticket = await archive_store.find_one("tickets", ticket_id, {**ticket_projection, "event_id": 1, "user_id": 1})
+        archived = ticket is not None
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     
     # Check if ticket belongs to current user or user is admin
-    if ticket["user_id"] != current_user["id"] and current_user["role"] not in ["admin", "super_admin"]:
+    if ticket["user_id"] != current_user["id"] and not is_admin:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    # Get event details
-    event = await db.events.find_one({"id": ticket["event_id"]})
-    ticket["event"] = event
+    # Get event details; an archived ticket's event is archived along with it
+    if archived and event_projection is not None:
+        ticket["event"] = await archiver.find_one("events", ticket["event_id"], event_projection)
+    elif event_projection is not None:
+        await attach_events([ticket], event_projection)
+    strip_fields([ticket], internal_fields)
     
-    return ticket
+    return lean_response(ticket)
 
 # Admin Routes
 @api_router.get("/admin/events", response_model=List[Event])
@@ -773,9 +823,9 @@ async def admin_get_events(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Access denied")
     
     # Get all events
-    cursor = db.events.find()
+    cursor = db.events.find({}, build_projection(Event))
     events = await cursor.to_list(length=100)
-    return events
+    return lean_response(events)
 
 @api_router.post("/admin/events", response_model=Event)
 async def admin_create_event(event_data: Event, current_user: dict = Depends(get_current_user)):
@@ -796,6 +846,18 @@ async def admin_create_event(event_data: Event, current_user: dict = Depends(get
     
     return event_dict
 
+@api_router.get("/admin/events/{event_id}", response_model=Event)
+async def admin_get_event(event_id: str, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    # Look in the hot collection first, then the archive
+    event = await archiver.find_one("events", event_id, build_projection(Event))
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    
+    return lean_response(event)
+
 @api_router.put("/admin/events/{event_id}", response_model=Event)
 async def admin_update_event(event_id: str, event_data: dict, current_user: dict = Depends(get_current_user)):
     if current_user["role"] not in ["admin", "super_admin"]:
@@ -875,6 +937,99 @@ async def admin_create_coupon(coupon_data: Coupon, current_user: dict = Depends(
     
     return coupon_dict
 
+@api_router.post("/admin/coupon-campaigns", response_model=dict)
+async def admin_create_coupon_campaign(data: CouponCampaignRequest, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    try:
+        validate_code_space(data.count, data.code_length, data.alphabet)
+    except CouponBatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Track the campaign as a unit so its codes can be listed and audited together
+    now = datetime.utcnow()
+    campaign = {
+        "id": str(uuid.uuid4()),
+        "name": data.name,
+        "requested_count": data.count,
+        "generated_count": 0,
+        "code_length": data.code_length,
+        "prefix": data.prefix,
+        "discount_percentage": data.discount_percentage,
+        "event_id": data.event_id,
+        "status": "generating",
+        "created_by": current_user["id"],
+        "created_at": now,
+        "updated_at": now
+    }
+    await db.coupon_campaigns.insert_one(campaign)
+    
+    template = {
+        "discount_percentage": data.discount_percentage,
+        "event_id": data.event_id,
+        "valid_from": data.valid_from,
+        "valid_until": data.valid_until,
+        "max_uses": data.max_uses,
+        "used_count": 0,
+        "active": True,
+        "campaign_id": campaign["id"]
+    }
+    
+    try:
+        result = await create_coupon_batch(
+            db.coupons, template, data.count, data.code_length, data.alphabet, data.prefix
+        )
+    except Exception as e:
+        generated = await db.coupons.count_documents({"campaign_id": campaign["id"]})
+        await db.coupon_campaigns.update_one(
+            {"id": campaign["id"]},
+            {"$set": {"status": "failed", "generated_count": generated, "error": str(e), "updated_at": datetime.utcnow()}}
+        )
+        logging.error(f"Coupon campaign {campaign['id']} failed: {e}")
+        raise HTTPException(status_code=500, detail="Coupon generation failed")
+    
+    await db.coupon_campaigns.update_one(
+        {"id": campaign["id"]},
+        {"$set": {
+            "status": "completed",
+            "generated_count": result["generated"],
+            "codes_per_second": result["codes_per_second"],
+            "updated_at": datetime.utcnow()
+        }}
+    )
+    
+    return {
+        "success": True,
+        "campaign_id": campaign["id"],
+        **result
+    }
+
+@api_router.get("/admin/coupon-campaigns", response_model=List[dict])
+async def admin_get_coupon_campaigns(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    cursor = db.coupon_campaigns.find({}, {"_id": 0}).sort("created_at", -1)
+    campaigns = await cursor.to_list(length=100)
+    return campaigns
+
+@api_router.get("/admin/coupon-campaigns/{campaign_id}/codes")
+async def admin_export_campaign_codes(campaign_id: str, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    campaign = await db.coupon_campaigns.find_one({"id": campaign_id})
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    cursor = db.coupons.find({"campaign_id": campaign_id}, {"_id": 0, "code": 1, "used_count": 1, "active": 1})
+    return StreamingResponse(
+        stream_csv(cursor.batch_size(1000), ["code", "used_count", "active"]),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="campaign-{campaign_id}.csv"'}
+    )
+
 @api_router.put("/admin/coupons/{coupon_id}", response_model=Coupon)
 async def admin_update_coupon(coupon_id: str, coupon_data: dict, current_user: dict = Depends(get_current_user)):
     if current_user["role"] not in ["admin", "super_admin"]:
@@ -919,109 +1074,230 @@ async def admin_delete_coupon(coupon_id: str, current_user: dict = Depends(get_c
     
     return {"success": True, "message": "Coupon deleted successfully"}
 
-# Trading API Routes
-@api_router.post("/trading/api-credentials", response_model=dict)
-async def set_trading_api_credentials(data: TradingAPICredentialsRequest, current_user: dict = Depends(get_current_user)):
-    # Update user with API credentials
-    await db.users.update_one(
-        {"id": current_user["id"]},
-        {"$set": {
-            "trading_api_key": data.api_key,
-            "trading_api_secret": data.api_secret,
-            "trading_exchange": data.exchange,
-            "updated_at": datetime.utcnow()
-        }}
-    )
+@api_router.get("/admin/dashboard/sales", response_model=dict)
+async def admin_sales_dashboard(days: int = 30, top_events: int = 10, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Access denied")
     
-    return {
-        "success": True,
-        "message": "Trading API credentials saved successfully"
-    }
+    # Read precomputed rollups only, never the tickets collection
+    days = max(1, min(days, 366))
+    top_events = max(1, min(top_events, 100))
+    return await get_sales_dashboard(analytics_db, days=days, top_events=top_events)
 
-@api_router.post("/trading/signals", response_model=dict)
-async def get_trading_signals(data: TradingSignalRequest, current_user: dict = Depends(get_current_user)):
-    signals = generate_trading_signals(data.symbol, data.interval, data.limit)
+@api_router.post("/admin/dashboard/sales/rebuild", response_model=dict)
+async def admin_rebuild_sales_rollups(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Access denied")
     
-    if signals is None:
-        raise HTTPException(status_code=400, detail="Failed to generate trading signals")
+    # Archived tickets still count towards sales, but the rebuild aggregates inside
+    # MongoDB and cannot read Parquet files; rebuilding would drop them from the totals
+    if not isinstance(archive_store, MongoColdStore):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Sales rollups cannot be rebuilt with ARCHIVE_STORE={ARCHIVE_STORE}: archived tickets would not be counted"
+        )
+    result = await rebuild_sales_rollups(db, archive_store.collection_name("tickets"))
     
-    return signals
+    return {"success": True, **result}
 
-@api_router.post("/trading/bots", response_model=dict)
-async def create_trading_bot(data: AutoTradeBotSettings, current_user: dict = Depends(get_current_user)):
-    # Check if user has trading API credentials
-    user = await db.users.find_one({"id": current_user["id"]})
-    if not user.get("trading_api_key") or not user.get("trading_api_secret"):
-        raise HTTPException(status_code=400, detail="Trading API credentials required")
+@api_router.get("/admin/archive", response_model=dict)
+async def admin_archive_status(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Access denied")
     
-    # Prepare bot settings
-    now = datetime.utcnow()
-    bot_dict = data.dict()
-    bot_dict.update({
-        "id": str(uuid.uuid4()),
-        "user_id": current_user["id"],
-        "created_at": now,
-        "updated_at": now
-    })
+    return {"store": ARCHIVE_STORE, "collections": await archiver.status()}
+
+@api_router.post("/admin/archive/run", response_model=dict)
+async def admin_run_archive(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Access denied")
     
-    # Insert into database
-    await db.trading_bots.insert_one(bot_dict)
+    # One bounded pass; whatever is left is picked up by the next one
+    moved = await archiver.archive()
+    if moved is None:
+        raise HTTPException(status_code=409, detail="Archival is already running")
     
-    return {
-        "success": True,
-        "bot_id": bot_dict["id"],
-        "message": "Trading bot created successfully"
-    }
+    return {"success": True, "moved": moved}
 
-@api_router.get("/trading/bots", response_model=List[AutoTradeBotSettings])
-async def get_user_trading_bots(current_user: dict = Depends(get_current_user)):
-    # Get all bots for current user
-    cursor = db.trading_bots.find({"user_id": current_user["id"]})
-    bots = await cursor.to_list(length=100)
+@api_router.post("/admin/import/{collection}", response_model=dict)
+async def admin_bulk_import(
+    collection: str,
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    mode: str = "insert",
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Access denied")
     
-    return bots
-
-@api_router.put("/trading/bots/{bot_id}/toggle", response_model=dict)
-async def toggle_trading_bot(bot_id: str, current_user: dict = Depends(get_current_user)):
-    # Check if bot exists and belongs to current user
-    bot = await db.trading_bots.find_one({
-        "id": bot_id,
-        "user_id": current_user["id"]
-    })
+    if collection not in BULK_COLLECTIONS:
+        raise HTTPException(status_code=404, detail="Collection not supported for import")
+    if mode not in ["insert", "upsert"]:
+        raise HTTPException(status_code=400, detail="Mode must be insert or upsert")
     
-    if not bot:
-        raise HTTPException(status_code=404, detail="Trading bot not found")
+    try:
+        fmt = detect_format(file.filename, format)
+    except BulkFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Toggle active status
-    new_status = not bot["active"]
+    model, key = BULK_COLLECTIONS[collection]
+    report = await import_documents(db[collection], model, file.file, fmt, key=key, mode=mode)
     
-    await db.trading_bots.update_one(
-        {"id": bot_id},
-        {"$set": {
-            "active": new_status,
-            "updated_at": datetime.utcnow()
-        }}
-    )
+    return {"success": report["error_count"] == 0, "collection": collection, **report}
+
+@api_router.get("/admin/export/{collection}")
+async def admin_bulk_export(collection: str, format: str = "csv", current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Access denied")
     
-    status_msg = "activated" if new_status else "deactivated"
+    if collection not in BULK_COLLECTIONS:
+        raise HTTPException(status_code=404, detail="Collection not supported for export")
     
-    return {
-        "success": True,
-        "active": new_status,
-        "message": f"Trading bot {status_msg} successfully"
-    }
+    try:
+        fmt = detect_format(None, format, allowed=EXPORT_FORMATS)
+    except BulkFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    model, _ = BULK_COLLECTIONS[collection]
+    cursor = analytics_db[collection].find({}, {"_id": 0}).batch_size(1000)
+    body, media_type, extension = export_stream(cursor, model, fmt)
+    
+    return StreamingResponse(body, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="{collection}.{extension}"'
+    })
+
+async def create_indexes():
+    await ensure_rollup_indexes(db)
+    await ensure_search_indexes(db)
+    await ensure_archive_indexes(db)
+    await archive_store.ensure_indexes()
+    await ensure_ttl_indexes(db)
+    # Coupon codes and ticket ids must be unique so bulk imports can skip per-row
+    # existence checks, and ticket upserts find their row through the index
+    await ensure_unique_index(db.coupons, "code")
+    await ensure_unique_index(db.tickets, "id")
+    await db.coupons.create_index("campaign_id", sparse=True)
+    await db.coupon_campaigns.create_index("id", unique=True)
+
+background_tasks = set()
+
+def start_background_tasks():
+    if METRICS_ENABLED:
+        task = asyncio.create_task(sample_event_loop_lag())
+        background_tasks.add(task)
+    if load_shedder is not None:
+        background_tasks.add(asyncio.create_task(load_shedder.monitor()))
+    if event_feed is not None:
+        background_tasks.add(asyncio.create_task(event_feed.run()))
+    # Optionally keep balances of active bot owners warm (0 disables)
+    if account_sync is not None and ACCOUNT_SYNC_INTERVAL > 0:
+        background_tasks.add(asyncio.create_task(account_sync.run(ACCOUNT_SYNC_INTERVAL)))
+    if ARCHIVE_INTERVAL > 0:
+        background_tasks.add(asyncio.create_task(archiver.run(ARCHIVE_INTERVAL)))
+    if LOOP_BLOCKING_DEBUG:
+        app.state.loop_blocking_detector = LoopBlockingDetector(
+            asyncio.get_running_loop(), threshold=LOOP_BLOCKING_THRESHOLD_MS / 1000
+        )
+        app.state.loop_blocking_detector.start()
+
+async def stop_background_tasks():
+    for task in background_tasks:
+        task.cancel()
+    # Let tasks finish their cleanup (e.g. the live feed's final checkpoint) before the client closes
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    if LOOP_BLOCKING_DEBUG:
+        app.state.loop_blocking_detector.stop()
 
-@api_router.get("/trading/history", response_model=List[TradeHistoryItem])
-async def get_trade_history(current_user: dict = Depends(get_current_user)):
-    # Get all trade history for current user
-    cursor = db.trade_history.find({"user_id": current_user["id"]})
-    history = await cursor.to_list(length=100)
+@api_router.get("/metrics", include_in_schema=False)
+async def get_metrics(credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))):
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
     
-    return history
+    # Scrapers authenticate with a static token when one is configured
+    if METRICS_TOKEN and (credentials is None or not secrets.compare_digest(credentials.credentials, METRICS_TOKEN)):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+# Trading routes are optional so ticket-only workers skip the trading stack entirely
+account_sync = None
+if TRADING_ENABLED:
+    from account_sync import AccountSync, ExchangeClient
+    from trading import create_trading_router
+    account_sync = AccountSync(
+        get_db,
+        ExchangeClient(os.environ.get("BINANCE_API_URL", "https://api.binance.com")),
+        ttl=float(os.environ.get("ACCOUNT_SYNC_TTL_SECONDS", "15")),
+        max_concurrency=int(os.environ.get("ACCOUNT_SYNC_MAX_CONCURRENCY", "8")),
+    )
+    api_router.include_router(create_trading_router(get_db, get_current_user, account_sync))
 
 # Add routers to the main app
 app.include_router(api_router)
-app.include_router(trading_router)
+
+event_feed = EventFeed(
+    get_db, debounce=LIVE_FEED_DEBOUNCE_MS / 1000, worker_id=LIVE_FEED_WORKER_ID,
+) if LIVE_FEED_ENABLED else None
+
+archive_store = ParquetColdStore(ARCHIVE_DIR) if ARCHIVE_STORE == "parquet" else MongoColdStore(get_db)
+archiver = Archiver(
+    get_db,
+    archive_store,
+    older_than=timedelta(days=ARCHIVE_AFTER_DAYS),
+    batch_size=int(os.environ.get("ARCHIVE_BATCH_SIZE", "500")),
+)
+
+# Rate limits and load shedding; added before CORS so rejections still carry CORS headers
+# CPU-bound handlers (password hashing, indicator maths): tightly limited, and shed first under load
+AUTH_PATHS = ("/api/auth/login", "/api/auth/register")
+SIGNAL_PATHS = ("/api/trading/signals",)
+# Server-sent event streams: long-lived and mostly idle
+STREAM_PATHS = ("/api/events/live",)
+rate_limiter = None
+load_shedder = None
+if RATE_LIMITING_ENABLED:
+    if not RATE_LIMIT_TRUSTED_PROXIES:
+        logging.warning(
+            "Rate limiting by socket peer address (RATE_LIMIT_TRUSTED_PROXIES=0); "
+            "behind a proxy or ingress every client shares one budget"
+        )
+    rate_limiter = RateLimiter([
+        RateLimitRule(
+            "auth", paths=AUTH_PATHS,
+            per_ip=parse_rate(os.environ.get("RATE_LIMIT_AUTH_PER_IP", "10/60")),
+        ),
+        RateLimitRule(
+            "trading_signals", paths=SIGNAL_PATHS,
+            per_ip=parse_rate(os.environ.get("RATE_LIMIT_SIGNALS_PER_IP", "60/60")),
+            per_user=parse_rate(os.environ.get("RATE_LIMIT_SIGNALS_PER_USER", "10/60")),
+        ),
+        RateLimitRule(
+            "api", prefix="/api/",
+            per_ip=parse_rate(os.environ.get("RATE_LIMIT_API_PER_IP", "1200/60")),
+            per_user=parse_rate(os.environ.get("RATE_LIMIT_API_PER_USER", "600/60")),
+        ),
+    ], store=MongoStore(get_db) if RATE_LIMIT_BACKEND == "mongo" else MemoryStore())
+if LOAD_SHEDDING_ENABLED:
+    load_shedder = LoadShedder(
+        lag_threshold=float(os.environ.get("SHED_LAG_THRESHOLD_MS", "100")) / 1000,
+        max_in_flight=int(os.environ.get("SHED_MAX_IN_FLIGHT", "256")),
+        max_threadpool_queue=int(os.environ.get("SHED_MAX_THREADPOOL_QUEUE", "32")),
+        shed_all_at=float(os.environ.get("SHED_ALL_AT_PRESSURE", "3")),
+    )
+if rate_limiter is not None or load_shedder is not None or LIVE_FEED_MAX_STREAMS_PER_CLIENT:
+    app.add_middleware(
+        ProtectionMiddleware,
+        limiter=rate_limiter,
+        shedder=load_shedder,
+        identify_user=user_id_from_scope,
+        trusted_proxies=RATE_LIMIT_TRUSTED_PROXIES,
+        exempt_paths=("/api/metrics",),
+        heavy_paths=AUTH_PATHS + SIGNAL_PATHS,
+        # Live feed connections are long-lived and idle; counting them as in flight would shed everything
+        stream_paths=STREAM_PATHS,
+        max_streams_per_client=LIVE_FEED_MAX_STREAMS_PER_CLIENT,
+    )
 
 # Add CORS middleware
 app.add_middleware(
@@ -1032,8 +1308,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files for frontend
-app.mount("/", StaticFiles(directory="frontend/build", html=True), name="static")
+# Record per-route latency and status codes
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, stream_paths=STREAM_PATHS)
+
+# Debug tooling: name the route in blocked-loop reports, profile single requests
+if LOOP_BLOCKING_DEBUG:
+    app.add_middleware(RequestTrackingMiddleware)
+if REQUEST_PROFILING_ENABLED:
+    app.add_middleware(RequestProfilingMiddleware, authorize=is_admin_request)
+
+# Mount static files for frontend (precompressed variants, long-lived caching for hashed assets)
+if os.path.isdir(FRONTEND_BUILD_DIR):
+    app.mount("/", FrontendStaticFiles(directory=FRONTEND_BUILD_DIR, html=True), name="static")
+else:
+    logging.warning(f"Frontend build directory {FRONTEND_BUILD_DIR} not found; serving the API only")
 
 # Root endpoint
 @app.get("/api")
@@ -0,0 +1,92 @@
+"""Static serving for the built React frontend.
+
+* Precompressed ``.br``/``.gz`` siblings written at build time
+  (``frontend/scripts/compress-build.js``) are served when the client accepts
+  them, so workers never compress or re-read the uncompressed bytes.
+* Content-hashed assets (``main.3f2a9c1b.js``) are cached for a year as
+  ``immutable``; everything else, notably ``index.html``, is ``no-cache`` and
+  revalidated with the ETag/Last-Modified headers ``FileResponse`` sets.
+* ``FileResponse`` hands the path to the server via the ASGI ``pathsend``
+  extension when the server offers it (zero-copy sendfile), and streams the
+  file in chunks otherwise.
+"""
+import os
+import re
+import stat
+from mimetypes import guess_type
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+# Content-Encoding -> file suffix, in server preference order
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+# CRA emits e.g. static/js/main.3f2a9c1b.js and static/js/453.6b1c2f0e.chunk.js
+HASHED_ASSET = re.compile(r"\.[0-9a-f]{8,}\.(?:chunk\.)?[A-Za-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Codings the client accepts, honouring ``;q=0`` exclusions"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    if "*" in accepted:
+        accepted.update(coding for coding, _ in PRECOMPRESSED)
+    return accepted
+
+
+def cache_control(path: str) -> str:
+    return IMMUTABLE if HASHED_ASSET.search(path) else REVALIDATE
+
+
+class FrontendStaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        headers = {"cache-control": cache_control(full_path), "vary": "Accept-Encoding"}
+        served_path, served_stat = full_path, stat_result
+
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        for coding, suffix in PRECOMPRESSED:
+            if coding not in accepted:
+                continue
+            variant = self.variant(full_path + suffix, stat_result)
+            if variant is not None:
+                served_path, served_stat = full_path + suffix, variant
+                headers["content-encoding"] = coding
+                break
+
+        # Each variant has its own size/mtime and therefore its own ETag
+        response = FileResponse(
+            served_path,
+            status_code=status_code,
+            stat_result=served_stat,
+            headers=headers,
+            media_type=guess_type(full_path)[0] or "text/plain",
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    @staticmethod
+    def variant(path: str, original: os.stat_result):
+        """Stat a precompressed sibling, ignoring it if older than the original"""
+        try:
+            variant = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(variant.st_mode) or variant.st_mtime < original.st_mtime:
+            return None
+        return variant
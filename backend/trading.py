@@ -0,0 +1,197 @@
+"""Trading routes, mounted under /api/trading unless ENABLE_TRADING is off.
+
+Importing this module is cheap: the indicator and charting stack in
+``trading_signals`` is only loaded the first time signals are generated.
+"""
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from account_sync import ExchangeError, position_size
+
+class TradingAPICredentialsRequest(BaseModel):
+    api_key: str
+    api_secret: str
+    exchange: str = "binance"
+
+class TradingSignalRequest(BaseModel):
+    symbol: str
+    interval: str = "1h"
+    limit: int = 100
+
+class AutoTradeBotSettings(BaseModel):
+    id: Optional[str] = None
+    user_id: str
+    symbol: str
+    base_asset: str
+    quote_asset: str
+    strategy: str  # rsi, macd, bollinger, combined
+    risk_level: str  # low, medium, high
+    trade_amount_percentage: float  # percentage of available balance
+    max_trades_per_day: int
+    take_profit_percentage: float
+    stop_loss_percentage: float
+    active: bool = False
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class TradeHistoryItem(BaseModel):
+    id: Optional[str] = None
+    user_id: str
+    bot_id: str
+    symbol: str
+    action: str  # buy, sell
+    quantity: float
+    price: float
+    total: float
+    status: str  # pending, completed, failed
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+def _generate_signals(symbol, interval, limit):
+    """Import the signal stack lazily so ticket-only workers never load it"""
+    from trading_signals import generate_trading_signals
+    return generate_trading_signals(symbol, interval, limit)
+
+
+def create_trading_router(get_db, get_current_user, account_sync) -> APIRouter:
+    """Build the trading router around the app's database, auth and account sync"""
+    router = APIRouter(prefix="/trading")
+
+    async def load_balances(user: dict, refresh: bool = False) -> dict:
+        if not user.get("trading_api_key") or not user.get("trading_api_secret"):
+            raise HTTPException(status_code=400, detail="Trading API credentials required")
+        try:
+            return await account_sync.get_balances(user, refresh=refresh)
+        except ExchangeError as e:
+            raise HTTPException(status_code=502, detail=str(e))
+
+    @router.post("/api-credentials", response_model=dict)
+    async def set_trading_api_credentials(data: TradingAPICredentialsRequest, current_user: dict = Depends(get_current_user), db=Depends(get_db)):
+        # Update user with API credentials
+        await db.users.update_one(
+            {"id": current_user["id"]},
+            {"$set": {
+                "trading_api_key": data.api_key,
+                "trading_api_secret": data.api_secret,
+                "trading_exchange": data.exchange,
+                "updated_at": datetime.utcnow()
+            }}
+        )
+        # Balances cached under the old key belong to another account
+        account_sync.invalidate(current_user["id"])
+
+        return {
+            "success": True,
+            "message": "Trading API credentials saved successfully"
+        }
+
+    @router.get("/balances", response_model=dict)
+    async def get_trading_balances(refresh: bool = False, current_user: dict = Depends(get_current_user)):
+        # Served from the short-lived cache unless a refresh is requested
+        balances = await load_balances(current_user, refresh=refresh)
+
+        return {"balances": balances}
+
+    @router.post("/signals", response_model=dict)
+    async def get_trading_signals(data: TradingSignalRequest, current_user: dict = Depends(get_current_user)):
+        # pandas/matplotlib are imported on first use, and the work runs off the event loop
+        signals = await run_in_threadpool(_generate_signals, data.symbol, data.interval, data.limit)
+
+        if signals is None:
+            raise HTTPException(status_code=400, detail="Failed to generate trading signals")
+
+        return signals
+
+    @router.post("/bots", response_model=dict)
+    async def create_trading_bot(data: AutoTradeBotSettings, current_user: dict = Depends(get_current_user), db=Depends(get_db)):
+        # Check if user has trading API credentials
+        user = await db.users.find_one({"id": current_user["id"]})
+        if not user.get("trading_api_key") or not user.get("trading_api_secret"):
+            raise HTTPException(status_code=400, detail="Trading API credentials required")
+
+        # Prepare bot settings
+        now = datetime.utcnow()
+        bot_dict = data.dict()
+        bot_dict.update({
+            "id": str(uuid.uuid4()),
+            "user_id": current_user["id"],
+            "created_at": now,
+            "updated_at": now
+        })
+
+        # Insert into database
+        await db.trading_bots.insert_one(bot_dict)
+
+        return {
+            "success": True,
+            "bot_id": bot_dict["id"],
+            "message": "Trading bot created successfully"
+        }
+
+    @router.get("/bots", response_model=List[AutoTradeBotSettings])
+    async def get_user_trading_bots(current_user: dict = Depends(get_current_user), db=Depends(get_db)):
+        # Get all bots for current user
+        cursor = db.trading_bots.find({"user_id": current_user["id"]})
+        bots = await cursor.to_list(length=100)
+
+        return bots
+
+    @router.put("/bots/{bot_id}/toggle", response_model=dict)
+    async def toggle_trading_bot(bot_id: str, current_user: dict = Depends(get_current_user), db=Depends(get_db)):
+        # Check if bot exists and belongs to current user
+        bot = await db.trading_bots.find_one({
+            "id": bot_id,
+            "user_id": current_user["id"]
+        })
+
+        if not bot:
+            raise HTTPException(status_code=404, detail="Trading bot not found")
+
+        # Toggle active status
+        new_status = not bot["active"]
+
+        await db.trading_bots.update_one(
+            {"id": bot_id},
+            {"$set": {
+                "active": new_status,
+                "updated_at": datetime.utcnow()
+            }}
+        )
+
+        status_msg = "activated" if new_status else "deactivated"
+
+        return {
+            "success": True,
+            "active": new_status,
+            "message": f"Trading bot {status_msg} successfully"
+        }
+
+    @router.get("/bots/{bot_id}/position-size", response_model=dict)
+    async def get_bot_position_size(bot_id: str, current_user: dict = Depends(get_current_user), db=Depends(get_db)):
+        bot = await db.trading_bots.find_one({
+            "id": bot_id,
+            "user_id": current_user["id"]
+        })
+
+        if not bot:
+            raise HTTPException(status_code=404, detail="Trading bot not found")
+
+        balances = await load_balances(current_user)
+
+        return {"bot_id": bot_id, **position_size(balances, bot["quote_asset"], bot["trade_amount_percentage"])}
+
+    @router.get("/history", response_model=List[TradeHistoryItem])
+    async def get_trade_history(current_user: dict = Depends(get_current_user), db=Depends(get_db)):
+        # Get all trade history for current user
+        cursor = db.trade_history.find({"user_id": current_user["id"]})
+        history = await cursor.to_list(length=100)
+
+        return history
+
+    return router
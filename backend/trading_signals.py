@@ -0,0 +1,165 @@
+"""Market data, signal rules and chart rendering for trading signals.
+
+Indicator math lives in ``indicators.py``; ``INDICATOR_BACKEND`` picks the
+implementation.
+
+This module pulls in pandas and matplotlib, so it is only imported the first
+time signals are requested (see ``trading.py``).
+"""
+import base64
+import logging
+import os
+from datetime import datetime
+from io import BytesIO
+
+import matplotlib
+matplotlib.use("Agg")
+import pandas as pd
+import requests
+from matplotlib.figure import Figure
+
+from indicators import get_backend
+
+# Overridable so benchmarks and tests can point at a local stand-in
+BINANCE_API_URL = os.environ.get("BINANCE_API_URL", "https://api.binance.com")
+# numpy, pandas or talib (see indicators.py)
+indicators = get_backend(os.environ.get("INDICATOR_BACKEND", "numpy"))
+
+def get_candles(symbol, interval='1h', limit=100):
+    """Get candlestick data from Binance"""
+    url = f"{BINANCE_API_URL}/api/v3/klines"
+    params = {
+        'symbol': symbol,
+        'interval': interval,
+        'limit': limit
+    }
+    
+    try:
+        response = requests.get(url, params=params)
+        response.raise_for_status()
+        candles = response.json()
+        
+        # Convert to pandas DataFrame
+        df = pd.DataFrame(candles, columns=[
+            'open_time', 'open', 'high', 'low', 'close', 'volume',
+            'close_time', 'quote_asset_volume', 'number_of_trades',
+            'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
+        ])
+        
+        # Convert types
+        df['open_time'] = pd.to_datetime(df['open_time'], unit='ms')
+        df['close_time'] = pd.to_datetime(df['close_time'], unit='ms')
+        numeric_cols = ['open', 'high', 'low', 'close', 'volume']
+        df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric)
+        
+        return df
+    except Exception as e:
+        logging.error(f"Error fetching candles: {e}")
+        return None
+
+def generate_trading_signals(symbol, interval='1h', limit=100):
+    """Generate trading signals based on multiple indicators"""
+    df = get_candles(symbol, interval, limit)
+    if df is None:
+        return None
+    
+    # Calculate indicators
+    close = df['close'].to_numpy()
+    df['rsi'] = indicators.rsi(close)
+    df['macd'], df['signal'], df['histogram'] = indicators.macd(close)
+    df['upper_band'], df['middle_band'], df['lower_band'] = indicators.bollinger_bands(close)
+    
+    # Generate signals
+    signals = []
+    
+    # Latest data point
+    latest = df.iloc[-1]
+    
+    # RSI signals
+    if latest['rsi'] < 30:
+        signals.append({
+            'indicator': 'RSI',
+            'signal': 'BUY',
+            'strength': 'STRONG',
+            'value': latest['rsi']
+        })
+    elif latest['rsi'] > 70:
+        signals.append({
+            'indicator': 'RSI',
+            'signal': 'SELL',
+            'strength': 'STRONG',
+            'value': latest['rsi']
+        })
+    
+    # MACD signals
+    if latest['macd'] > latest['signal'] and df.iloc[-2]['macd'] <= df.iloc[-2]['signal']:
+        signals.append({
+            'indicator': 'MACD',
+            'signal': 'BUY',
+            'strength': 'MEDIUM',
+            'value': latest['macd']
+        })
+    elif latest['macd'] < latest['signal'] and df.iloc[-2]['macd'] >= df.iloc[-2]['signal']:
+        signals.append({
+            'indicator': 'MACD',
+            'signal': 'SELL',
+            'strength': 'MEDIUM',
+            'value': latest['macd']
+        })
+    
+    # Bollinger Bands signals
+    if latest['close'] < latest['lower_band']:
+        signals.append({
+            'indicator': 'BOLLINGER',
+            'signal': 'BUY',
+            'strength': 'MEDIUM',
+            'value': f"Close: {latest['close']}, Lower: {latest['lower_band']}"
+        })
+    elif latest['close'] > latest['upper_band']:
+        signals.append({
+            'indicator': 'BOLLINGER',
+            'signal': 'SELL',
+            'strength': 'MEDIUM',
+            'value': f"Close: {latest['close']}, Upper: {latest['upper_band']}"
+        })
+    
+    # Generate chart (Figure API rather than pyplot, which is not thread-safe)
+    chart_buffer = BytesIO()
+    fig = Figure(figsize=(10, 12))
+    
+    # Price and Bollinger Bands
+    ax = fig.add_subplot(3, 1, 1)
+    ax.plot(df['close_time'], df['close'], label='Close Price')
+    ax.plot(df['close_time'], df['upper_band'], 'r--', label='Upper BB')
+    ax.plot(df['close_time'], df['middle_band'], 'g--', label='Middle BB')
+    ax.plot(df['close_time'], df['lower_band'], 'r--', label='Lower BB')
+    ax.set_title(f"{symbol} Price with Bollinger Bands")
+    ax.legend()
+    
+    # RSI
+    ax = fig.add_subplot(3, 1, 2)
+    ax.plot(df['close_time'], df['rsi'])
+    ax.axhline(y=70, color='r', linestyle='-')
+    ax.axhline(y=30, color='g', linestyle='-')
+    ax.set_title('RSI')
+    
+    # MACD
+    ax = fig.add_subplot(3, 1, 3)
+    ax.plot(df['close_time'], df['macd'], label='MACD')
+    ax.plot(df['close_time'], df['signal'], label='Signal')
+    ax.bar(df['close_time'], df['histogram'], width=0.01, label='Histogram')
+    ax.set_title('MACD')
+    ax.legend()
+    
+    fig.tight_layout()
+    fig.savefig(chart_buffer, format='png')
+    chart_buffer.seek(0)
+    chart_base64 = base64.b64encode(chart_buffer.getvalue()).decode('utf-8')
+    
+    return {
+        'signals': signals,
+        'chart': chart_base64,
+        'timestamp': datetime.utcnow().isoformat(),
+        'symbol': symbol,
+        'interval': interval
+    }
@@ -0,0 +1,64 @@
+// Write .br and .gz siblings for compressible files in the build folder so the
+// backend can serve them as-is (see backend/static_files.py).
+// Runs automatically after `yarn build`; usage: node scripts/compress-build.js [dir]
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+
+const COMPRESSIBLE = /\.(html|js|mjs|css|json|map|svg|txt|xml|ico|webmanifest)$/;
+// Below this size the compressed response is rarely worth the extra file
+const MIN_BYTES = 1024;
+
+function* walk(dir) {
+  for (const entry of fs.readdirSync(dir, { withFileTypes: true })) {
+    const fullPath = path.join(dir, entry.name);
+    if (entry.isDirectory()) {
+      yield* walk(fullPath);
+    } else if (entry.isFile()) {
+      yield fullPath;
+    }
+  }
+}
+
+function compressFile(file) {
+  const source = fs.readFileSync(file);
+  const variants = {
+    '.br': zlib.brotliCompressSync(source, {
+      params: {
+        [zlib.constants.BROTLI_PARAM_MODE]: zlib.constants.BROTLI_MODE_TEXT,
+        [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY,
+        [zlib.constants.BROTLI_PARAM_SIZE_HINT]: source.length,
+      },
+    }),
+    '.gz': zlib.gzipSync(source, { level: zlib.constants.Z_BEST_COMPRESSION }),
+  };
+  const written = {};
+  for (const [suffix, data] of Object.entries(variants)) {
+    // Only keep a variant that actually saves bytes
+    if (data.length < source.length) {
+      fs.writeFileSync(file + suffix, data);
+      written[suffix] = data.length;
+    }
+  }
+  return { original: source.length, written };
+}
+
+function main() {
+  const buildDir = path.resolve(process.argv[2] || 'build');
+  let files = 0;
+  let original = 0;
+  let brotli = 0;
+  for (const file of walk(buildDir)) {
+    if (!COMPRESSIBLE.test(file) || fs.statSync(file).size < MIN_BYTES) {
+      continue;
+    }
+    const result = compressFile(file);
+    files += 1;
+    original += result.original;
+    brotli += result.written['.br'] || result.original;
+  }
+  const kib = (bytes) => `${(bytes / 1024).toFixed(1)} KiB`;
+  console.log(`Precompressed ${files} files in ${buildDir}: ${kib(original)} -> ${kib(brotli)} brotli`);
+}
+
+main();
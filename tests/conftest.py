@@ -0,0 +1,56 @@
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Backend modules import each other as top-level modules (see backend/server.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture(scope="session")
+def server():
+    """The app module, imported without connecting to MongoDB or starting background tasks"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "ticket_manager_test")
+    os.environ.setdefault("ENABLE_RATE_LIMITING", "0")
+    os.environ.setdefault("ENABLE_LOAD_SHEDDING", "0")
+    os.environ.setdefault("ENABLE_LIVE_FEED", "0")
+    os.environ.setdefault("JWT_SECRET", "test-secret-that-is-long-enough-for-hs256")
+    import server
+    return server
+
+
+@pytest.fixture
+def db(server):
+    """A fresh in-memory database behind every routed handle"""
+    from mongomock_motor import AsyncMongoMockClient
+
+    database = AsyncMongoMockClient()[f"test_{uuid.uuid4().hex}"]
+    server.db = server.catalog_db = server.analytics_db = server.purchase_db = database
+    return database
+
+
+@pytest.fixture
+def client(server, db):
+    from starlette.testclient import TestClient
+
+    return TestClient(server.app)
+
+
+@pytest.fixture
+def make_user(server, db):
+    """Insert a user and return (user, Authorization headers)"""
+    def make(role="user", **fields):
+        import asyncio
+
+        user = {
+            "id": str(uuid.uuid4()), "first_name": "Test", "last_name": "User",
+            "email": f"{uuid.uuid4().hex[:8]}@example.com", "password": "x", "role": role,
+            "ieee_member": False, "ieee_verified": False, **fields,
+        }
+        asyncio.run(db.users.insert_one(dict(user)))
+        token = server.create_access_token(data={"sub": user["id"]})
+        return user, {"Authorization": f"Bearer {token}"}
+    return make
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from account_sync import AccountSync, ExchangeClient, ExchangeError
+from benchmarks.stubs import ExchangeStub
+
+ACCOUNTS = {"key-1": ("secret-1", {"USDT": (1001.0, 5.0), "BTC": (0.01, 0.0), "ETH": (0.0, 0.0)})}
+USER = {"id": "user-1", "trading_api_key": "key-1", "trading_api_secret": "secret-1"}
+BALANCES = {"USDT": {"free": 1001.0, "locked": 5.0}, "BTC": {"free": 0.01, "locked": 0.0}}
+
+
+def with_sync(test, latency: float = 0.0, **options):
+    """Run ``test(sync, exchange)`` against a fresh stub exchange"""
+    with ExchangeStub(ACCOUNTS, latency=latency) as exchange:
+        async def run():
+            sync = AccountSync(lambda: None, ExchangeClient(exchange.url), **options)
+            try:
+                return await test(sync, exchange)
+            finally:
+                await sync.close()
+
+        return asyncio.run(run())
+
+
+def test_requests_are_signed_and_timestamped():
+    async def test(sync, exchange):
+        assert await sync.get_balances(USER) == BALANCES
+        query = exchange.last_query
+        assert query["recvWindow"] == ["5000"]
+        assert abs(int(query["timestamp"][0]) - time.time() * 1000) < 5000
+        assert len(query["signature"][0]) == 64
+
+    with_sync(test)
+
+
+def test_stale_timestamp_is_rejected(monkeypatch):
+    import account_sync
+
+    # A client clock running a minute behind the exchange's
+    monkeypatch.setattr(account_sync, "time", SimpleNamespace(time=lambda: time.time() - 60, monotonic=time.monotonic))
+
+    async def test(sync, exchange):
+        with pytest.raises(ExchangeError, match="recvWindow") as error:
+            await sync.get_balances(USER)
+        assert error.value.status_code == 400
+
+    with_sync(test)
+
+
+def test_cached_balances_skip_the_exchange_until_the_ttl_passes():
+    async def test(sync, exchange):
+        await sync.get_balances(USER)
+        for _ in range(5):
+            assert await sync.get_balances(USER) == BALANCES
+        assert exchange.requests == 1
+        assert await sync.get_balances(USER, refresh=True) == BALANCES
+        return exchange.requests
+
+    assert with_sync(test, ttl=60) == 2
+
+    async def expired(sync, exchange):
+        await sync.get_balances(USER)
+        await sync.get_balances(USER)
+        return exchange.requests
+
+    assert with_sync(expired, ttl=0) == 2
+
+
+def test_concurrent_readers_share_one_request():
+    async def test(sync, exchange):
+        results = await asyncio.gather(*(sync.get_balances(USER) for _ in range(10)))
+        assert all(result == BALANCES for result in results)
+        return exchange.requests
+
+    assert with_sync(test, latency=0.05, ttl=60) == 1
+
+
+def test_invalidate_forces_a_refetch():
+    async def test(sync, exchange):
+        await sync.get_balances(USER)
+        sync.invalidate(USER["id"])
+        assert sync.cached(USER["id"]) is None
+        await asyncio.gather(*(sync.get_balances(USER) for _ in range(5)))
+        return exchange.requests
+
+    assert with_sync(test, latency=0.02, ttl=60) == 2
+
+
+@pytest.mark.parametrize("user, status_code, message", [
+    ({**USER, "trading_api_secret": "wrong"}, 400, "Signature"),
+    ({**USER, "trading_api_key": "unknown"}, 401, "Invalid API-key"),
+])
+def test_exchange_errors_are_raised_to_every_reader_and_not_cached(user, status_code, message):
+    async def test(sync, exchange):
+        results = await asyncio.gather(*(sync.get_balances(user) for _ in range(3)), return_exceptions=True)
+        assert exchange.requests == 1
+        for result in results:
+            assert isinstance(result, ExchangeError)
+            assert result.status_code == status_code
+            assert message in str(result)
+        assert sync.cached(user["id"]) is None
+
+    with_sync(test, latency=0.02, ttl=60)
+
+
+def test_unreachable_exchange_raises_exchange_error():
+    async def run():
+        with ExchangeStub(ACCOUNTS) as exchange:
+            url = exchange.url
+        sync = AccountSync(lambda: None, ExchangeClient(url, timeout=1.0))
+        try:
+            await sync.get_balances(USER)
+        finally:
+            await sync.close()
+
+    with pytest.raises(ExchangeError, match="Exchange request failed") as error:
+        asyncio.run(run())
+    assert error.value.status_code is None
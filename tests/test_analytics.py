@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime
+
+import dotenv
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from analytics import get_sales_dashboard, main, rebuild_sales_rollups, record_sale
+
+
+def ticket(event_id, ticket_type="regular", quantity=1, total=20.0, discount=0.0, day=1):
+    return {
+        "event_id": event_id, "ticket_type": ticket_type, "quantity": quantity,
+        "total_amount": total, "discount_amount": discount, "created_at": datetime(2026, 3, day, 12),
+    }
+
+
+SALES = [
+    ticket("e1", quantity=2, total=40.0),
+    ticket("e1", ticket_type="ieee", total=15.0, discount=5.0, day=2),
+    ticket("e2", ticket_type="vip", total=100.0, day=2),
+]
+
+
+def test_totals_are_summed_from_daily_rollups():
+    async def run():
+        db = AsyncMongoMockClient()["analytics"]
+        for sale in SALES:
+            await record_sale(db, sale)
+        dashboard = await get_sales_dashboard(db)
+        assert "sales_totals" not in await db.list_collection_names()
+        return dashboard
+
+    totals = asyncio.run(run())["totals"]
+    assert totals["orders"] == 3
+    assert totals["tickets_sold"] == 4
+    assert totals["gross_amount"] == 155.0
+    assert totals["net_amount"] == 150.0
+    assert totals["coupon_redemptions"] == 1
+    assert totals["tickets_by_type"] == {"regular": 2, "ieee": 1, "other": 1}
+
+
+def test_empty_dashboard():
+    totals = asyncio.run(get_sales_dashboard(AsyncMongoMockClient()["analytics"]))["totals"]
+    assert totals["orders"] == 0
+    assert totals["net_amount"] == 0
+
+
+def test_rebuild_matches_incremental_rollups_and_keeps_unique_indexes():
+    async def run():
+        db = AsyncMongoMockClient()["analytics"]
+        for sale in SALES:
+            await record_sale(db, sale)
+            await db.tickets.insert_one(dict(sale))
+        incremental = await get_sales_dashboard(db)
+        await rebuild_sales_rollups(db)
+        rebuilt = await get_sales_dashboard(db)
+        indexes = await db.sales_by_day.index_information()
+        return incremental, rebuilt, indexes
+
+    incremental, rebuilt, indexes = asyncio.run(run())
+    assert rebuilt["totals"] == incremental["totals"]
+    assert [day["date"] for day in rebuilt["daily"]] == ["2026-03-01", "2026-03-02"]
+    assert any(index.get("unique") for index in indexes.values())
+
+
+def test_cli_rebuild_is_refused_when_backend_env_selects_parquet(monkeypatch):
+    # ARCHIVE_STORE only set in backend/.env, the way the server is usually configured
+    monkeypatch.delenv("ARCHIVE_STORE", raising=False)
+    monkeypatch.setattr(dotenv, "load_dotenv", lambda path: monkeypatch.setenv("ARCHIVE_STORE", "parquet"))
+
+    with pytest.raises(SystemExit, match="ARCHIVE_STORE=parquet"):
+        main(["rebuild"])
@@ -0,0 +1,42 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from archival import Archiver, MongoColdStore, ParquetColdStore
+
+
+def test_rollup_rebuild_is_refused_with_the_parquet_store(server, client, make_user, monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "archive_store", ParquetColdStore(str(tmp_path)))
+    monkeypatch.setattr(server, "ARCHIVE_STORE", "parquet")
+    _, headers = make_user(role="admin")
+
+    response = client.post("/api/admin/dashboard/sales/rebuild", headers=headers)
+    assert response.status_code == 409
+    assert "ARCHIVE_STORE=parquet" in response.json()["detail"]
+
+
+def test_pass_stops_when_the_lease_is_lost_between_ticket_batches():
+    from mongomock_motor import AsyncMongoMockClient
+
+    db = AsyncMongoMockClient()["archival"]
+    ended = datetime.utcnow() - timedelta(days=90)
+    archiver = Archiver(lambda: db, MongoColdStore(lambda: db), batch_size=2)
+    calls = []
+
+    async def acquire_lease():
+        # The pass starts with the lease; the first renewal finds another worker holding it
+        calls.append("acquire")
+        return len(calls) == 1
+
+    archiver.acquire_lease = acquire_lease
+
+    async def run():
+        await db.events.insert_one({"id": "e1", "status": "completed", "end_date": ended})
+        await db.tickets.insert_many([{"id": f"t{i}", "event_id": "e1"} for i in range(5)])
+        moved = await archiver.archive()
+        return moved, await db.events.count_documents({}), await db.tickets.count_documents({})
+
+    moved, hot_events, hot_tickets = asyncio.run(run())
+    assert moved == {"events": 0, "tickets": 2, "trade_history": 0}
+    # The event stays hot with its remaining tickets, for the next pass to finish
+    assert (hot_events, hot_tickets) == (1, 3)
+    assert len(calls) == 2
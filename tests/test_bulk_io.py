@@ -0,0 +1,87 @@
+import asyncio
+import io
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+from bulk_io import _iter_raw_rows, import_documents
+
+
+class Coupon(BaseModel):
+    id: Optional[str] = None
+    code: str
+    discount_percentage: float
+    used_count: int = 0
+    active: bool = True
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+def coupons():
+    """An in-memory coupons collection with the unique code index the app creates"""
+    from mongomock_motor import AsyncMongoMockClient
+
+    collection = AsyncMongoMockClient()["bulk"].coupons
+    asyncio.run(collection.create_index("code", unique=True))
+    return collection
+
+
+def upload(collection, text: str, fmt: str = "csv", **options) -> dict:
+    binary_file = io.BytesIO(text.encode())
+    return asyncio.run(import_documents(collection, Coupon, binary_file, fmt, key="code", **options))
+
+
+def test_csv_rows_drop_empty_cells_and_the_byte_order_mark():
+    rows = list(_iter_raw_rows(io.BytesIO("﻿code,discount_percentage,active\nA,10,\nB,,false\n".encode()), "csv"))
+    assert rows == [(1, {"code": "A", "discount_percentage": "10"}), (2, {"code": "B", "active": "false"})]
+
+
+def test_ndjson_rows_keep_their_line_numbers():
+    text = b'{"code": "A"}\n\n{"code": \n["B"]\n{"code": "C"}\n'
+    rows = list(_iter_raw_rows(io.BytesIO(text), "ndjson"))
+    assert [row_number for row_number, _ in rows] == [1, 3, 4, 5]
+    assert rows[0][1] == {"code": "A"} and rows[3][1] == {"code": "C"}
+    assert str(rows[1][1]).startswith("Invalid JSON")
+    assert str(rows[2][1]) == "Each line must be a JSON object"
+
+
+def test_duplicate_codes_within_one_file_are_reported_on_the_later_row():
+    collection = coupons()
+    report = upload(collection, "code,discount_percentage\nA,10\nB,20\nA,30\n")
+
+    assert (report["inserted"], report["error_count"]) == (2, 1)
+    assert report["errors"] == [{"row": 3, "errors": [{"loc": ["code"], "msg": "Duplicate code"}]}]
+    assert asyncio.run(collection.find_one({"code": "A"}))["discount_percentage"] == 10.0
+
+
+def test_errors_are_reported_in_row_order():
+    collection = coupons()
+    upload(collection, "code,discount_percentage\nA,10\n")
+    # Row 2 fails validation before row 1's duplicate key is known from the write
+    report = upload(collection, "code,discount_percentage\nA,10\nB,ten\nC,5\nC,5\n", chunk_size=3)
+
+    assert [error["row"] for error in report["errors"]] == [1, 2, 4]
+    assert report["errors"][1]["errors"][0]["loc"] == ["discount_percentage"]
+    assert (report["processed"], report["inserted"]) == (4, 1)
+
+
+def test_upsert_updates_provided_fields_and_keeps_id_and_creation_time():
+    collection = coupons()
+    upload(collection, "code,discount_percentage\nA,10\n")
+    asyncio.run(collection.update_one({"code": "A"}, {"$set": {"used_count": 3}}))
+    before = asyncio.run(collection.find_one({"code": "A"}))
+
+    report = upload(collection, '{"code": "A", "discount_percentage": 25}\n{"code": "B", "discount_percentage": 5}\n',
+                    fmt="ndjson", mode="upsert")
+    after = asyncio.run(collection.find_one({"code": "A"}))
+    inserted = asyncio.run(collection.find_one({"code": "B"}))
+
+    assert (report["upserted"], report["modified"], report["error_count"]) == (1, 1, 0)
+    assert after["discount_percentage"] == 25.0
+    assert (after["id"], after["created_at"]) == (before["id"], before["created_at"])
+    # Fields the row left out keep their stored values rather than the model defaults
+    assert (after["used_count"], after["active"]) == (3, True)
+    assert after["updated_at"] >= before["updated_at"]
+    # New rows get every default, a fresh id and a creation time on insert
+    assert inserted["id"] and inserted["created_at"] and inserted["used_count"] == 0
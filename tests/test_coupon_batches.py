@@ -0,0 +1,86 @@
+import asyncio
+import random
+
+import pytest
+
+import coupon_batches
+from coupon_batches import DEFAULT_ALPHABET, CouponBatchError, create_coupon_batch, validate_code_space
+
+TEMPLATE = {"campaign_id": "spring", "discount_percentage": 15.0, "max_uses": 1, "used_count": 0, "active": True}
+
+
+def coupons(*existing: str):
+    """An in-memory coupons collection with the unique code index and some codes already taken"""
+    from mongomock_motor import AsyncMongoMockClient
+
+    collection = AsyncMongoMockClient()["campaigns"].coupons
+
+    async def setup():
+        await collection.create_index("code", unique=True)
+        if existing:
+            await collection.insert_many([{"code": code, "campaign_id": "old"} for code in existing])
+
+    asyncio.run(setup())
+    return collection
+
+
+def campaign_codes(collection) -> list:
+    cursor = collection.find({"campaign_id": "spring"}, {"_id": 0, "code": 1})
+    return [doc["code"] for doc in asyncio.run(cursor.to_list(length=None))]
+
+
+def test_only_colliding_codes_are_regenerated(monkeypatch):
+    collection = coupons("AAAA", "BBBB")
+    batches = iter([["AAAA", "CCCC", "BBBB", "DDDD"], ["EEEE", "BBBB"], ["FFFF"]])
+    requested = []
+
+    def generate_codes(count, length, alphabet, prefix=""):
+        requested.append(count)
+        return next(batches)
+
+    monkeypatch.setattr(coupon_batches, "generate_codes", generate_codes)
+    result = asyncio.run(create_coupon_batch(collection, TEMPLATE, 4, 4, DEFAULT_ALPHABET))
+
+    assert requested == [4, 2, 1]
+    assert (result["generated"], result["collisions"]) == (4, 3)
+    assert sorted(campaign_codes(collection)) == ["CCCC", "DDDD", "EEEE", "FFFF"]
+
+
+def test_seeded_generator_in_a_crowded_space_still_yields_the_exact_count(monkeypatch):
+    # 2^8 = 256 possible codes with 52 taken, so chunks keep colliding
+    rng = random.Random(1234)
+    taken = {"".join(rng.choice("XY") for _ in range(8)) for _ in range(60)}
+    collection = coupons(*taken)
+    monkeypatch.setattr(coupon_batches, "secrets", random.Random(42))
+
+    result = asyncio.run(create_coupon_batch(collection, TEMPLATE, 30, 8, "XY", chunk_size=7))
+    codes = campaign_codes(collection)
+
+    assert result["generated"] == len(codes) == 30
+    assert result["collisions"] > 0
+    assert len(taken) == 52
+    assert len(set(codes)) == 30
+    assert not set(codes) & taken
+
+
+def test_running_out_of_codes_raises_instead_of_looping(monkeypatch):
+    collection = coupons("XX", "XY", "YX")
+    monkeypatch.setattr(coupon_batches, "secrets", random.Random(7))
+    with pytest.raises(CouponBatchError, match="unique codes"):
+        asyncio.run(create_coupon_batch(collection, TEMPLATE, 2, 2, "XY"))
+
+
+@pytest.mark.parametrize("count, length, alphabet, message", [
+    # 32^4 is about a million codes, below the 1000x margin for 5000 codes
+    (5000, 4, DEFAULT_ALPHABET, "too short"),
+    (1, 8, "AAB", "no duplicates"),
+    (1, 8, "A", "at least two"),
+    (1, 8, "AB-", "letters and digits"),
+])
+def test_code_space_is_rejected(count, length, alphabet, message):
+    with pytest.raises(CouponBatchError, match=message):
+        validate_code_space(count, length, alphabet)
+
+
+def test_code_space_with_the_margin_is_accepted():
+    validate_code_space(1000, 4, DEFAULT_ALPHABET)
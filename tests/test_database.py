@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from database import TRANSIENT_COLLECTIONS, IndexMigrationError, ensure_ttl_indexes, ensure_unique_index
+
+
+def test_unique_index_on_clean_collection():
+    async def run():
+        coupons = AsyncMongoMockClient()["database"].coupons
+        await coupons.insert_many([{"code": "A"}, {"code": "B"}])
+        await ensure_unique_index(coupons, "code")
+        return await coupons.index_information()
+
+    indexes = asyncio.run(run())
+    assert any(index.get("unique") and index["key"] == [("code", 1)] for index in indexes.values())
+
+
+def test_existing_duplicates_are_reported():
+    async def run():
+        coupons = AsyncMongoMockClient()["database"].coupons
+        await coupons.insert_many([{"code": "SAVE10"}, {"code": "SAVE10"}, {"code": "OK"}])
+        await ensure_unique_index(coupons, "code")
+
+    with pytest.raises(IndexMigrationError, match="'SAVE10' x2"):
+        asyncio.run(run())
+
+
+def test_transient_collections_get_ttl_indexes():
+    async def run():
+        db = AsyncMongoMockClient()["database"]
+        await ensure_ttl_indexes(db)
+        return {name: await db[name].index_information() for name in TRANSIENT_COLLECTIONS}
+
+    indexes = asyncio.run(run())
+    assert {"archive_leases", "change_stream_checkpoints", "rate_limits"} <= set(indexes)
+    for name, field in TRANSIENT_COLLECTIONS.items():
+        assert any(
+            index["key"] == [(field, 1)] and index.get("expireAfterSeconds") == 0 for index in indexes[name].values()
+        )
@@ -0,0 +1,101 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from event_search import SearchError, build_filters, decode_cursor, encode_cursor, search_events, search_facets
+
+# Read at collection time: the ``server`` fixture sets a default MONGO_URL later on
+MONGO_URL = os.environ.get("MONGO_URL")
+PROJECTION = {"_id": 0, "id": 1, "start_date": 1, "price_regular": 1, "status": 1}
+
+
+def catalog():
+    """Twelve events on three dates and three prices, so every sort key repeats"""
+    from mongomock_motor import AsyncMongoMockClient
+
+    db = AsyncMongoMockClient()["search"]
+    epoch = datetime(2026, 1, 1)
+    events = [{
+        "id": f"e{i:02d}",
+        "start_date": epoch + timedelta(days=i % 3),
+        "price_regular": [10.0, 30.0, 300.0][i % 3],
+        "status": "completed" if i % 4 == 0 else "upcoming",
+        "featured": i < 2,
+    } for i in range(12)]
+    asyncio.run(db.events.insert_many(events))
+    return db
+
+
+@pytest.mark.parametrize("sort, value, last_id", [
+    ("start_date", datetime(2026, 3, 1, 18, 30), "e1"),
+    ("-price", 42.5, "e2"),
+    ("relevance", 40, None),
+])
+def test_cursor_round_trip(sort, value, last_id):
+    cursor = encode_cursor(sort, value, last_id)
+    assert "=" not in cursor
+    expected = value if sort == "relevance" else (value, last_id)
+    assert decode_cursor(cursor, sort) == expected
+
+
+def test_cursor_is_rejected_for_another_sort_or_when_mangled():
+    with pytest.raises(SearchError, match="different sort"):
+        decode_cursor(encode_cursor("price", 10.0, "e1"), "start_date")
+    with pytest.raises(SearchError, match="Invalid cursor"):
+        decode_cursor("not-a-cursor", "start_date")
+
+
+@pytest.mark.parametrize("sort", ["start_date", "-start_date", "price", "-price"])
+def test_pages_with_duplicate_sort_keys_neither_skip_nor_repeat_rows(sort):
+    db = catalog()
+    filters = build_filters(statuses=["upcoming", "completed"])
+
+    async def walk():
+        ids, cursor = [], None
+        while True:
+            page = await search_events(db, PROJECTION, filters, sort=sort, limit=5, cursor=cursor)
+            ids.extend(event["id"] for event in page["events"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                return ids
+
+    everything = asyncio.run(search_events(db, PROJECTION, filters, sort=sort, limit=100))["events"]
+    ids = asyncio.run(walk())
+    assert ids == [event["id"] for event in everything]
+    assert sorted(ids) == [f"e{i:02d}" for i in range(12)]
+
+
+def test_facets_leave_out_their_own_filter():
+    db = catalog()
+    filters = build_filters(statuses=["upcoming"], featured=False, max_price=50)
+    facets = asyncio.run(search_facets(db, filters))
+
+    # Not featured and at most 50: e04 completed; e03, e06, e07, e09, e10 upcoming
+    assert facets["status"] == {"upcoming": 5, "completed": 1}
+    # Upcoming and at most 50: e01 is featured; e03, e06, e07, e09, e10 are not
+    assert facets["featured"] == {"true": 1, "false": 5}
+    # Upcoming and not featured, at any price: e02, e05 and e11 cost 300
+    assert facets["price"] == [
+        {"min": 0, "max": 25, "count": 3},
+        {"min": 25, "max": 50, "count": 2},
+        {"min": 50, "max": 100, "count": 0},
+        {"min": 100, "max": 250, "count": 0},
+        {"min": 250, "max": 500, "count": 3},
+        {"min": 500, "max": None, "count": 0},
+    ]
+
+
+@pytest.mark.skipif(not MONGO_URL, reason="the latency budget needs a real mongod at MONGO_URL")
+def test_search_latency_is_within_budget():
+    from benchmarks import event_search as benchmark
+
+    args = SimpleNamespace(
+        mongo_url=MONGO_URL, db_name="event_search_bench", drop=False, drop_after=False, repeat=20,
+        events=int(os.environ.get("EVENT_SEARCH_EVENTS", 1_000_000)),
+    )
+    report = asyncio.run(benchmark.run(args))
+    over = [(query["query"], query["p95_ms"], query["plan"]) for query in report["queries"] if not query["within_budget"]]
+    assert not over, f"p95 over {benchmark.BUDGET_MS:g} ms"
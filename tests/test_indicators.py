@@ -0,0 +1,135 @@
+"""Indicator backends against a plain-Python reference of the definitions in
+``indicators.py``, and against each other on a long series."""
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from indicators import IndicatorError, get_backend
+
+INDICATORS = ("rsi", "macd", "bollinger_bands")
+# Relative to the output's scale (100 for RSI, the price level otherwise)
+TOLERANCE = 1e-8
+BACKEND_NAMES = ("numpy", "pandas", "talib")
+OPTIONAL_DEPENDENCIES = {"pandas": "pandas", "talib": "talib"}
+
+
+def random_walk(n: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 60000 + np.cumsum(rng.normal(0, 50, n))
+
+
+# Plain-Python reference implementations, one candle at a time
+
+def reference_ema(values, period, start=0):
+    alpha = 2.0 / (period + 1)
+    out = [math.nan] * len(values)
+    first = start + period - 1
+    if first >= len(values):
+        return out
+    average = sum(values[start:first + 1]) / period
+    out[first] = average
+    for i in range(first + 1, len(values)):
+        average = average + alpha * (values[i] - average)
+        out[i] = average
+    return out
+
+
+def reference_rsi(close, period=14):
+    out = [math.nan] * len(close)
+    if len(close) <= period:
+        return out
+    changes = [close[i] - close[i - 1] for i in range(1, len(close))]
+    avg_gain = sum(max(c, 0.0) for c in changes[:period]) / period
+    avg_loss = sum(max(-c, 0.0) for c in changes[:period]) / period
+    for i in range(period, len(close)):
+        if i > period:
+            change = changes[i - 1]
+            avg_gain = (avg_gain * (period - 1) + max(change, 0.0)) / period
+            avg_loss = (avg_loss * (period - 1) + max(-change, 0.0)) / period
+        total = avg_gain + avg_loss
+        out[i] = 100 * avg_gain / total if total else 0.0
+    return out
+
+
+def reference_macd(close, fast=12, slow=26, signal=9):
+    slow_ema = reference_ema(close, slow)
+    fast_ema = reference_ema(close, fast, start=slow - fast)
+    macd_line = [f - s for f, s in zip(fast_ema, slow_ema)]
+    signal_line = reference_ema(macd_line, signal, start=slow - 1)
+    macd_line = [math.nan if i < slow + signal - 2 else v for i, v in enumerate(macd_line)]
+    return macd_line, signal_line, [m - s for m, s in zip(macd_line, signal_line)]
+
+
+def reference_bollinger_bands(close, period=20, std_dev=2):
+    upper, middle, lower = ([math.nan] * len(close) for _ in range(3))
+    for i in range(period - 1, len(close)):
+        window = close[i - period + 1:i + 1]
+        mean = sum(window) / period
+        deviation = math.sqrt(sum((v - mean) ** 2 for v in window) / period)
+        upper[i], middle[i], lower[i] = mean + std_dev * deviation, mean, mean - std_dev * deviation
+    return upper, middle, lower
+
+
+REFERENCES = {
+    "rsi": lambda close: (reference_rsi(close),),
+    "macd": reference_macd,
+    "bollinger_bands": reference_bollinger_bands,
+}
+CASES = {
+    "random_walk": random_walk(3000),
+    "flat": np.full(200, 100.0),
+    "rising": np.arange(1.0, 201.0),
+    "shorter_than_warmup": random_walk(20),
+    "single": np.array([100.0]),
+}
+
+
+def outputs(backend, indicator: str, close: np.ndarray):
+    result = getattr(backend, indicator)(close)
+    return (result,) if indicator == "rsi" else tuple(result)
+
+
+def assert_close(expected, actual, indicator: str, close: np.ndarray):
+    """Warm-up NaNs must line up exactly; values agree relative to the output's scale"""
+    scale = 100.0 if indicator == "rsi" else max(1.0, float(np.abs(close).max()))
+    assert len(expected) == len(actual)
+    for want, got in zip(expected, actual):
+        want, got = np.asarray(want, dtype=np.float64), np.asarray(got, dtype=np.float64)
+        assert want.shape == got.shape
+        np.testing.assert_array_equal(np.isnan(want), np.isnan(got))
+        valid = ~np.isnan(want)
+        if valid.any():
+            assert np.max(np.abs(want[valid] - got[valid])) / scale <= TOLERANCE
+
+
+def load_backend(name: str):
+    if name in OPTIONAL_DEPENDENCIES:
+        pytest.importorskip(OPTIONAL_DEPENDENCIES[name])
+    return get_backend(name)
+
+
+@pytest.fixture(params=BACKEND_NAMES)
+def backend(request):
+    return load_backend(request.param)
+
+
+@pytest.mark.parametrize("case", CASES)
+@pytest.mark.parametrize("indicator", INDICATORS)
+def test_backend_matches_reference(backend, indicator, case):
+    close = CASES[case]
+    assert_close(REFERENCES[indicator](close.tolist()), outputs(backend, indicator, close), indicator, close)
+
+
+@pytest.mark.parametrize("first, second", list(itertools.combinations(BACKEND_NAMES, 2)))
+@pytest.mark.parametrize("indicator", INDICATORS)
+def test_backends_agree_on_a_long_series(first, second, indicator):
+    close = random_walk(200_000, seed=11)
+    expected = outputs(load_backend(first), indicator, close)
+    assert_close(expected, outputs(load_backend(second), indicator, close), indicator, close)
+
+
+def test_unknown_backend():
+    with pytest.raises(IndicatorError, match="Unknown indicator backend"):
+        get_backend("fortran")
@@ -0,0 +1,84 @@
+"""Routes returning lean_response skip response model validation; their
+full-projection output must still satisfy the models they are built from,
+and the OpenAPI schema still documents those models."""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+
+
+def seed(db, user_id):
+    now = datetime.utcnow()
+    events = [{
+        "id": str(uuid.uuid4()), "title": f"Event {i}", "description": "d", "location": "Hall",
+        "start_date": now + timedelta(days=i), "end_date": now + timedelta(days=i, hours=2),
+        "price_regular": 10.0, "status": "upcoming", "featured": True, "created_at": now, "updated_at": now,
+        "internal_note": "not part of the model",
+    } for i in range(3)]
+    ticket = {
+        "id": str(uuid.uuid4()), "event_id": events[0]["id"], "user_id": user_id, "quantity": 1,
+        "ticket_type": "regular", "status": "active", "payment_method": "card", "total_amount": 10.0,
+        "created_at": now, "updated_at": now,
+    }
+
+    async def insert():
+        await db.events.insert_many([dict(event) for event in events])
+        await db.tickets.insert_one(dict(ticket))
+    asyncio.run(insert())
+    return events, ticket
+
+
+def test_event_routes_match_event_model(server, db, client, make_user):
+    admin, headers = make_user(role="admin")
+    events, _ = seed(db, admin["id"])
+    many = TypeAdapter(List[server.Event])
+
+    for path in ("/api/events", "/api/events/featured", "/api/admin/events"):
+        body = client.get(path, headers=headers).json()
+        assert len(many.validate_python(body)) == 3
+        assert all(set(event) <= set(server.Event.model_fields) for event in body)
+    for path in (f"/api/events/{events[0]['id']}", f"/api/admin/events/{events[0]['id']}"):
+        body = client.get(path, headers=headers).json()
+        server.Event.model_validate(body)
+        assert set(body) <= set(server.Event.model_fields)
+
+
+def test_ticket_routes_match_ticket_model(server, db, client, make_user):
+    user, headers = make_user()
+    events, ticket = seed(db, user["id"])
+
+    body = client.get(f"/api/ticket/{ticket['id']}", headers=headers).json()
+    event = body.pop("event")
+    server.Ticket.model_validate(body)
+    server.Event.model_validate(event)
+
+    tickets = client.get("/api/user/tickets", headers=headers).json()
+    assert [t["id"] for t in tickets] == [ticket["id"]]
+    for item in tickets:
+        item.pop("event")
+        server.Ticket.model_validate(item)
+
+
+def test_fields_narrow_the_projection(db, client, make_user):
+    _, headers = make_user()
+    seed(db, "someone")
+    body = client.get("/api/events?fields=id,title", headers=headers).json()
+    assert all(set(event) == {"id", "title"} for event in body)
+
+
+def test_openapi_documents_the_lean_route_models(server):
+    paths = server.app.openapi()["paths"]
+
+    def schema(path):
+        return paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+
+    event = {"$ref": "#/components/schemas/Event"}
+    for path in ("/api/events", "/api/events/featured", "/api/admin/events"):
+        assert schema(path)["items"] == event
+    for path in ("/api/events/{event_id}", "/api/admin/events/{event_id}"):
+        assert schema(path) == event
+    assert schema("/api/user/tickets")["type"] == "array"
+    for path in ("/api/events/search", "/api/ticket/{ticket_id}"):
+        assert schema(path)["type"] == "object"
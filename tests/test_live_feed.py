@@ -0,0 +1,134 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from live_feed import CHANGE_PROJECTION, EventFeed, pre_images_enabled
+
+
+def project(document: dict, projection: dict) -> dict:
+    """Apply an inclusion projection with dotted paths, as the server does"""
+    out = {"_id": document["_id"]}
+    for path in projection:
+        source, target = document, out
+        *parents, leaf = path.split(".")
+        for part in parents:
+            source = source.get(part)
+            if not isinstance(source, dict):
+                break
+            target = target.setdefault(part, {})
+        else:
+            if leaf in source:
+                target[leaf] = source[leaf]
+    return out
+
+
+def test_changes_are_trimmed_to_public_fields():
+    ticket_insert = {
+        "_id": {"_data": "1"}, "operationType": "insert", "ns": {"db": "app", "coll": "tickets"},
+        "fullDocument": {
+            "id": "t1", "event_id": "e1", "quantity": 2, "user_id": "u1",
+            "qr_code": "iVBORw0KGgo", "payment_method": "card", "total_amount": 40.0,
+        },
+    }
+    event_update = {
+        "_id": {"_data": "2"}, "operationType": "update", "ns": {"db": "app", "coll": "events"},
+        "fullDocument": {"id": "e1", "title": "Gala", "status": "ongoing", "created_by": "admin"},
+        "updateDescription": {"updatedFields": {"status": "ongoing", "updated_at": "now"}, "removedFields": []},
+    }
+    ticket, event = project(ticket_insert, CHANGE_PROJECTION), project(event_update, CHANGE_PROJECTION)
+    assert ticket["fullDocument"] == {"id": "t1", "event_id": "e1", "quantity": 2}
+    assert event["updateDescription"] == {"updatedFields": {"status": "ongoing"}}
+
+    async def run():
+        feed = EventFeed(lambda: None, debounce=0)
+        queue = feed.subscribe()
+        feed.apply(ticket)
+        feed.apply(event)
+        await asyncio.sleep(0.01)
+        return queue.get_nowait()
+
+    event_id, payload = asyncio.run(run())
+    assert event_id == "e1"
+    assert payload == '{"event_id":"e1","tickets_sold":2,"changes":{"status":"ongoing"}}'
+
+
+def test_workers_checkpoint_under_their_own_id():
+    from mongomock_motor import AsyncMongoMockClient
+
+    db = AsyncMongoMockClient()["feed"]
+
+    async def run():
+        for worker, token in (("a", {"_data": "01"}), ("b", {"_data": "02"})):
+            feed = EventFeed(lambda: db, worker_id=worker)
+            feed._resume_token = token
+            await feed._save_checkpoint(force=True)
+        return await db.change_stream_checkpoints.find({}, {"_id": 1, "resume_token": 1}).to_list(length=None)
+
+    assert asyncio.run(run()) == [
+        {"_id": "event_feed:a", "resume_token": {"_data": "01"}},
+        {"_id": "event_feed:b", "resume_token": {"_data": "02"}},
+    ]
+
+
+def test_pre_images_are_read_from_the_collection_options():
+    class Database:
+        def __init__(self, options):
+            self.commands = []
+            self.options = options
+
+        async def command(self, name, *args, **kwargs):
+            self.commands.append(name)
+            return {"cursor": {"firstBatch": [{"name": "events", "options": self.options}]}}
+
+    enabled = Database({"changeStreamPreAndPostImages": {"enabled": True}})
+    assert asyncio.run(pre_images_enabled(enabled)) is True
+    assert asyncio.run(pre_images_enabled(Database({}))) is False
+    # Checking never changes the collection; that is left to `python live_feed.py setup`
+    assert enabled.commands == ["listCollections"]
+
+
+def test_replacement_worker_takes_the_slot_and_resumes_its_checkpoint(monkeypatch):
+    from mongomock_motor import AsyncMongoMockClient
+
+    import serve
+
+    master = SimpleNamespace(WORKERS={})
+
+    def fork(pid):
+        worker = SimpleNamespace()
+        serve.pre_fork(master, worker)
+        master.WORKERS[pid] = worker
+        serve.post_fork(master, worker)
+        return os.environ["LIVE_FEED_WORKER_ID"]
+
+    monkeypatch.delenv("LIVE_FEED_WORKER_ID", raising=False)
+    first, second = fork(101), fork(102)
+    del master.WORKERS[101]  # the first worker dies and is reaped
+    replacement = fork(103)
+    assert first != second
+    assert replacement == first
+
+    checkpoints = AsyncMongoMockClient()["feed"].change_stream_checkpoints
+    watched = []
+
+    class Database:
+        change_stream_checkpoints = checkpoints
+
+        async def command(self, name, *args, **kwargs):
+            return {"cursor": {"firstBatch": []}}
+
+        def watch(self, pipeline, **options):
+            watched.append(options["start_after"])
+            raise asyncio.CancelledError()
+
+    async def run():
+        old = EventFeed(Database, worker_id=first)
+        old._resume_token = {"_data": "0123"}
+        await old._save_checkpoint(force=True)
+        with pytest.raises(asyncio.CancelledError):
+            await EventFeed(Database, worker_id=replacement).run()
+
+    asyncio.run(run())
+    assert watched == [{"_data": "0123"}]
@@ -0,0 +1,87 @@
+import pytest
+
+import metrics
+from metrics import Counter, Gauge, Histogram, MetricsMiddleware, Registry
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/api/events")
+
+    assert list(histogram.render()) == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/api/events",le="0.1"} 2',
+        'latency_seconds_bucket{route="/api/events",le="1.0"} 3',
+        'latency_seconds_bucket{route="/api/events",le="+Inf"} 4',
+        'latency_seconds_sum{route="/api/events"} 3.65',
+        'latency_seconds_count{route="/api/events"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = Counter("requests_total", "Requests", ("route", "status"))
+    counter.inc('/a\\b "c"\nd', 200)
+    assert list(counter.render())[-1] == 'requests_total{route="/a\\\\b \\"c\\"\\nd",status="200"} 1'
+
+
+def test_registry_renders_every_metric_and_skips_failing_gauges():
+    registry = Registry()
+    registry.register(Gauge("in_progress", "In progress")).set(3)
+    registry.register(Gauge("broken", "Broken", callback=lambda: 1 / 0))
+    assert registry.render() == "# HELP in_progress In progress\n# TYPE in_progress gauge\nin_progress 3\n"
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """Fresh request metrics and an app whose requests record into them"""
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from starlette.testclient import TestClient
+
+    fresh = {
+        "http_request_duration": Histogram("http_request_duration_seconds", "", ("method", "route")),
+        "http_stream_duration": Histogram("http_stream_duration_seconds", "", ("method", "route")),
+        "http_requests_total": Counter("http_requests_total", "", ("method", "route", "status")),
+        "http_requests_in_progress": Gauge("http_requests_in_progress", ""),
+    }
+    for name, metric in fresh.items():
+        monkeypatch.setattr(metrics, name, metric)
+
+    app = FastAPI()
+
+    @app.get("/api/events/live")
+    async def live():
+        return StreamingResponse(iter([b"data: {}\n\n"]), media_type="text/event-stream")
+
+    @app.get("/api/events/{event_id}")
+    async def get_event(event_id: str):
+        return {"id": event_id}
+
+    app.add_middleware(MetricsMiddleware, stream_paths=("/api/events/live",))
+    return TestClient(app), fresh
+
+
+def test_routes_are_labelled_by_template_not_raw_path(recorded):
+    client, fresh = recorded
+    for event_id in ("e1", "e2", "e3"):
+        assert client.get(f"/api/events/{event_id}").status_code == 200
+    assert client.get("/api/unknown/path").status_code == 404
+
+    assert fresh["http_requests_total"]._values == {
+        ("GET", "/api/events/{event_id}", "200"): 3,
+        ("GET", "other", "404"): 1,
+    }
+    assert set(fresh["http_request_duration"]._series) == {("GET", "/api/events/{event_id}"), ("GET", "other")}
+    assert fresh["http_requests_in_progress"].value == 0
+
+
+def test_streams_are_timed_apart_from_request_latency(recorded):
+    client, fresh = recorded
+    assert client.get("/api/events/live").status_code == 200
+
+    assert fresh["http_request_duration"]._series == {}
+    assert set(fresh["http_stream_duration"]._series) == {("GET", "/api/events/live")}
+    assert fresh["http_requests_total"]._values == {("GET", "/api/events/live", "200"): 1}
+    assert fresh["http_requests_in_progress"].value == 0
@@ -0,0 +1,49 @@
+import jwt
+import pytest
+
+from profiling import RequestProfilingMiddleware
+
+PROFILE = {"X-Profile": "1"}
+
+
+@pytest.fixture
+def profiled(server, db):
+    """The app behind the profiling middleware, authorised as ENABLE_REQUEST_PROFILING does"""
+    from starlette.testclient import TestClient
+
+    return TestClient(RequestProfilingMiddleware(server.app, authorize=server.is_admin_request))
+
+
+def test_admins_get_folded_stacks_instead_of_the_response(profiled, make_user):
+    _, headers = make_user(role="admin")
+    response = profiled.get("/api/events", headers={**headers, **PROFILE})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/plain; charset=utf-8"
+    assert response.headers["x-profiled-status"] == "200"
+    assert int(response.headers["x-profile-samples"]) >= 0
+    assert not response.text.startswith("[")
+
+
+@pytest.mark.parametrize("role", [None, "user", "forged"])
+def test_other_callers_cannot_profile(profiled, make_user, role):
+    if role is None:
+        headers = {}
+    elif role == "forged":
+        admin, _ = make_user(role="admin")
+        headers = {"Authorization": f"Bearer {jwt.encode({'sub': admin['id']}, 'some-other-secret-that-is-long-enough', algorithm='HS256')}"}
+    else:
+        _, headers = make_user(role=role)
+
+    response = profiled.get("/api/events", headers={**headers, **PROFILE})
+    assert response.status_code == 403
+    assert "x-profiled-status" not in response.headers
+    assert response.text == "Profiling requires an admin token\n"
+
+
+def test_requests_without_the_header_are_served_normally(profiled, make_user):
+    _, headers = make_user(role="user")
+    response = profiled.get("/api/events", headers={**headers, "X-Profile": "0"})
+    assert response.status_code == 200
+    assert response.json() == []
+    assert "x-profiled-status" not in response.headers
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from rate_limiting import LoadShedder, MemoryStore, ProtectionMiddleware
+
+
+def scope(*forwarded, client=("10.0.0.1", 5000)):
+    return {"headers": [(b"x-forwarded-for", value.encode()) for value in forwarded], "client": client}
+
+
+@pytest.mark.parametrize("trusted_proxies, forwarded, expected", [
+    (0, ["1.1.1.1"], "10.0.0.1"),
+    (1, [], "10.0.0.1"),
+    # The client can prepend anything; only the entry our proxy appended counts
+    (1, ["6.6.6.6, 203.0.113.7"], "203.0.113.7"),
+    (2, ["6.6.6.6, 203.0.113.7, 172.16.0.2"], "203.0.113.7"),
+    (2, ["6.6.6.6", "203.0.113.7, 172.16.0.2"], "203.0.113.7"),
+    (3, ["203.0.113.7"], "203.0.113.7"),
+])
+def test_client_ip_skips_trusted_proxies(trusted_proxies, forwarded, expected):
+    middleware = ProtectionMiddleware(None, trusted_proxies=trusted_proxies)
+    assert middleware.client_ip(scope(*forwarded)) == expected
+
+
+def test_memory_store_evicts_least_recently_hit_keys_down_to_the_cap():
+    store = MemoryStore(max_keys=3)
+
+    async def run():
+        for key in ("a", "b", "c"):
+            await store.hit(key, 0.0, 60.0)
+        await store.hit("a", 0.0, 60.0)
+        await store.hit("d", 0.0, 60.0)
+
+    asyncio.run(run())
+    assert list(store._counters) == ["c", "a", "d"]
+
+
+def test_memory_store_drops_expired_windows_once_per_window():
+    store = MemoryStore()
+
+    async def run():
+        await store.hit("old", 0.0, 60.0)
+        await store.hit("recent", 60.0, 60.0)
+        assert await store.hit("recent", 120.0, 60.0) == (1, 1)
+        return list(store._counters)
+
+    assert asyncio.run(run()) == ["recent"]
+
+
+async def call(middleware, path, client=("10.0.0.1", 5000)):
+    """Send one request through the middleware; return the response status"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": [], "client": client}
+    await middleware(scope, receive, send)
+    return messages[0]["status"]
+
+
+async def ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def test_heavy_routes_are_shed_first_without_a_rate_limiter():
+    shedder = LoadShedder(max_in_flight=10, shed_all_at=3.0)
+    middleware = ProtectionMiddleware(ok, shedder=shedder, heavy_paths=("/api/auth/login",))
+
+    async def run():
+        shedder.in_flight = 10
+        return await call(middleware, "/api/auth/login"), await call(middleware, "/api/events")
+
+    assert asyncio.run(run()) == (503, 200)
+
+
+def test_open_streams_are_capped_per_client():
+    async def run():
+        release = asyncio.Event()
+
+        async def stream(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await release.wait()
+
+        middleware = ProtectionMiddleware(stream, stream_paths=("/api/events/live",), max_streams_per_client=2)
+        streams = [asyncio.create_task(call(middleware, "/api/events/live")) for _ in range(2)]
+        await asyncio.sleep(0)
+        rejected = await call(middleware, "/api/events/live")
+        other_client = asyncio.create_task(call(middleware, "/api/events/live", client=("10.0.0.2", 5000)))
+        await asyncio.sleep(0)
+        release.set()
+        statuses = await asyncio.gather(*streams, other_client)
+        return rejected, statuses, dict(middleware.open_streams)
+
+    assert asyncio.run(run()) == (429, [200, 200, 200], {})
+
+
+def test_unconfigured_proxy_is_reported_once(caplog):
+    middleware = ProtectionMiddleware(None)
+    with caplog.at_level("WARNING"):
+        for _ in range(3):
+            assert middleware.client_ip(scope("203.0.113.7")) == "10.0.0.1"
+    assert [record.message.count("RATE_LIMIT_TRUSTED_PROXIES") for record in caplog.records] == [1]
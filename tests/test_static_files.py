@@ -0,0 +1,86 @@
+import gzip
+import os
+
+import pytest
+
+from static_files import IMMUTABLE, REVALIDATE, FrontendStaticFiles, accepted_encodings
+
+ASSET = "static/js/main.3f2a9c1b.js"
+
+
+@pytest.fixture
+def build(tmp_path):
+    """A frontend build with brotli and gzip siblings for index.html and one hashed asset"""
+    for name, body in (("index.html", b"<html></html>" * 50), (ASSET, b"console.log(1);" * 50)):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+        (tmp_path / f"{name}.br").write_bytes(b"brotli bytes")
+        (tmp_path / f"{name}.gz").write_bytes(gzip.compress(body))
+    return tmp_path
+
+
+def fetch(build, name: str, accept_encoding: str = None, **headers):
+    """Ask the static files app for ``name``; return the response it would send"""
+    full_path = str(build / name)
+    request_headers = {**headers, **({"accept-encoding": accept_encoding} if accept_encoding is not None else {})}
+    scope = {"type": "http", "headers": [(k.encode(), v.encode()) for k, v in request_headers.items()]}
+    return FrontendStaticFiles(directory=build).file_response(full_path, os.stat(full_path), scope)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", {"gzip", "deflate", "br"}),
+    ("br;q=0, gzip", {"gzip"}),
+    ("BR;q=0.5, gzip;q=0", {"br"}),
+    ("gzip;q=oops", set()),
+    ("*", {"*", "br", "gzip"}),
+    ("", set()),
+])
+def test_accepted_encodings(header, expected):
+    assert accepted_encodings(header) == expected
+
+
+@pytest.mark.parametrize("accept_encoding, encoding, suffix", [
+    ("gzip, deflate, br", "br", ".br"),
+    ("gzip, br;q=0", "gzip", ".gz"),
+    ("*", "br", ".br"),
+    ("identity", None, ""),
+    (None, None, ""),
+])
+def test_the_preferred_accepted_variant_is_served(build, accept_encoding, encoding, suffix):
+    response = fetch(build, "index.html", accept_encoding)
+    assert response.headers.get("content-encoding") == encoding
+    assert response.path == str(build / "index.html") + suffix
+    assert response.headers["content-length"] == str(os.path.getsize(response.path))
+    assert response.media_type == "text/html"
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_a_variant_older_than_its_source_is_skipped(build):
+    source = build / "index.html"
+    stale = source.stat().st_mtime - 60
+    os.utime(build / "index.html.br", (stale, stale))
+
+    response = fetch(build, "index.html", "br, gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    os.utime(build / "index.html.gz", (stale, stale))
+    response = fetch(build, "index.html", "br, gzip")
+    assert "content-encoding" not in response.headers
+    assert response.path == str(source)
+
+
+def test_hashed_assets_are_immutable_and_everything_else_revalidates(build):
+    (build / "manifest.json").write_text("{}")
+    assert fetch(build, ASSET, "br").headers["cache-control"] == IMMUTABLE
+    assert fetch(build, "index.html", "br").headers["cache-control"] == REVALIDATE
+    assert fetch(build, "manifest.json").headers["cache-control"] == REVALIDATE
+
+
+def test_each_variant_revalidates_against_its_own_etag(build):
+    brotli, plain = fetch(build, "index.html", "br"), fetch(build, "index.html")
+    assert brotli.headers["etag"] != plain.headers["etag"]
+
+    cached = fetch(build, "index.html", "br", **{"if-none-match": brotli.headers["etag"]})
+    assert cached.status_code == 304
+    assert cached.headers["vary"] == "Accept-Encoding"
+    assert fetch(build, "index.html", **{"if-none-match": brotli.headers["etag"]}).status_code == 200